@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from PySide6.QtWidgets import QMessageBox
+from PySide6.QtWidgets import QFileDialog, QInputDialog, QMessageBox
 
-from core.flow_logic import render_summary_text, render_work_orders_summary
+from core.flow_logic import NestSummary, render_work_orders_summary
 from core.edit_wo_dialog import work_orders_table_dialog
 from core.sheets_table_dialog import sheets_table_dialog
-from core.docx_adapter import generate_doc_with_gui_color
+from core.docx_adapter import generate_doc_multi_color, generate_doc_with_gui_color
+from core.job_store import JobStore, describe_job, reprint_job
+from core.preflight import format_problems, preflight
+from core.reprint import generate_reprint_doc, parse_selection
+from core.serials import SerialError, is_serialized, serialize_lot
+from core.delta import generate_delta_from_previous, render_void_list
 
 
 class Controller:
@@ -26,7 +31,8 @@ class Controller:
             work_orders = work_orders_table_dialog(
                 self.ui,
                 work_orders,               # <-- prefill with previous entries
-                title="Enter Work Orders"
+                title="Enter Work Orders",
+                lot_number=lot
             )
             if work_orders is None:
                 self._log("Cancelled while entering Work Orders.")
@@ -53,7 +59,9 @@ class Controller:
                 return
 
             self.ui.output.clear()
-            self._log(render_summary_text(work_orders, sheets))
+            self._show_summary(work_orders, sheets)
+            self._log_page_count(work_orders, sheets)
+            self.ui.preview.set_job(lot, work_orders, sheets, self._stock(), self._barcode_profile())
 
             redo = QMessageBox.question(
                 self.ui,
@@ -64,6 +72,14 @@ class Controller:
             if redo == QMessageBox.No:
                 break
 
+        # Preflight: report every data / output problem now, not halfway through rendering
+        colors = [color] + [c for c, cb in self.ui.extra_color_checks.items() if cb.isChecked()]
+        problems = preflight(lot, work_orders, sheets, colors=colors, stock=self._stock())
+        if problems:
+            self._log("\n❌ " + format_problems(problems, limit=len(problems)))
+            QMessageBox.critical(self.ui, "Cannot generate", format_problems(problems))
+            return
+
         # 3) Confirm generate
         do_gen = QMessageBox.question(
             self.ui,
@@ -75,13 +91,48 @@ class Controller:
             self._log("\n✅ Cancelled. No document generated.")
             return
 
-        # 4) Generate DOCX using ORIGINAL layout (untouched)
+        # 4) Lot already generated before? Offer delta (only new/changed labels)
+        try:
+            previous = JobStore().latest_for_lot(lot)
+        except Exception:
+            previous = None
+        if previous is not None and (self.ui.serial_check.isChecked()
+                                     or any(is_serialized(wo) for wo in previous["work_orders"])):
+            previous = None  # serialized lots are numbered per print: no delta
+
+        if previous is not None:
+            do_delta = QMessageBox.question(
+                self.ui,
+                "Delta print",
+                f"LOT {lot} was already generated:\n{previous['output_path']}\n\n"
+                "Print only new/changed labels (delta) and a void list?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if do_delta == QMessageBox.Yes:
+                self._generate_delta(previous, work_orders, sheets, color)
+                return
+
+        # 5) Generate DOCX using ORIGINAL layout (untouched)
+        renderer = self.ui.renderer_combo.currentText()
+        stock = self._stock()
+        if self.ui.serial_check.isChecked():
+            work_orders = self._serialize(lot, work_orders, sheets)
+            if work_orders is None:
+                return
+        extra = [c for c, cb in self.ui.extra_color_checks.items() if cb.isChecked() and c != color.upper()]
+        if extra:
+            self._generate_colors(lot, work_orders, sheets, [color] + extra, renderer, stock)
+            return
+
         try:
             output_path = generate_doc_with_gui_color(
                 lot_number=lot,
                 work_orders=work_orders,
                 sheets=sheets,
-                color=color
+                color=color,
+                renderer=renderer,
+                stock=stock,
+                barcode_profile=self._barcode_profile()
             )
         except Exception as e:
             QMessageBox.critical(self.ui, "Error", f"Failed to generate DOCX:\n{e}")
@@ -90,5 +141,161 @@ class Controller:
         QMessageBox.information(self.ui, "Done", f"Document generated:\n{output_path}")
         self._log(f"\n✅ Document generated:\n{output_path}")
 
+    def _serialize(self, lot: str, work_orders, sheets):
+        """Reserve per-piece serials (core.serials); None if the template cannot be used."""
+        from main import describe_serials
+
+        try:
+            work_orders = serialize_lot(lot, work_orders, sheets, self.ui.serial_template_combo.currentText(),
+                                        of_total=self.ui.piece_numbers_check.isChecked())
+        except SerialError as e:
+            QMessageBox.critical(self.ui, "Serials", str(e))
+            return None
+        self._log(f"\n✅ Serials reserved:\n{describe_serials(lot, work_orders, sheets)}")
+        return work_orders
+
+    def on_barcode_profile_changed(self, name: str):
+        """Barcode profile for everything generated from now on (core.barcode_profiles); refreshes the preview."""
+        from core.barcode_profiles import BarcodeProfileError, get_profile
+
+        try:
+            get_profile(name)
+        except BarcodeProfileError as e:
+            QMessageBox.critical(self.ui, "Barcode profile", str(e))
+            return
+        self.ui.preview.set_barcode_profile(name)
+        self._log(f"Barcode profile: {name}")
+
+    def _stock(self):
+        """Selected label stock name, or None for the renderer's default."""
+        return self.ui.stock_combo.currentData()
+
+    def _barcode_profile(self):
+        """Selected barcode profile name (recorded with the job)."""
+        return self.ui.barcode_combo.currentText() or None
+
+    def _show_summary(self, work_orders, sheets):
+        """Nest summary goes to the table view; the log only gets the totals."""
+        summary = NestSummary(work_orders, sheets)
+        self.ui.summary.set_summary(summary)
+        self.ui.tabs.setCurrentWidget(self.ui.summary)
+        self._log(f"Nest: {summary.sheet_count} sheets, {summary.total_pieces} pcs for {summary.wo_count} WOs "
+                  "(see the Nest summary tab)")
+        for i in summary.mismatched:
+            wo = work_orders[i]
+            self._log(f"⚠️ WO {wo['work_order']} | PART {wo['part']}: {summary.wo_totals[i]} pcs "
+                      f"(expected {summary.expected[i]})")
+
+    def _log_page_count(self, work_orders, sheets):
+        from core.label_stock import get_stock, lot_counts
+
+        stock = get_stock(self._stock())
+        pages, labels = lot_counts(stock, work_orders, sheets)
+        self._log(f"\n{labels} labels on {pages} pages ({stock.name}, {stock.capacity} per page)")
+
+    def _generate_colors(self, lot: str, work_orders, sheets, colors, renderer: str, stock=None):
+        try:
+            output_paths = generate_doc_multi_color(lot, work_orders, sheets, colors, renderer, stock,
+                                                    self._barcode_profile())
+        except Exception as e:
+            QMessageBox.critical(self.ui, "Error", f"Failed to generate DOCX:\n{e}")
+            return
+
+        msg = "Documents generated:\n" + "\n".join(output_paths)
+        QMessageBox.information(self.ui, "Done", msg)
+        self._log(f"\n✅ {msg}")
+
+    def _generate_delta(self, previous: dict, work_orders, sheets, color: str):
+        try:
+            docx_path, txt_path, delta = generate_delta_from_previous(previous, work_orders, sheets, color,
+                                                                      stock=self._stock(),
+                                                                      barcode_profile=self._barcode_profile())
+        except Exception as e:
+            QMessageBox.critical(self.ui, "Error", f"Failed to generate delta:\n{e}")
+            return
+
+        self._log("\n" + render_void_list(previous["lot"], previous["work_orders"], delta, work_orders))
+        if docx_path:
+            msg = f"Delta document generated:\n{docx_path}\n\nVoid list:\n{txt_path}"
+        else:
+            msg = f"Nothing new to print.\n\nVoid list:\n{txt_path}"
+        QMessageBox.information(self.ui, "Done", msg)
+        self._log(f"\n✅ {msg}")
+
+    def on_find_and_reprint(self):
+        wo_num = self.ui.find_wo_input.text().strip()
+        if not wo_num:
+            QMessageBox.warning(self.ui, "Missing WO", "Please enter a WO number to look up.")
+            return
+
+        store = JobStore()
+        jobs = store.find_by_work_order(wo_num)
+        if not jobs:
+            QMessageBox.information(self.ui, "Not found", f"No generated lots found for WO {wo_num}.")
+            return
+
+        self.ui.output.clear()
+        self._log(f"WO {wo_num} was generated in:")
+        for job in jobs:
+            self._log(f"  {describe_job(job)}")
+
+        # Most recent first; pick one to reprint
+        labels = [describe_job(job) for job in jobs]
+        choice, ok = QInputDialog.getItem(self.ui, "Reprint", f"Reprint which lot for WO {wo_num}?", labels, 0, False)
+        if not ok:
+            return
+        job = jobs[labels.index(choice)]
+
+        # Optional partial reprint (blank = whole lot)
+        spec, ok = QInputDialog.getText(
+            self.ui,
+            "Reprint",
+            "Labels to reprint (blank = whole lot)\n"
+            "e.g.  sheets 3,5   |   wo 12345; pieces 10-20   |   pages 4-6",
+        )
+        if not ok:
+            return
+
+        try:
+            if spec.strip():
+                full = store.load_job(job["id"])
+                output_path = generate_reprint_doc(
+                    full["lot"], full["work_orders"], full["sheets"],
+                    parse_selection(spec), full["color"], stock=full["stock"],
+                    barcode_profile=full["barcode_profile"]
+                )
+            else:
+                output_path = reprint_job(job["id"], store)
+        except Exception as e:
+            QMessageBox.critical(self.ui, "Error", f"Failed to reprint:\n{e}")
+            return
+
+        QMessageBox.information(self.ui, "Done", f"Document generated:\n{output_path}")
+        self._log(f"\n✅ Document generated:\n{output_path}")
+
+    def on_merge_lots(self):
+        from core.docx_merge import MergeError, merge_documents
+
+        paths, _ = QFileDialog.getOpenFileNames(self.ui, "Lots to merge (in print order)", "output",
+                                                "Word documents (*.docx)")
+        if len(paths) < 2:
+            if paths:
+                QMessageBox.information(self.ui, "Merge", "Select at least two lot documents.")
+            return
+        output, _ = QFileDialog.getSaveFileName(self.ui, "Save merged print file", "output/SHIFT.docx",
+                                                "Word documents (*.docx)")
+        if not output:
+            return
+
+        try:
+            result = merge_documents(paths, output)
+        except (MergeError, OSError) as e:
+            QMessageBox.critical(self.ui, "Error", f"Failed to merge lots:\n{e}")
+            return
+
+        msg = (f"{result['lots']} lots merged in {result['merge_ms']:.0f} ms:\n{result['path']}")
+        QMessageBox.information(self.ui, "Done", msg)
+        self._log(f"\n✅ {msg}")
+
     def _log(self, msg: str):
         self.ui.output.append(msg)
@@ -1,11 +1,19 @@
 import sys
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
 from .ui_main import MainWindow
 
 def main():
+    from core.metrics import set_source
+    set_source("gui")
     app = QApplication(sys.argv)
     win = MainWindow()
     win.show()
+
+    # Load python-docx/barcode/Pillow in the background once the window is up
+    from core.docx_adapter import warm_up_in_background
+    QTimer.singleShot(0, warm_up_in_background)
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QSize, Qt
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import (
+    QDialog, QLabel, QListView, QScrollArea, QVBoxLayout, QWidget
+)
+
+THUMB_WIDTH = 170
+PAGE_VIEW_WIDTH = 850
+
+
+def _to_pixmap(img) -> QPixmap:
+    # core.preview renders 8-bit grayscale ("L") pages
+    qimg = QImage(img.tobytes(), img.width, img.height, img.width, QImage.Format_Grayscale8)
+    return QPixmap.fromImage(qimg.copy())  # copy: the bytes object is temporary
+
+
+class _PagesModel(QAbstractListModel):
+    """
+    One row per page. Qt only asks data() for rows in view, so only visible
+    pages are rasterized; core.preview keeps an LRU of rendered pages.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.preview = None
+
+    def set_preview(self, preview):
+        self.beginResetModel()
+        self.preview = preview
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.preview is None else self.preview.page_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.preview is None:
+            return None
+        page = index.row() + 1
+        if role == Qt.DisplayRole:
+            return f"Page {page}"
+        if role == Qt.DecorationRole:
+            return _to_pixmap(self.preview.render_page(page, THUMB_WIDTH))
+        return None
+
+
+class PreviewPane(QWidget):
+    """Page thumbnails of the lot being prepared (double-click a page to enlarge)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.title = QLabel("Preview")
+        layout.addWidget(self.title)
+
+        self.model = _PagesModel(self)
+        self.view = QListView()
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)  # lets Qt lay out without rendering every page
+        thumb_height = round(THUMB_WIDTH * 11 / 8.5)  # Letter; other stocks scale within the icon
+        self.view.setIconSize(QSize(THUMB_WIDTH, thumb_height))
+        self.view.setGridSize(QSize(THUMB_WIDTH + 16, thumb_height + 28))
+        self.view.setSpacing(6)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view)
+
+        self.view.doubleClicked.connect(self._open_page)
+        self._job = None  # set_job arguments of the lot shown (re-rendered on a barcode profile change)
+
+    def set_job(self, lot_number: str, work_orders: list[dict], sheets: list[dict], stock: str | None = None,
+                barcode_profile: str | None = None):
+        # Imported here: Pillow stays out of GUI start-up (core.startup_check)
+        from core.preview import PagePreview
+
+        preview = PagePreview(lot_number, work_orders, sheets, stock=stock, barcode_profile=barcode_profile)
+        self._job = (lot_number, work_orders, sheets, stock)
+        self.model.set_preview(preview)
+        self.title.setText(f"Preview - LOT {lot_number} ({preview.page_count} pages)")
+        self.view.scrollToTop()
+
+    def set_barcode_profile(self, barcode_profile: str | None):
+        """Re-render the lot shown (if any) with another barcode profile."""
+        if self._job is not None:
+            self.set_job(*self._job, barcode_profile=barcode_profile)
+
+    def clear(self):
+        self._job = None
+        self.model.set_preview(None)
+        self.title.setText("Preview")
+
+    def _open_page(self, index: QModelIndex):
+        preview = self.model.preview
+        if preview is None:
+            return
+        page = index.row() + 1
+
+        dlg = QDialog(self)
+        dlg.setWindowTitle(f"LOT {preview.lot_number} - Page {page} of {preview.page_count}")
+        dlg.resize(PAGE_VIEW_WIDTH + 40, 900)
+        label = QLabel()
+        label.setPixmap(_to_pixmap(preview.render_page(page, PAGE_VIEW_WIDTH)))
+        scroll = QScrollArea()
+        scroll.setWidget(label)
+        QVBoxLayout(dlg).addWidget(scroll)
+        dlg.exec()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QBrush, QColor, QFont
+from PySide6.QtWidgets import (
+    QApplication, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableView, QVBoxLayout, QWidget
+)
+
+MISMATCH_BRUSH = QBrush(QColor(255, 205, 205))
+
+
+class _SummaryModel(QAbstractTableModel):
+    """
+    Rows = sheets + a TOTAL row, columns = Sheet | one per WO | Total.
+    Cells are read straight from the NestSummary arrays; Qt only asks data()
+    for the cells in view.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.summary = None
+        self._bold = QFont()
+        self._bold.setBold(True)
+
+    def set_summary(self, summary):
+        self.beginResetModel()
+        self.summary = summary
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.summary is None else self.summary.sheet_count + 1
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.summary is None else self.summary.wo_count + 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        s = self.summary
+        if s is None or orientation != Qt.Horizontal:
+            return None
+        if section == 0:
+            return "Sheet" if role == Qt.DisplayRole else None
+        if section == s.wo_count + 1:
+            return "Total" if role == Qt.DisplayRole else None
+        wo = s.work_orders[section - 1]
+        if role == Qt.DisplayRole:
+            return f"WO {wo['work_order']}\n{wo['part']}"
+        if role == Qt.ToolTipRole:
+            return f"WO {wo['work_order']} | PART {wo['part']} (expected {s.expected[section - 1]})"
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        s = self.summary
+        if not index.isValid() or s is None:
+            return None
+        row, col = index.row(), index.column()
+        total_row = row == s.sheet_count
+        wo_index = col - 1
+
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return "TOTAL" if total_row else str(s.sheet_numbers[row])
+            if col == s.wo_count + 1:
+                return str(s.total_pieces if total_row else s.sheet_totals[row])
+            q = s.wo_totals[wo_index] if total_row else s.cell(row, wo_index)
+            if total_row and s.mismatch(wo_index):
+                return f"{q} / {s.expected[wo_index]}"
+            return str(q) if q else ""
+        if role == Qt.TextAlignmentRole and col > 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if total_row and role == Qt.FontRole:
+            return self._bold
+        if total_row and 0 <= wo_index < s.wo_count:
+            diff = s.mismatch(wo_index)
+            if diff and role == Qt.BackgroundRole:
+                return MISMATCH_BRUSH
+            if diff and role == Qt.ToolTipRole:
+                return f"{'Over' if diff > 0 else 'Short'} by {abs(diff)} (expected {s.expected[wo_index]})"
+        return None
+
+
+class SummaryView(QWidget):
+    """Nest summary as a table (sheets x WOs); the console text is only built when copied/exported."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        top = QHBoxLayout()
+        self.title = QLabel("No nest yet")
+        top.addWidget(self.title, 1)
+        self.copy_btn = QPushButton("Copy text")
+        self.export_btn = QPushButton("Export text...")
+        top.addWidget(self.copy_btn)
+        top.addWidget(self.export_btn)
+        layout.addLayout(top)
+
+        self.model = _SummaryModel(self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setAlternatingRowColors(True)
+        self.view.verticalHeader().hide()
+        # Fixed row height: no per-row size hints, scrolling stays O(visible rows)
+        self.view.verticalHeader().setDefaultSectionSize(22)
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        layout.addWidget(self.view)
+
+        self.copy_btn.clicked.connect(self._copy_text)
+        self.export_btn.clicked.connect(self._export_text)
+        self._set_enabled(False)
+
+    def set_summary(self, summary):
+        self.model.set_summary(summary)
+        bad = len(summary.mismatched)
+        self.title.setText(f"{summary.sheet_count} sheets, {summary.wo_count} WOs, {summary.total_pieces} pcs"
+                           + (f" — {bad} WO(s) do not match TOTAL QTY" if bad else ""))
+        self._set_enabled(True)
+
+    def _set_enabled(self, enabled: bool):
+        self.copy_btn.setEnabled(enabled)
+        self.export_btn.setEnabled(enabled)
+
+    def _copy_text(self):
+        if self.model.summary is not None:
+            QApplication.clipboard().setText(self.model.summary.text())
+
+    def _export_text(self):
+        summary = self.model.summary
+        if summary is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export nest summary", "nest_summary.txt", "Text (*.txt)")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                for line in summary.iter_text_lines():
+                    f.write(line + "\n")
@@ -1,15 +1,24 @@
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QPushButton, QComboBox, QTextEdit
+    QLabel, QLineEdit, QPushButton, QComboBox, QTextEdit, QCheckBox, QSplitter, QTabWidget
 )
 
+from core.barcode_profiles import available_profiles as available_barcode_profiles
+from core.barcode_profiles import get_profile as get_barcode_profile
+from core.label_stock import available_stocks
+from core.renderers import DEFAULT_RENDERER, available_renderers, get_renderer
+from core.serials import DEFAULT_TEMPLATE, TEMPLATES
+
 from .controller import Controller
+from .preview_pane import PreviewPane
+from .summary_view import SummaryView
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Zebra Labels")
-        self.resize(950, 700)
+        self.resize(1300, 760)
 
         self.ctrl = Controller(self)
 
@@ -31,18 +40,100 @@ class MainWindow(QMainWindow):
         self.color_combo = QComboBox()
         self.color_combo.addItems(["WHITE", "ORANGE", "GREEN", "YELLOW"])
         color_row.addWidget(self.color_combo)
+
+        # Extra colors: same render, one more file per checked color
+        color_row.addWidget(QLabel("Also:"))
+        self.extra_color_checks = {}
+        for c in ["WHITE", "ORANGE", "GREEN", "YELLOW"]:
+            cb = QCheckBox(c)
+            color_row.addWidget(cb)
+            self.extra_color_checks[c] = cb
+        color_row.addStretch(1)
         layout.addLayout(color_row)
 
+        # Renderer row (registered document backends, core.renderers)
+        renderer_row = QHBoxLayout()
+        renderer_row.addWidget(QLabel("Renderer:"))
+        self.renderer_combo = QComboBox()
+        for name in available_renderers():
+            self.renderer_combo.addItem(name)
+            self.renderer_combo.setItemData(self.renderer_combo.count() - 1,
+                                            get_renderer(name).description, Qt.ToolTipRole)
+        self.renderer_combo.setCurrentText(DEFAULT_RENDERER)
+        renderer_row.addWidget(self.renderer_combo)
+
+        # Label stock (core.label_stock); item data None = the renderer's own default
+        renderer_row.addWidget(QLabel("Stock:"))
+        self.stock_combo = QComboBox()
+        self.stock_combo.addItem("(renderer default)", None)
+        for name in available_stocks():
+            self.stock_combo.addItem(name, name)
+        renderer_row.addWidget(self.stock_combo)
+
+        # Barcode sizing (core.barcode_profiles): scaled, or whole dots for the printer head
+        renderer_row.addWidget(QLabel("Barcode:"))
+        self.barcode_combo = QComboBox()
+        for name in available_barcode_profiles():
+            self.barcode_combo.addItem(name)
+            self.barcode_combo.setItemData(self.barcode_combo.count() - 1,
+                                           get_barcode_profile(name).description, Qt.ToolTipRole)
+        self.barcode_combo.setCurrentText(get_barcode_profile().name)
+        renderer_row.addWidget(self.barcode_combo)
+        renderer_row.addStretch(1)
+        layout.addLayout(renderer_row)
+
+        # Serialized pieces (core.serials): unique barcode per piece label
+        serial_row = QHBoxLayout()
+        self.serial_check = QCheckBox("Serialize pieces")
+        serial_row.addWidget(self.serial_check)
+        serial_row.addWidget(QLabel("Template:"))
+        self.serial_template_combo = QComboBox()
+        self.serial_template_combo.setEditable(True)  # built-in name or a format like {code}-{lot}-{seq:04d}
+        for name, template in TEMPLATES.items():
+            self.serial_template_combo.addItem(name)
+            self.serial_template_combo.setItemData(self.serial_template_combo.count() - 1, template, Qt.ToolTipRole)
+        self.serial_template_combo.setCurrentText(DEFAULT_TEMPLATE)
+        serial_row.addWidget(self.serial_template_combo)
+        self.piece_numbers_check = QCheckBox('Print "n of N"')
+        serial_row.addWidget(self.piece_numbers_check)
+        serial_row.addStretch(1)
+        layout.addLayout(serial_row)
+
         # Buttons row
         btn_row = QHBoxLayout()
         self.generate_btn = QPushButton("Generate Word (Full Flow)")
         btn_row.addWidget(self.generate_btn)
+        self.merge_btn = QPushButton("Merge Lots...")
+        btn_row.addWidget(self.merge_btn)
         layout.addLayout(btn_row)
 
-        # Output / log
+        # Job lookup row (find a previous generation by WO # and reprint it)
+        find_row = QHBoxLayout()
+        find_row.addWidget(QLabel("Find WO #:"))
+        self.find_wo_input = QLineEdit()
+        self.find_wo_input.setPlaceholderText("e.g. 12345")
+        find_row.addWidget(self.find_wo_input)
+        self.reprint_btn = QPushButton("Find && Reprint")
+        find_row.addWidget(self.reprint_btn)
+        layout.addLayout(find_row)
+
+        # Output / log and nest summary table + page preview
+        splitter = QSplitter(Qt.Horizontal)
+        self.tabs = QTabWidget()
         self.output = QTextEdit()
         self.output.setReadOnly(True)
-        layout.addWidget(self.output)
+        self.tabs.addTab(self.output, "Log")
+        self.summary = SummaryView()
+        self.tabs.addTab(self.summary, "Nest summary")
+        splitter.addWidget(self.tabs)
+        self.preview = PreviewPane()
+        splitter.addWidget(self.preview)
+        splitter.setSizes([550, 750])
+        layout.addWidget(splitter)
 
         # Wire events
         self.generate_btn.clicked.connect(self.ctrl.on_generate_full_flow)
+        self.reprint_btn.clicked.connect(self.ctrl.on_find_and_reprint)
+        self.merge_btn.clicked.connect(self.ctrl.on_merge_lots)
+        self.barcode_combo.currentTextChanged.connect(self.ctrl.on_barcode_profile_changed)
+        self.find_wo_input.returnPressed.connect(self.ctrl.on_find_and_reprint)
@@ -1,14 +1,20 @@
+import io
 import os
 import tempfile
-import barcode
-from barcode.writer import ImageWriter
+
+from core.code128 import PYTHON_BARCODE_OPTIONS, render_image, save_png
+
+# Barcode appearance configuration (sizes in mm): what python-barcode drew
+# (its Code128 ignored our 0.25 mm / 12 mm / 1.5 mm settings), so the placed
+# barcode keeps its size on the label
+BARCODE_OPTIONS = dict(PYTHON_BARCODE_OPTIONS)
 
 
 def create_barcode_temp(value: str) -> str:
     """
     Generate a temporary Code128 barcode image.
 
-    - The barcode is generated as a PNG image
+    - The barcode is generated as a 1-bit PNG image (core.code128)
     - The image is stored in a temporary file
     - The file is NOT permanent and should be deleted after use
     - No human-readable text is printed under the barcode
@@ -20,28 +26,33 @@ def create_barcode_temp(value: str) -> str:
         str: Path to the temporary PNG file
     """
 
-    # Create an ImageWriter so we can control barcode appearance
-    writer = ImageWriter()
-
-    # Barcode appearance configuration
-    writer.set_options({
-        "module_width": 0.25,     # Width of a single barcode bar
-        "module_height": 12.0,    # Height of barcode bars
-        "quiet_zone": 1.5,        # Left/right margin
-        "font_size": 0,           # Disable text under barcode
-        "write_text": False,      # Do not print barcode value as text
-        "dpi": 300                # High resolution for printing
-    })
-
-    # Create Code128 barcode object
-    code128 = barcode.get("code128", value, writer=writer)
-
     # Create a temporary file (system-managed location)
     fd, path = tempfile.mkstemp(suffix=".png")
-    os.close(fd)  # Close file descriptor (barcode library will write)
+    os.close(fd)  # Close file descriptor (PNG is written by path)
 
-    # Save barcode image (python-barcode auto-adds extension)
-    code128.save(path.replace(".png", ""))
+    save_png(value, path, **BARCODE_OPTIONS)
 
     # Return full path to the temporary PNG file
     return path
+
+
+def barcode_picture(value: str, width_in: float, profile: str | None = None):
+    """
+    Barcode for a picture slot width_in wide, as rendered by the barcode
+    profile (core.barcode_profiles, default profile if None): .png bytes and
+    .width_emu to place it at. The "scaled" profile uses BARCODE_OPTIONS.
+    """
+    from core.barcode_profiles import get_profile
+
+    return get_profile(profile).picture(value, width_in, BARCODE_OPTIONS)
+
+
+def barcode_png(value: str) -> bytes:
+    """
+    Same barcode as create_barcode_temp, as PNG bytes in memory
+    (batch rendering of serialized labels, no temp files).
+    """
+    img = render_image(value, **BARCODE_OPTIONS)
+    buf = io.BytesIO()
+    img.save(buf, "PNG", dpi=img.info["dpi"], optimize=False)
+    return buf.getvalue()
@@ -0,0 +1,204 @@
+"""
+Barcode rendering profiles: how a barcode picture is sized for the printer.
+
+    scaled     the picture is rendered with the caller's fixed options
+               (barcode_utils: 0.25 mm modules at 300 dpi; core/barcode_utils:
+               0.2 mm) and stretched to the stock's barcode width. Bars land
+               between printer dots and are resampled by the driver.
+    zebra-203  printer matched: every module is a whole number of printer
+    zebra-300  dots, the largest that keeps the symbol (quiet zones included)
+    zebra-600  within the stock's barcode width; the picture is rendered at the
+               printer's dpi and placed at exactly its pixel size, so one
+               pixel is one dot (no resampling, smaller PNGs).
+
+A profile is plain data (built-ins below, more in config/barcode_profiles.json):
+    {
+      "zebra-203-tall": {
+        "description": "203 dpi, 15 mm bars",
+        "dpi": 203, "bar_height_mm": 15.0, "quiet_zone_mm": 1.5, "margin_mm": 1.0,
+        "min_module_dots": 2
+      }
+    }
+"dpi": null makes a scaled profile. Missing keys fall back to zebra-203.
+Short codes get wider modules than long ones on the same slot; a symbol that
+does not fit at min_module_dots is still rendered (1 dot minimum) and shows
+up in core.barcode_verify.
+
+    python -m core.barcode_profiles list
+    python -m core.barcode_profiles plan PLNM-4471 LOT08811-PLNM-4471-0001 [--stock letter-3x2]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from .code128 import bar_widths, mm_to_px, render_image
+
+Profile = Dict[str, object]
+
+PROFILES_PATH = os.path.join("config", "barcode_profiles.json")
+
+DEFAULT_PROFILE = "scaled"
+EMU_PER_INCH = 914400
+
+BUILTIN_PROFILES: Dict[str, Profile] = {
+    "scaled": {
+        "description": "Fixed-size picture stretched to the stock's barcode width",
+        "dpi": None,
+    },
+    "zebra-203": {
+        "description": "203 dpi print head (8 dots/mm), whole-dot modules",
+        "dpi": 203, "bar_height_mm": 12.0, "quiet_zone_mm": 1.5, "margin_mm": 1.0, "min_module_dots": 2,
+    },
+    "zebra-300": {
+        "description": "300 dpi print head (12 dots/mm), whole-dot modules",
+        "dpi": 300, "bar_height_mm": 12.0, "quiet_zone_mm": 1.5, "margin_mm": 1.0, "min_module_dots": 2,
+    },
+    "zebra-600": {
+        "description": "600 dpi print head (24 dots/mm), whole-dot modules",
+        "dpi": 600, "bar_height_mm": 12.0, "quiet_zone_mm": 1.5, "margin_mm": 1.0, "min_module_dots": 4,
+    },
+}
+
+
+class BarcodeProfileError(ValueError):
+    """Unknown or invalid barcode profile."""
+
+
+def module_dots(value: str, dpi: int, max_width_in: float, quiet_zone_mm: float) -> int:
+    """Largest whole number of dots per module that keeps the symbol within max_width_in."""
+    total = sum(bar_widths(value))
+    quiet = 2 * mm_to_px(quiet_zone_mm, dpi)
+    return max(1, int((max_width_in * dpi - quiet) // total))
+
+
+class BarcodePicture:
+    """A rendered barcode and the width it is placed at (EMU)."""
+
+    __slots__ = ("png", "width_emu", "module_dots", "dpi")
+
+    def __init__(self, png: bytes, width_emu: int, module_dots: Optional[int], dpi: int):
+        self.png = png
+        self.width_emu = width_emu
+        self.module_dots = module_dots  # None: scaled (not a whole number of dots)
+        self.dpi = dpi
+
+
+class BarcodeProfile:
+    def __init__(self, name: str, profile: Profile):
+        base = BUILTIN_PROFILES["zebra-203"]
+        p = dict(base, **profile)
+        try:
+            self.name = name
+            self.description = str(p.get("description", ""))
+            self.dpi = None if p["dpi"] is None else int(p["dpi"])
+            self.bar_height_mm = float(p["bar_height_mm"])
+            self.quiet_zone_mm = float(p["quiet_zone_mm"])
+            self.margin_mm = float(p["margin_mm"])
+            self.min_module_dots = int(p["min_module_dots"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise BarcodeProfileError(f"Barcode profile '{name}': invalid profile ({e}).")
+        if self.dpi is not None and not 100 <= self.dpi <= 1200:
+            raise BarcodeProfileError(f"Barcode profile '{name}': dpi {self.dpi} is out of range.")
+
+    @property
+    def printer_matched(self) -> bool:
+        return self.dpi is not None
+
+    def module_dots(self, value: str, width_in: float) -> Optional[int]:
+        """Dots per module on a slot width_in wide (None for scaled profiles)."""
+        if self.dpi is None:
+            return None
+        return module_dots(value, self.dpi, width_in, self.quiet_zone_mm)
+
+    def image(self, value: str, width_in: float, scaled_options: dict):
+        """(1-bit Pillow image, placed width in inches)."""
+        if self.dpi is None:
+            return render_image(value, **scaled_options), width_in
+        img = render_image(value, module_px=self.module_dots(value, width_in), dpi=self.dpi,
+                           module_height=self.bar_height_mm, quiet_zone=self.quiet_zone_mm, margin=self.margin_mm)
+        return img, img.width / self.dpi
+
+    def picture(self, value: str, width_in: float, scaled_options: dict) -> BarcodePicture:
+        """
+        PNG + placed width. scaled_options are the caller's fixed render
+        options (code128.render_image), used by scaled profiles only.
+        """
+        img, placed_in = self.image(value, width_in, scaled_options)
+        buf = io.BytesIO()
+        img.save(buf, "PNG", dpi=img.info["dpi"], optimize=False)
+        width_emu = round(img.width * EMU_PER_INCH / self.dpi) if self.dpi else int(width_in * EMU_PER_INCH)
+        return BarcodePicture(buf.getvalue(), width_emu, self.module_dots(value, width_in), img.info["dpi"][0])
+
+
+def load_profiles(path: str = PROFILES_PATH) -> Dict[str, Profile]:
+    profiles = dict(BUILTIN_PROFILES)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles.update({str(k).strip(): v for k, v in json.load(f).items()})
+    return profiles
+
+
+_PROFILES: Dict[str, BarcodeProfile] = {}
+
+
+def get_profile(name: Optional[str] = None) -> BarcodeProfile:
+    """Named profile (None = DEFAULT_PROFILE), cached after first use."""
+    name = name or DEFAULT_PROFILE
+    profile = _PROFILES.get(name)
+    if profile is None:
+        profiles = load_profiles()
+        if name not in profiles:
+            raise BarcodeProfileError(f"Unknown barcode profile '{name}' (have: {', '.join(profiles)})")
+        profile = _PROFILES[name] = BarcodeProfile(name, profiles[name])
+    return profile
+
+
+def available_profiles() -> List[str]:
+    return list(load_profiles())
+
+
+def main(argv: List[str] | None = None) -> int:
+    from barcode_utils import BARCODE_OPTIONS
+    from .label_stock import LabelStockError, available_stocks, get_stock
+
+    ap = argparse.ArgumentParser(description="Barcode rendering profiles.")
+    ap.add_argument("command", choices=["list", "plan"])
+    ap.add_argument("codes", nargs="*", help="plan: barcode values")
+    ap.add_argument("--stock", choices=available_stocks(), default=None)
+    args = ap.parse_args(argv)
+
+    try:
+        profiles = [get_profile(name) for name in available_profiles()]
+        stock = get_stock(args.stock)
+    except (BarcodeProfileError, LabelStockError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.command == "list":
+        for p in profiles:
+            dpi = f"{p.dpi} dpi" if p.dpi else "scaled"
+            print(f"{p.name:12} {dpi:>8}  {p.description}")
+        return 0
+
+    if not args.codes:
+        print("❌ plan: give one or more barcode values")
+        return 1
+    print(f"Stock {stock.name}: barcode slot {stock.barcode_w_in:g} in\n")
+    for code in args.codes:
+        print(code)
+        for p in profiles:
+            pic = p.picture(code, stock.barcode_w_in, BARCODE_OPTIONS)
+            placed_in = pic.width_emu / EMU_PER_INCH
+            dots = f"{pic.module_dots} dots/module" if pic.module_dots else "resampled"
+            flag = " ⚠️ below min" if pic.module_dots and pic.module_dots < p.min_module_dots else ""
+            print(f"  {p.name:12} {placed_in:5.3f} in  {dots:15} {len(pic.png):6} bytes PNG{flag}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,11 @@ from __future__ import annotations
 import os
 import tempfile
 
-import barcode
-from barcode.writer import ImageWriter
+from .code128 import PYTHON_BARCODE_OPTIONS, save_png
+
+# Options of the "scaled" barcode profile for this layout: the picture
+# python-barcode drew (its Code128 ignored the 0.2 / 8 / 1 mm settings)
+BARCODE_OPTIONS = dict(PYTHON_BARCODE_OPTIONS)
 
 def create_barcode_temp(value: str) -> str:
     """
@@ -13,22 +16,18 @@ def create_barcode_temp(value: str) -> str:
     if not value:
         raise ValueError("Barcode value is empty.")
 
-    writer = ImageWriter()
-    writer.set_options({
-        "module_width": 0.2,
-        "module_height": 8.0,
-        "quiet_zone": 1.0,
-        "font_size": 10,
-        "text_distance": 1.0,
-        "write_text": False,  # human-readable text off; enable if you want
-    })
-
-    code128 = barcode.get("code128", value, writer=writer)
-
     fd, path = tempfile.mkstemp(suffix=".png")
     os.close(fd)
 
-    # python-barcode saves adding extension by itself if you pass path without extension
-    base = path[:-4]  # remove ".png"
-    code128.save(base)
+    # 1-bit PNG, no human-readable text
+    save_png(value, path, **BARCODE_OPTIONS)
     return path
+
+
+def barcode_picture(value: str, width_in: float, profile: str | None = None):
+    """Barcode picture (.png, .width_emu) for a slot width_in wide (core.barcode_profiles)."""
+    from .barcode_profiles import get_profile
+
+    if not value:
+        raise ValueError("Barcode value is empty.")
+    return get_profile(profile).picture(value, width_in, BARCODE_OPTIONS)
@@ -0,0 +1,341 @@
+"""
+Barcode verification pass over generated label documents.
+
+Every distinct barcode picture in a DOCX is decoded back to its value with
+the project's own Code128 tables (core.code128) and checked:
+  - it decodes at all (start / stop / checksum), on a scanline of the image
+  - the value is one of the lot's codes (WO codes, or serials of a
+    serialized lot) and every code of a full lot has a barcode
+  - the module (narrowest bar) as placed on the label covers at least
+    min_dots printer dots at the printer's dpi; a picture squeezed into
+    a narrow width gets bars thinner than the printer can make reliably
+  - the picture is placed without being stretched (same aspect ratio)
+
+Pictures are decoded once per distinct content (sha256), however many
+labels show them; placements (picture + placed size) are read from
+document.xml with one regex pass, so a huge lot costs one decode per code.
+
+    python -m core.barcode_verify "output/LOT 08811 WHITE.docx" [--dpi 203] [--min-dots 2]
+    python -m core.barcode_verify FILE.docx --codes PLNM-4471 PLNM-4472
+    python -m core.barcode_verify FILE.docx --job 42
+
+main.py --verify [DPI] runs the same pass on every document right after
+it is saved.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import posixpath
+import re
+import sys
+import time
+import zipfile
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .code128 import PATTERNS, START, STOP_PATTERN
+
+DEFAULT_PRINTER_DPI = 203   # most label printers; 300 / 600 dpi heads with --dpi
+MIN_MODULE_DOTS = 2.0       # narrowest bar must be at least this many printer dots
+ASPECT_TOLERANCE = 0.02     # placed vs. pixel aspect ratio
+DOTS_TOLERANCE = 0.01
+REPORT_VALUES = 20          # list values one per line up to this many
+REPORT_PROBLEMS = 30
+
+EMU_PER_INCH = 914400
+
+_PATTERN_VALUE = {int(p): v for v, p in enumerate(PATTERNS)}
+_STOP = int(STOP_PATTERN)
+
+# <wp:inline>/<wp:anchor> ... <wp:extent cx cy> ... <a:blip r:embed>
+_PLACEMENT = re.compile(rb'<wp:extent cx="(\d+)" cy="(\d+)"/>.*?r:embed="([^"]+)"', re.S)
+_REL = re.compile(rb'<Relationship\b[^>]*>')
+_ATTR = re.compile(rb'(\w+)="([^"]*)"')
+
+
+class DecodeError(ValueError):
+    """Image does not contain a readable Code128 symbol."""
+
+
+# ---------- Decoder ----------
+def _runs(scanline) -> "numpy.ndarray":
+    """Bar/space run lengths in pixels of one scanline (True = dark), quiet zones trimmed."""
+    import numpy as np
+
+    dark = np.flatnonzero(scanline)
+    if dark.size == 0:
+        raise DecodeError("no bars")
+    line = scanline[dark[0]:dark[-1] + 1]
+    edges = np.flatnonzero(line[1:] != line[:-1]) + 1
+    return np.diff(np.concatenate(([0], edges, [line.size])))
+
+
+def decode_runs(runs) -> Tuple[List[int], float]:
+    """
+    Run lengths (bar first) -> (symbol values incl. start and checksum, module px).
+    Each 6-run symbol is normalized on its own width (11 modules), so a
+    slightly uneven raster still decodes.
+    """
+    import numpy as np
+
+    if runs.size < 25 or (runs.size - 7) % 6:
+        raise DecodeError(f"{runs.size} bars/spaces is not a Code128 symbol")
+    stop = runs[-7:]
+    body = runs[:-7].reshape(-1, 6).astype(float)
+    modules = np.rint(body / (body.sum(axis=1, keepdims=True) / 11)).astype(int)
+    if (modules.sum(axis=1) != 11).any() or (modules < 1).any():
+        raise DecodeError("bar widths do not fit the 11-module grid")
+    keys = modules @ (10 ** np.arange(5, -1, -1))
+    try:
+        codes = [_PATTERN_VALUE[int(k)] for k in keys]
+    except KeyError as e:
+        raise DecodeError(f"unknown symbol pattern {e.args[0]}")
+    stop_modules = np.rint(stop / (stop.sum() / 13)).astype(int)
+    if int(stop_modules @ (10 ** np.arange(6, -1, -1))) != _STOP:
+        raise DecodeError("no stop pattern")
+    module_px = float(runs.sum()) / (11 * len(codes) + 13)
+    return codes, module_px
+
+
+def symbols_to_text(codes: Sequence[int]) -> str:
+    """Start code + data + checksum -> text (subsets A/B/C, shift and code switches)."""
+    if codes[0] not in START.values():
+        raise DecodeError("no start code")
+    if (codes[0] + sum(i * c for i, c in enumerate(codes[1:-1], start=1))) % 103 != codes[-1]:
+        raise DecodeError("checksum mismatch")
+
+    charset = {103: "A", 104: "B", 105: "C"}[codes[0]]
+    out: List[str] = []
+    shift = False
+    for code in codes[1:-1]:
+        current = ("B" if charset == "A" else "A") if shift else charset
+        shift = False
+        if current == "C":
+            if code < 100:
+                out.append(f"{code:02d}")
+            elif code in (100, 101):
+                charset = "B" if code == 100 else "A"
+            elif code != 102:  # FNC1: no printable character
+                raise DecodeError(f"symbol {code} in subset C")
+        elif code < 96:
+            out.append(chr(code + 32) if current == "B" or code < 64 else chr(code - 64))
+        elif code == 98:
+            shift = True
+        elif code == 99 or (code == 100 and current == "A") or (code == 101 and current == "B"):
+            charset = {99: "C", 100: "B", 101: "A"}[code]
+        elif code not in (96, 97, 100, 101, 102):  # FNC1-4 carry no text
+            raise DecodeError(f"symbol {code} in subset {current}")
+    return "".join(out)
+
+
+def decode_image(blob: bytes) -> Tuple[str, float, Tuple[int, int]]:
+    """Picture bytes -> (value, module width in px, (width, height) px). Tries 3 scanlines."""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(blob)) as img:
+        size = img.size
+        pixels = np.asarray(img.convert("L"))
+    dark = pixels < 128
+    error: Optional[DecodeError] = None
+    for y in (size[1] // 2, size[1] // 4, size[1] * 3 // 4):
+        try:
+            codes, module_px = decode_runs(_runs(dark[y]))
+            return symbols_to_text(codes), module_px, size
+        except DecodeError as e:
+            error = error or e
+    raise error
+
+
+# ---------- Document pass ----------
+def _image_targets(rels_xml: bytes) -> Dict[str, str]:
+    """rId -> zip member of every picture relationship of document.xml."""
+    out = {}
+    for tag in _REL.findall(rels_xml):
+        attrs = {k.decode(): v.decode() for k, v in _ATTR.findall(tag)}
+        if attrs.get("Type", "").endswith("/image") and attrs.get("TargetMode") != "External":
+            target = attrs["Target"]
+            out[attrs["Id"]] = target[1:] if target.startswith("/") else posixpath.normpath(
+                posixpath.join("word", target))
+    return out
+
+
+def verify_docx(path: str, expected: Optional[Iterable[str]] = None, *, complete: bool = True,
+                dpi: int = DEFAULT_PRINTER_DPI, min_dots: float = MIN_MODULE_DOTS,
+                cache: Optional[Dict[str, tuple]] = None) -> dict:
+    """
+    Decode and check every barcode picture of a DOCX.
+    expected: the codes that may appear (None = do not check values);
+    complete: every expected code must appear too (full lots, not deltas).
+    cache: sha256 -> decode result, shared between documents of one run.
+    Returns {"path", "pictures", "placements", "values": {value: labels}, "problems": [...], "ms"}.
+    """
+    t0 = time.perf_counter()
+    cache = {} if cache is None else cache
+    problems: List[str] = []
+
+    with zipfile.ZipFile(path) as zf:
+        document = zf.read("word/document.xml")
+        targets = _image_targets(zf.read("word/_rels/document.xml.rels"))
+
+        # (rId, cx, cy) -> number of labels placing that picture at that size
+        placements: Dict[Tuple[str, int, int], int] = {}
+        for cx, cy, rid in _PLACEMENT.findall(document):
+            key = (rid.decode(), int(cx), int(cy))
+            placements[key] = placements.get(key, 0) + 1
+
+        decoded: Dict[str, tuple] = {}  # rId -> (value, module_px, size) or DecodeError
+        for rid in {rid for rid, _, _ in placements}:
+            if rid not in targets:
+                problems.append(f"picture {rid}: relationship missing")
+                continue
+            blob = zf.read(targets[rid])
+            digest = hashlib.sha256(blob).hexdigest()
+            if digest not in cache:
+                try:
+                    cache[digest] = decode_image(blob)
+                except (DecodeError, OSError) as e:
+                    cache[digest] = DecodeError(f"{targets[rid]}: cannot decode ({e})")
+            decoded[rid] = cache[digest]
+
+    values: Dict[str, int] = {}
+    worst: Dict[str, float] = {}  # value -> smallest dots per module
+    # Same problem on many pictures (serialized lots): one line per problem
+    grouped: Dict[str, List[Tuple[str, int]]] = {}
+    for (rid, cx, cy), labels in sorted(placements.items()):
+        result = decoded.get(rid)
+        if result is None:
+            continue
+        if isinstance(result, DecodeError):
+            problems.append(f"{result} ({labels} label(s))")
+            continue
+        value, module_px, (w_px, h_px) = result
+        values[value] = values.get(value, 0) + labels
+
+        width_in = cx / EMU_PER_INCH
+        module_in = width_in * module_px / w_px
+        dots = module_in * dpi
+        worst[value] = min(dots, worst.get(value, dots))
+        if dots < min_dots - DOTS_TOLERANCE:  # placed sizes are whole EMUs: 2 dots may read as 1.9999
+            grouped.setdefault(f"module {module_in * 1000:.1f} mil = {dots:.2f} dots at {dpi} dpi "
+                               f"(min {min_dots:g}), picture {width_in:.2f} in wide", []).append((value, labels))
+        if abs((cx / cy) / (w_px / h_px) - 1) > ASPECT_TOLERANCE:
+            grouped.setdefault(f"picture stretched ({width_in:.2f} x {cy / EMU_PER_INCH:.2f} in "
+                               f"for {w_px} x {h_px} px)", []).append((value, labels))
+
+    for problem, hits in grouped.items():
+        labels = sum(n for _, n in hits)
+        if len(hits) == 1:
+            problems.append(f"{hits[0][0]}: {problem}, {labels} label(s)")
+        else:
+            examples = ", ".join(v for v, _ in hits[:3]) + (", ..." if len(hits) > 3 else "")
+            problems.append(f"{len(hits)} values ({examples}): {problem}, {labels} label(s)")
+
+    if expected is not None:
+        expected = {str(v).strip() for v in expected} - {""}
+        for value in sorted(set(values) - expected):
+            problems.append(f"{value}: not a code of this lot ({values[value]} label(s))")
+        if complete:
+            for value in sorted(expected - set(values)):
+                problems.append(f"{value}: no barcode printed")
+
+    return {"path": path, "pictures": len(decoded), "placements": sum(placements.values()),
+            "values": values, "min_dots": worst, "problems": problems,
+            "ms": (time.perf_counter() - t0) * 1000}
+
+
+def expected_codes(work_orders: List[dict], sheets: List[dict], lot_number: str) -> Set[str]:
+    """Barcode values a lot prints: WO codes, plus every serial of a serialized WO."""
+    from .serials import lot_serials
+
+    codes = {str(wo.get("code", "")).strip() for wo in work_orders}  # serialized WOs: cover labels
+    for values in lot_serials(lot_number, work_orders, sheets):
+        codes.update(values)
+    return codes - {""}
+
+
+def verify_job(job: dict, **options) -> dict:
+    """verify_docx for a stored job (core.job_store load_job dict)."""
+    return verify_docx(job["output_path"], expected_codes(job["work_orders"], job["sheets"], job["lot"]),
+                       complete=job.get("kind", "full") == "full", **options)
+
+
+def verify_outputs(paths: Sequence[str], lot_number: str, work_orders: List[dict], sheets: List[dict],
+                   complete: bool = True, dpi: Optional[int] = None, min_dots: float = MIN_MODULE_DOTS) -> None:
+    """
+    Print a verification report per saved document at printer `dpi`
+    (console --verify; None: do nothing).
+    complete=False: each document holds only part of the lot.
+    """
+    if dpi is None:
+        return
+    expected = expected_codes(work_orders, sheets, lot_number)
+    cache: Dict[str, tuple] = {}
+    for path in paths:
+        try:
+            print(format_report(verify_docx(path, expected, complete=complete, cache=cache,
+                                           dpi=dpi, min_dots=min_dots)))
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            print(f"⚠️ Could not verify {path}: {e}")
+
+
+def format_report(result: dict) -> str:
+    lines = [f"{result['path']}: {result['placements']} barcodes, {result['pictures']} distinct pictures, "
+             f"{len(result['values'])} values, {result['ms']:.0f} ms"]
+    values = sorted(result["values"].items())
+    if len(values) > REPORT_VALUES:  # serialized lots: one value per label
+        dots = result["min_dots"].values()
+        lines.append(f"  {len(values)} values, {min(dots):.2f} - {max(dots):.2f} dots/module")
+    for value, labels in values if len(values) <= REPORT_VALUES else []:
+        lines.append(f"  {value:30} {labels:6} label(s)  {result['min_dots'][value]:.2f} dots/module")
+    if result["problems"]:
+        shown = result["problems"][:REPORT_PROBLEMS]
+        lines.append(f"❌ {len(result['problems'])} problem(s):")
+        lines += [f"  - {p}" for p in shown]
+        if len(result["problems"]) > len(shown):
+            lines.append(f"  ... and {len(result['problems']) - len(shown)} more")
+    else:
+        lines.append("✅ all barcodes verified")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Decode and check every barcode in generated DOCX files.")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--codes", nargs="+", default=None, help="Expected barcode values")
+    ap.add_argument("--job", type=int, default=None, help="Expected values from a job store entry")
+    ap.add_argument("--dpi", type=int, default=DEFAULT_PRINTER_DPI, help="Printer resolution")
+    ap.add_argument("--min-dots", type=float, default=MIN_MODULE_DOTS, help="Minimum printer dots per module")
+    args = ap.parse_args(argv)
+
+    from .job_store import JobStore
+
+    store = JobStore()
+    cache: Dict[str, tuple] = {}
+    failed = 0
+    for path in args.paths:
+        options = {"dpi": args.dpi, "min_dots": args.min_dots, "cache": cache}
+        job = store.load_job(args.job) if args.job else None
+        if job is None and args.codes is None:
+            found = store.find_by_output_path(path)
+            job = store.load_job(found[0]["id"]) if found else None
+        try:
+            if args.codes is not None:
+                result = verify_docx(path, args.codes, **options)
+            elif job is not None:
+                result = verify_job(dict(job, output_path=path), **options)
+            else:
+                print(f"⚠️ {path}: no job found, barcode values are not checked against WO codes")
+                result = verify_docx(path, **options)
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            print(f"❌ {path}: {e}")
+            failed += 1
+            continue
+        print(format_report(result))
+        failed += bool(result["problems"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
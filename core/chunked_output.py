@@ -0,0 +1,68 @@
+"""
+Chunked output: one lot split into several DOCX files of N pages or N sheets.
+
+A 400-page lot can not be printed before the whole document is rendered
+and saved. In chunked mode (main.py --chunk-pages N / --chunk-sheets N)
+the page plan (main.plan_doc) is cut on page boundaries, each chunk is
+rendered on its own and handed to a background save as soon as it is
+complete, so chunk 1 prints while the rest still renders.
+
+Page numbering continues across files: chunk k starts at its first page
+number and its footer reads "Page X of <pages of the whole lot>".
+
+Boundaries:
+    pages   every N pages (the cover page counts as a page of chunk 1)
+    sheets  after every N sheets, on the page holding the sheet's last
+            label; sheets flow without page breaks, so labels of the next
+            sheet that share that page stay in the same chunk
+"""
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+Chunk = Tuple[int, int]  # (first page index, end page index, exclusive)
+
+
+def plan_chunks(n_pages: int, sheet_last_page: Sequence[int], pages: Optional[int] = None,
+                sheets: Optional[int] = None) -> List[Chunk]:
+    """Page ranges of the chunks (one chunk holding everything when neither size is given)."""
+    if pages is not None and pages < 1 or sheets is not None and sheets < 1:
+        raise ValueError("Chunk size must be at least 1")
+    if pages:
+        ends = list(range(pages, n_pages, pages))
+    elif sheets:
+        ends = [sheet_last_page[k - 1] + 1 for k in range(sheets, len(sheet_last_page), sheets)]
+    else:
+        ends = []
+    chunks: List[Chunk] = []
+    start = 0
+    for end in ends + [n_pages]:
+        if end > start:
+            chunks.append((start, end))
+            start = end
+    return chunks or [(0, n_pages)]
+
+
+def chunk_sheets(chunk: Chunk, sheet_last_page: Sequence[int]) -> Tuple[int, int]:
+    """(first, last) sheet position (1-based) whose last label is in the chunk; (0, 0) for none."""
+    inside = [k for k, page in enumerate(sheet_last_page, start=1) if chunk[0] <= page < chunk[1]]
+    return (inside[0], inside[-1]) if inside else (0, 0)
+
+
+def describe_chunk(chunk: Chunk, n_pages: int, sheet_last_page: Sequence[int]) -> str:
+    """'pages 21-40 of 381, sheets 7-12' for progress output."""
+    def span(first: int, last: int) -> str:
+        return str(first) if first == last else f"{first}-{last}"
+
+    text = f"page{'s' if chunk[1] - chunk[0] > 1 else ''} {span(chunk[0] + 1, chunk[1])} of {n_pages}"
+    first, last = chunk_sheets(chunk, sheet_last_page)
+    if first:
+        text += f", sheet{'s' if last > first else ''} {span(first, last)}"
+    return text
+
+
+def chunk_path(output_dir: str, base_name: str, index: int, count: int) -> str:
+    """output/<base_name> part 03 of 12.docx (zero padded so files sort in print order)."""
+    width = len(str(count))
+    return os.path.join(output_dir, f"{base_name} part {index:0{width}d} of {count}.docx")
@@ -0,0 +1,258 @@
+"""
+Project-owned Code128 encoder + 1-bit rasterizer.
+
+Replaces python-barcode's ImageWriter for label images: the symbol is encoded
+to bar/space run lengths once and painted straight into a 1-bit ("1" mode)
+Pillow image by building one packed pixel row and replicating it, instead of
+drawing every module as an RGB rectangle.
+
+Subset switching follows the same rules as python-barcode (start in C, switch
+to C for runs of more than 3 digits, A only for control characters), so the
+symbol modules are identical for the same value.
+"""
+from __future__ import annotations
+
+import time
+from typing import List
+
+# Bar/space widths (in modules) for symbol values 0..105.
+# Every pattern starts with a bar: bar, space, bar, space, bar, space.
+PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312",
+    "132212", "221213", "221312", "231212", "112232", "122132", "122231", "113222",
+    "123122", "123221", "223211", "221132", "221231", "213212", "223112", "312131",
+    "311222", "321122", "321221", "312212", "322112", "322211", "212123", "212321",
+    "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121",
+    "313121", "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111", "111224",
+    "111422", "121124", "121421", "141122", "141221", "112214", "112412", "122114",
+    "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112",
+    "421211", "212141", "214121", "412121", "111143", "111341", "131141", "114113",
+    "114311", "411113", "411311", "113141", "114131", "311141", "411131", "211412",
+    "211214", "211232",
+)
+STOP_PATTERN = "2331112"  # stop character incl. final 2-module termination bar
+
+START = {"A": 103, "B": 104, "C": 105}
+SWITCH = {"A": 101, "B": 100, "C": 99}
+
+MAX_LENGTH = 80  # practical limit for a linear symbol on our labels
+
+# The picture python-barcode's ImageWriter actually produced for our labels:
+# Code128.render replaced the configured module_width/quiet_zone with its
+# minimums (0.2 mm, 2.54 mm) and everything else with its defaults (15 mm bars,
+# 1 mm margins, the value written 5 mm under the bars in 10 pt). Labels keep
+# that bar size and picture height; the text band is left blank (write_text
+# was meant to be off). 0.2 mm modules are exactly 2 px at 254 dpi.
+PYTHON_BARCODE_OPTIONS = {"module_width": 0.2, "module_height": 15.0, "quiet_zone": 2.54, "margin": 1.0,
+                          "text_band": 5.0 + 10 * 25.4 / 72 / 2, "dpi": 254}
+
+
+def is_encodable(value: str) -> bool:
+    """True if every character is plain ASCII (0..127), i.e. in subset A or B."""
+    return all(ord(ch) < 128 for ch in value)
+
+
+def _in_a(ch: str) -> bool:
+    # Subset A: control chars + space..underscore
+    return ord(ch) < 96
+
+
+def _in_b(ch: str) -> bool:
+    # Subset B: space..DEL
+    return 32 <= ord(ch) < 128
+
+
+def _value(ch: str, charset: str) -> int:
+    o = ord(ch)
+    if charset == "A":
+        return o - 32 if o >= 32 else o + 64
+    return o - 32
+
+
+def _digit_run(value: str, pos: int) -> int:
+    """Length of the digit run starting at pos (looking at most 10 chars ahead)."""
+    n = 0
+    for ch in value[pos:pos + 10]:
+        if not ch.isdigit():
+            break
+        n += 1
+    return n
+
+
+def encode(value: str) -> List[int]:
+    """
+    Encode a value into Code128 symbol values:
+    start code, data (with automatic A/B/C switching) and checksum.
+    The stop character is not included.
+    """
+    if not value:
+        raise ValueError("Barcode value is empty.")
+    if not is_encodable(value):
+        bad = sorted({ch for ch in value if ord(ch) >= 128})
+        raise ValueError(f"Characters not allowed in Code128: {''.join(bad)!r}")
+
+    charset = "C"
+    buffer = ""
+    codes: List[int] = [START["C"]]
+
+    for pos, ch in enumerate(value):
+        if charset == "C":
+            if not ch.isdigit():
+                charset = "B" if _in_b(ch) else "A"
+                codes.append(SWITCH[charset])
+                if buffer:
+                    codes.append(_value(buffer, charset))
+                    buffer = ""
+        elif _digit_run(value, pos) > 3:
+            charset = "C"
+            codes.append(SWITCH["C"])
+        elif charset == "B" and not _in_b(ch):
+            charset = "A"
+            codes.append(SWITCH["A"])
+        elif charset == "A" and not _in_a(ch):
+            charset = "B"
+            codes.append(SWITCH["B"])
+
+        if charset == "C":
+            buffer += ch
+            if len(buffer) == 2:
+                codes.append(int(buffer))
+                buffer = ""
+        else:
+            codes.append(_value(ch, charset))
+
+    # Odd digit left over in subset C
+    if buffer:
+        codes.append(SWITCH["B"])
+        codes.append(_value(buffer, "B"))
+
+    # A switch right after the start code becomes the start code itself
+    if codes[1] in (SWITCH["A"], SWITCH["B"]):
+        codes[:2] = [START["A"] if codes[1] == SWITCH["A"] else START["B"]]
+
+    checksum = codes[0]
+    for i, code in enumerate(codes[1:], start=1):
+        checksum += i * code
+    codes.append(checksum % 103)
+    return codes
+
+
+def bar_widths(value: str) -> List[int]:
+    """Run-length pattern in modules, alternating bar/space, starting with a bar."""
+    widths: List[int] = []
+    for code in encode(value):
+        widths.extend(int(w) for w in PATTERNS[code])
+    widths.extend(int(w) for w in STOP_PATTERN)
+    return widths
+
+
+def modules(value: str) -> str:
+    """Module string ('1' = bar, '0' = space), same format python-barcode builds."""
+    out = []
+    for i, w in enumerate(bar_widths(value)):
+        out.append(("1" if i % 2 == 0 else "0") * w)
+    return "".join(out)
+
+
+def mm_to_px(mm: float, dpi: int) -> int:
+    return int(round(mm * dpi / 25.4))
+
+
+def render_image(value: str, *, module_width: float = 0.2, module_height: float = 15.0,
+                 quiet_zone: float = 2.54, margin: float = 1.0, dpi: int = 300,
+                 module_px: int | None = None, text_band: float = 0.0):
+    """
+    Rasterize a Code128 symbol into a 1-bit Pillow image.
+
+    Sizes are in mm (same meaning as python-barcode writer options);
+    text_band is blank space under the bars where a human-readable line
+    would go. Each module is an integer number of pixels (module_px, or
+    module_width rounded at the given dpi), so bars are never resampled.
+    """
+    from PIL import Image
+
+    mpx = module_px if module_px is not None else max(1, mm_to_px(module_width, dpi))
+    quiet_px = mm_to_px(quiet_zone, dpi)
+    bar_px = max(1, mm_to_px(module_height, dpi))
+    margin_px = mm_to_px(margin, dpi)
+    band_px = mm_to_px(text_band, dpi)
+
+    # One scanline as bits: in mode "1" a set bit is white
+    bits = ["1" * quiet_px]
+    for i, w in enumerate(bar_widths(value)):
+        bits.append(("0" if i % 2 == 0 else "1") * (w * mpx))
+    bits.append("1" * quiet_px)
+    line = "".join(bits)
+    width = len(line)
+    line += "1" * (-width % 8)
+
+    row = int(line, 2).to_bytes(len(line) // 8, "big")
+    blank = b"\xff" * len(row)
+    data = blank * margin_px + row * bar_px + blank * (band_px + margin_px)
+
+    img = Image.frombytes("1", (width, bar_px + band_px + 2 * margin_px), data)
+    img.info["dpi"] = (dpi, dpi)
+    return img
+
+
+def save_png(value: str, path: str, **options) -> str:
+    """Render and save as a 1-bit PNG. Options are passed to render_image()."""
+    img = render_image(value, **options)
+    img.save(path, "PNG", dpi=img.info["dpi"], optimize=False)
+    return path
+
+
+# -------------------------------------------------
+# Self-check: compare with python-barcode + timing
+#   python -m core.code128
+# -------------------------------------------------
+CORPUS = (
+    "0", "12", "123", "1234", "12345", "WO-12345", "08811", "PLNM-4471-A",
+    "abc123456def", "A1B2C3", "12345678901234", "1a", "a1234b", "X" * 20,
+    "hello world", "PART#77/3", "lower-case_01", "9999-9999-99", "~{}|`",
+    "tab\there", "A\x01B", "00" * 10 + "1", "1234abcd5678",
+)
+
+
+def _self_check(rounds: int = 200) -> None:
+    import io
+    import barcode
+    from barcode.writer import ImageWriter
+
+    for value in CORPUS:
+        expected = barcode.get("code128", value).build()[0]
+        got = modules(value)
+        if got == expected:
+            status = "ok"
+        elif value.startswith("99"):
+            # python-barcode mistakes a leading "99" for a switch-to-C code and drops it
+            status = "ok*"
+        else:
+            status = "MISMATCH"
+        print(f"{status:8} {value!r}")
+
+    def _legacy(value: str) -> bytes:
+        writer = ImageWriter()
+        writer.set_options({"write_text": False})
+        buf = io.BytesIO()
+        barcode.get("code128", value, writer=writer).write(buf)
+        return buf.getvalue()
+
+    def _native(value: str) -> bytes:
+        buf = io.BytesIO()
+        render_image(value).save(buf, "PNG")
+        return buf.getvalue()
+
+    for name, fn in (("python-barcode", _legacy), ("native", _native)):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            size = len(fn("WO-12345-PLNM-4471"))
+        dt = (time.perf_counter() - t0) / rounds * 1000
+        print(f"{name:15} {dt:7.3f} ms/barcode  {size:6d} bytes")
+
+
+if __name__ == "__main__":
+    _self_check()
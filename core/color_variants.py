@@ -0,0 +1,83 @@
+"""
+Per-color tweaks for multi-color output.
+
+The label body does not depend on the color; only the file name does. For
+multi-color runs the document is rendered once and each color is saved from
+the same in-memory document, optionally with a small patch applied just
+before saving and undone right after.
+
+Variants (config/color_variants.json, every key optional):
+    {
+      "ORANGE": {"header": "R4 - ORANGE STOCK"},
+      "YELLOW": {"header": "R8 - YELLOW STOCK", "header_bold": true}
+    }
+Colors without a variant produce byte-identical documents, so they are
+copied from the first saved file instead of being serialized again.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Callable, Dict, List
+
+COLORS = ("WHITE", "ORANGE", "GREEN", "YELLOW")
+VARIANTS_PATH = os.path.join("config", "color_variants.json")
+
+Variant = Dict[str, object]
+
+
+def load_variants(path: str = VARIANTS_PATH) -> Dict[str, Variant]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {str(k).strip().upper(): v for k, v in json.load(f).items()}
+
+
+def normalize_colors(colors) -> List[str]:
+    """Upper-case, drop blanks and duplicates, keep order."""
+    out: List[str] = []
+    for c in colors:
+        c = str(c).strip().upper()
+        if c and c not in out:
+            out.append(c)
+    return out
+
+
+def variant_signature(variant: Variant) -> str:
+    return json.dumps(variant or {}, sort_keys=True)
+
+
+def apply_variant(document, variant: Variant) -> Callable[[], None]:
+    """Patch the document for one color; returns a function that undoes the patch."""
+    undo: List[Callable[[], None]] = []
+
+    header_text = variant.get("header") if variant else None
+    if header_text:
+        for section in document.sections:
+            header = section.header
+            was_linked = header.is_linked_to_previous
+            p = header.paragraphs[0] if header.paragraphs else header.add_paragraph()
+            old_runs = [r._r for r in p.runs]
+            old_alignment = p.alignment
+
+            for r in old_runs:
+                p._p.remove(r)
+            run = p.add_run(str(header_text))
+            run.bold = bool(variant.get("header_bold", False))
+            p.alignment = 1  # Center
+
+            def _undo(header=header, p=p, run=run, old_runs=old_runs,
+                      old_alignment=old_alignment, was_linked=was_linked):
+                p._p.remove(run._r)
+                for r in old_runs:
+                    p._p.append(r)
+                p.alignment = old_alignment
+                header.is_linked_to_previous = was_linked
+
+            undo.append(_undo)
+
+    def _undo_all():
+        for fn in reversed(undo):
+            fn()
+
+    return _undo_all
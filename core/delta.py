@@ -0,0 +1,252 @@
+"""
+Delta printing after re-nesting.
+
+Compares a previously generated nest (usually the last job stored for the
+lot) with the new WOs + sheets and produces:
+  - a DOCX with only the labels that are new or changed
+  - a void list (text) of already printed labels that no longer apply
+
+Labels are matched per (sheet number, WO index), by count. WOs are matched
+by position in the list. If a WO's label fields (part, tag, code, WO #)
+changed, all of its labels are voided and reprinted. Cover WO labels are
+reprinted when the WO or its TOTAL QTY changed; how many WOs the cover holds
+depends on the label stock (old nest: the stock it was printed on).
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .label_stock import COVER_WO_SLOTS
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+LABEL_FIELDS = ("part", "tag_desc", "code", "work_order")
+
+# Delta item: (kind, sheet_number, wo_index, count)
+#   kind: "cover_wo" | "sheet" | "piece"
+DeltaItem = Tuple[str, Optional[int], Optional[int], int]
+
+
+def _label_key(wo: WorkOrder) -> tuple:
+    return tuple(str(wo.get(f, "")).strip() for f in LABEL_FIELDS)
+
+
+def _sheet_map(sheets: List[Sheet]) -> Dict[int, Dict[int, int]]:
+    """sheet_number -> {wo_index: qty} (qty > 0 only)."""
+    out: Dict[int, Dict[int, int]] = {}
+    for sh in sheets:
+        allocs = out.setdefault(int(sh["sheet_number"]), {})
+        for (i, q) in sh["allocations"]:
+            if int(q) > 0:
+                allocs[int(i)] = allocs.get(int(i), 0) + int(q)
+    return out
+
+
+def diff_nests(old_wos: List[WorkOrder], old_sheets: List[Sheet],
+               new_wos: List[WorkOrder], new_sheets: List[Sheet], cover_wo_slots: int = COVER_WO_SLOTS,
+               old_cover_wo_slots: Optional[int] = None) -> Dict[str, List[DeltaItem]]:
+    """
+    Returns {"print": [...], "void": [...]}.
+    "print" items refer to new_wos indexes and are in print (flow) order;
+    "void" items refer to old_wos indexes.
+    cover_wo_slots / old_cover_wo_slots: WO labels on the cover of the new /
+    old stock (LabelStock.cover_wo_slots; old = new if None).
+    """
+    if old_cover_wo_slots is None:
+        old_cover_wo_slots = cover_wo_slots
+    changed = set()
+    for i in range(max(len(old_wos), len(new_wos))):
+        if i >= len(old_wos) or i >= len(new_wos) or _label_key(old_wos[i]) != _label_key(new_wos[i]):
+            changed.add(i)
+
+    old_map = _sheet_map(old_sheets)
+    new_map = _sheet_map(new_sheets)
+
+    to_print: List[DeltaItem] = []
+    to_void: List[DeltaItem] = []
+
+    # Cover WO labels (first WOs, as many as each stock's cover holds)
+    for i in range(max(cover_wo_slots, old_cover_wo_slots)):
+        in_old = i < min(old_cover_wo_slots, len(old_wos))
+        in_new = i < min(cover_wo_slots, len(new_wos))
+        differs = in_old != in_new or i in changed or (
+            in_old and in_new and int(old_wos[i].get("total_qty", 0)) != int(new_wos[i].get("total_qty", 0))
+        )
+        if in_old and differs:
+            to_void.append(("cover_wo", None, i, 1))
+        if in_new and differs:
+            to_print.append(("cover_wo", None, i, 1))
+
+    # Sheets flow, in new print order
+    for sh in new_sheets:
+        sn = int(sh["sheet_number"])
+        sheet_is_new = sn not in old_map
+        if sheet_is_new:
+            to_print.append(("sheet", sn, None, 1))
+        old_allocs = old_map.get(sn, {})
+        for (i, q) in sh["allocations"]:
+            i, q = int(i), int(q)
+            if q <= 0:
+                continue
+            prev = 0 if (sheet_is_new or i in changed) else old_allocs.get(i, 0)
+            if q > prev:
+                to_print.append(("piece", sn, i, q - prev))
+
+    # Labels that no longer apply, in old print order
+    for sh in old_sheets:
+        sn = int(sh["sheet_number"])
+        sheet_removed = sn not in new_map
+        if sheet_removed:
+            to_void.append(("sheet", sn, None, 1))
+        new_allocs = new_map.get(sn, {})
+        for (i, q) in sh["allocations"]:
+            i, q = int(i), int(q)
+            if q <= 0:
+                continue
+            keep = 0 if (sheet_removed or i in changed) else new_allocs.get(i, 0)
+            if q > keep:
+                to_void.append(("piece", sn, i, q - keep))
+
+    return {"print": to_print, "void": to_void}
+
+
+def render_void_list(lot_number: str, old_wos: List[WorkOrder], delta: Dict[str, List[DeltaItem]],
+                     new_wos: Optional[List[WorkOrder]] = None) -> str:
+    """Plain-text manifest: labels to discard + labels in the delta document."""
+    lines: List[str] = [f"================= DELTA LOT {lot_number} ================="]
+
+    def _wo_text(wo: WorkOrder) -> str:
+        return f"WO {wo.get('work_order', '')} | PART {wo.get('part', '')}"
+
+    lines.append("\nVOID (remove these printed labels):")
+    if not delta["void"]:
+        lines.append("  (none)")
+    for kind, sn, i, n in delta["void"]:
+        if kind == "sheet":
+            lines.append(f"  - SHEET {sn} label")
+        elif kind == "cover_wo":
+            lines.append(f"  - Cover label {_wo_text(old_wos[i])}")
+        else:
+            lines.append(f"  - {n} x {_wo_text(old_wos[i])} on SHEET {sn}")
+
+    if new_wos is not None:
+        lines.append("\nPRINT (in the delta document, in this order):")
+        if not delta["print"]:
+            lines.append("  (none)")
+        for kind, sn, i, n in delta["print"]:
+            if kind == "sheet":
+                lines.append(f"  + SHEET {sn} label")
+            elif kind == "cover_wo":
+                lines.append(f"  + Cover label {_wo_text(new_wos[i])}")
+            else:
+                lines.append(f"  + {n} x {_wo_text(new_wos[i])} on SHEET {sn}")
+
+    lines.append("\n" + "=" * 50)
+    return "\n".join(lines)
+
+
+def generate_delta_doc(lot_number: str, old_wos: List[WorkOrder], old_sheets: List[Sheet],
+                       new_wos: List[WorkOrder], new_sheets: List[Sheet], color: str,
+                       output_dir: str = "output", stock: Optional[str] = None,
+                       barcode_profile: Optional[str] = None, old_stock: Optional[str] = None,
+                       compression: Optional[str] = None
+                       ) -> Tuple[Optional[str], str, Dict[str, List[DeltaItem]]]:
+    """
+    Writes "LOT <lot> <COLOR> DELTA.docx" (only if something must be printed)
+    and "LOT <lot> <COLOR> DELTA.txt" (void list).
+    Returns (docx path or None, void list path, delta).
+    Labels use the same functions, label stock slot flow and barcode profile as main.generate_doc.
+    old_stock: stock the old nest was printed on (None = `stock`).
+    compression: zip compression of the .docx (core.docx_save, None = default).
+    """
+    import main as console_main
+    from .docx_save import save_docx
+    from .label_stock import get_stock
+    from .serials import is_serialized
+
+    if any(is_serialized(wo) for wo in list(old_wos) + list(new_wos)):
+        # Pieces of a serialized lot are numbered in flow order; a re-nest renumbers them
+        raise ValueError("Serialized lots cannot be delta-printed; reprint the pieces instead.")
+
+    label_stock = get_stock(stock)
+    old_cover_wo_slots = get_stock(old_stock).cover_wo_slots if old_stock else None
+    delta = diff_nests(old_wos, old_sheets, new_wos, new_sheets, label_stock.cover_wo_slots, old_cover_wo_slots)
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = console_main.sanitize_filename(f"LOT {lot_number} {color.strip().upper()} DELTA")
+
+    txt_path = os.path.join(output_dir, f"{base_name}.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(render_void_list(lot_number, old_wos, delta, new_wos) + "\n")
+
+    if not delta["print"]:
+        return None, txt_path, delta
+
+    from docx import Document
+    from label_layout import add_sheet_label, add_workorder_label
+
+    scale, barcode_width = label_stock.font_scale, label_stock.barcode_w_in
+    doc = Document()
+    label_stock.setup_document(doc)
+    table = label_stock.add_table(doc)
+    slot_idx = 0
+
+    def next_cell():
+        nonlocal table, slot_idx
+        if slot_idx >= label_stock.capacity:
+            label_stock.add_page_break(doc)
+            table = label_stock.add_table(doc)
+            slot_idx = 0
+        cell = label_stock.cell(table, slot_idx)
+        slot_idx += 1
+        return cell
+
+    for kind, sn, i, n in delta["print"]:
+        if kind == "sheet":
+            add_sheet_label(next_cell(), f"{sn} - LOT # {lot_number}", scale)
+        elif kind == "cover_wo":
+            wo = dict(new_wos[i])
+            wo["qty_override"] = wo["total_qty"]
+            add_workorder_label(next_cell(), wo, lot_number, scale, barcode_width, barcode_profile)
+        else:
+            wo = dict(new_wos[i])
+            wo["hide_qty"] = True
+            for _ in range(n):
+                add_workorder_label(next_cell(), wo, lot_number, scale, barcode_width, barcode_profile)
+
+    docx_path = os.path.join(output_dir, f"{base_name}.docx")
+    save_docx(doc, docx_path, compression)
+    return docx_path, txt_path, delta
+
+
+def generate_delta_from_previous(previous_job: dict, work_orders: List[WorkOrder], sheets: List[Sheet],
+                                 color: str, store=None, stock: Optional[str] = None,
+                                 barcode_profile: Optional[str] = None, compression: Optional[str] = None
+                                 ) -> Tuple[Optional[str], str, Dict[str, List[DeltaItem]]]:
+    """
+    Delta against a stored job (JobStore.latest_for_lot) and record the new
+    nest as a "delta" job, so the next delta compares against it.
+    Labels go on `stock` / `barcode_profile`, else on the ones the previous
+    job was printed with.
+    """
+    import time
+    from .barcode_profiles import get_profile
+    from .job_store import JobStore
+    from .label_stock import DEFAULT_STOCK
+
+    t0 = time.perf_counter()
+    lot_number = previous_job["lot"]
+    old_stock = previous_job.get("stock") or DEFAULT_STOCK  # jobs without one: console default
+    stock = stock or old_stock
+    barcode_profile = get_profile(barcode_profile or previous_job.get("barcode_profile")).name
+    docx_path, txt_path, delta = generate_delta_doc(
+        lot_number, previous_job["work_orders"], previous_job["sheets"], work_orders, sheets, color,
+        stock=stock, barcode_profile=barcode_profile, old_stock=old_stock, compression=compression,
+    )
+    (store or JobStore()).record_job(
+        lot_number, color, work_orders, sheets, docx_path or txt_path,
+        {"render_ms": (time.perf_counter() - t0) * 1000}, kind="delta", stock=stock,
+        barcode_profile=barcode_profile,
+    )
+    return docx_path, txt_path, delta
@@ -1,30 +1,64 @@
 from __future__ import annotations
 
 import os
-import main as console_main  # <-- this imports your ORIGINAL console main.py at project root
+import threading
 
-def generate_doc_with_gui_color(lot_number: str, work_orders: list[dict], sheets: list[dict], color: str) -> str:
+
+def _console_main():
     """
-    Calls the ORIGINAL generate_doc() without changing any DOCX layout logic.
-    We override input_choice() at runtime so it returns the GUI-selected color.
+    Imports the ORIGINAL console main.py at project root on first use.
+    Kept lazy so the GUI window shows before python-docx/lxml/Pillow load.
     """
+    import main as console_main
+    return console_main
+
+
+def _load_generation_stack():
+    console_main = _console_main()
+    import docx  # noqa: F401
+    import label_layout  # noqa: F401  (pulls in barcode_utils + core.code128)
+    import PIL.Image  # noqa: F401
+    return console_main
 
-    # Keep a reference to the original function
-    original_input_choice = console_main.input_choice
 
-    try:
-        # Override input_choice so generate_doc() doesn't ask the terminal
-        def _input_choice_override(prompt: str, choices: list[str]) -> str:
-            return color.strip().upper()
+def warm_up_in_background() -> threading.Thread:
+    """
+    Import the generation stack in a daemon thread (call after the window shows),
+    so the first Generate click doesn't pay the import cost.
+    """
+    t = threading.Thread(target=_load_generation_stack, name="docx-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def generate_doc_with_gui_color(lot_number: str, work_orders: list[dict], sheets: list[dict], color: str,
+                                renderer: str | None = None, stock: str | None = None,
+                                output_dir: str = "output", record: bool = True,
+                                barcode_profile: str | None = None) -> str:
+    """
+    Generate the lot with the selected renderer backend (default: the ORIGINAL
+    main.py layout, untouched), label stock, barcode profile and the
+    GUI-selected color.
+    Raises core.preflight.PreflightError (all problems) before rendering bad data.
+    """
+    from .preflight import check
+    from .renderers import get_renderer
 
-        console_main.input_choice = _input_choice_override
+    check(lot_number, work_orders, sheets, colors=[color], stock=stock, output_dir=output_dir)
+    # Ensure output folder exists (original code saves to output/...)
+    os.makedirs(output_dir, exist_ok=True)
+    return get_renderer(renderer).render(lot_number, work_orders, sheets, color, output_dir, record,
+                                         stock=stock, barcode_profile=barcode_profile)
 
-        # Ensure output folder exists (original code saves to output/...)
-        os.makedirs("output", exist_ok=True)
 
-        # Call your ORIGINAL generator (layout untouched)
-        return console_main.generate_doc(lot_number, work_orders, sheets)
+def generate_doc_multi_color(lot_number: str, work_orders: list[dict], sheets: list[dict],
+                             colors: list[str], renderer: str | None = None,
+                             stock: str | None = None, barcode_profile: str | None = None) -> list[str]:
+    """Render once with the selected backend and save one DOCX per color."""
+    from .preflight import check
+    from .renderers import get_renderer
 
-    finally:
-        # Restore it back
-        console_main.input_choice = original_input_choice
+    check(lot_number, work_orders, sheets, colors=colors, stock=stock)
+    os.makedirs("output", exist_ok=True)
+    return get_renderer(renderer).render_colors(lot_number, work_orders, sheets, colors, stock=stock,
+                                                barcode_profile=barcode_profile)
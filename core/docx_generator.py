@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import os
+import time
 from docx import Document
-from docx.shared import Inches
 from typing import List, Dict
 
-from .label_layout import fill_label_cell, SLOTS_PER_PAGE
+from .color_variants import load_variants, normalize_colors
+from .docx_save import save_variants
+from .label_layout import fill_label_cell
+from .label_stock import LabelStock, get_stock
+
+DEFAULT_STOCK = "letter-2x3"
 
 def _sanitize_filename(name: str) -> str:
     invalid = '<>:"/\\|?*'
@@ -13,58 +18,90 @@ def _sanitize_filename(name: str) -> str:
         name = name.replace(ch, "_")
     return name.strip()
 
-def _new_labels_table(doc: Document):
+def _new_labels_table(doc: Document, stock: LabelStock):
     """
-    Creates a 2x3 table used as one 'page' of 6 label slots.
-    We do NOT insert page breaks; Word will paginate naturally.
+    Creates one table per 'page' of label slots (grid and cell sizes from the stock).
+    We do NOT insert page breaks; the rows fill the page, Word paginates naturally.
     """
-    table = doc.add_table(rows=2, cols=3)
-    table.autofit = False
-
-    # Approx cell sizing (tweak if you want)
-    for row in table.rows:
-        for cell in row.cells:
-            cell.width = Inches(2.6)
+    return stock.add_table(doc)
 
-    return table
+def _iter_cells_in_slot_order(table, stock: LabelStock):
+    # slot order: row by row, left to right
+    for slot in range(stock.capacity):
+        yield stock.cell(table, slot)
 
-def _iter_cells_in_slot_order(table):
-    # slot order: row0 col0..2, row1 col0..2
-    for r in range(2):
-        for c in range(3):
-            yield table.cell(r, c)
-
-def generate_docx(lot_number: str, color: str, work_orders: List[Dict], sheets: List[Dict], output_dir: str) -> str:
+def generate_docx(lot_number: str, color: str, work_orders: List[Dict], sheets: List[Dict], output_dir: str,
+                  stock: str | None = None, barcode_profile: str | None = None) -> str:
     """
     Generates DOCX:
     - Cover: up to 4 WO labels with QTY = total_qty
     - Sheets: for each sheet, add label per WO with allocation > 0
       (quantity hidden on sheet labels, per your rules)
     - No forced page breaks between tables.
+    - Page and label geometry from the label stock (default letter-2x3)
+    - Barcodes sized by the barcode profile (core.barcode_profiles, None = default)
     """
-    doc = Document()
+    return generate_docx_colors(lot_number, [color], work_orders, sheets, output_dir, stock=stock,
+                                barcode_profile=barcode_profile)[0]
 
+def generate_docx_colors(lot_number: str, colors: List[str], work_orders: List[Dict], sheets: List[Dict],
+                         output_dir: str, stock: str | None = None, compression: str | None = None,
+                         record: bool = True, barcode_profile: str | None = None) -> List[str]:
+    """
+    Same document as generate_docx, rendered once and saved once per color
+    (color variants patched in per save, see core.color_variants; atomic
+    background writes, see core.docx_save).
+    record=False skips the metrics log (core.metrics).
+    """
     # Ensure output folder exists
     os.makedirs(output_dir, exist_ok=True)
 
+    t0 = time.perf_counter()
+    doc = _build_docx(lot_number, work_orders, sheets, get_stock(stock or DEFAULT_STOCK), barcode_profile)
+    t1 = time.perf_counter()
+
+    variants = load_variants()
+    targets = [(os.path.join(output_dir, _sanitize_filename(f"LOT {lot_number} {color}.docx")),
+                variants.get(color, {}))
+               for color in normalize_colors(colors)]
+    results = save_variants(doc, targets, compression)
+
+    if record:
+        from .metrics import record_run
+        from .renderers import get_renderer
+
+        backend = get_renderer("docx-core")
+        record_run(backend=backend.name, lot_number=lot_number, work_orders=work_orders, sheets=sheets,
+                   labels=backend.expected_labels(work_orders, sheets), pages=len(doc.tables),
+                   phases={"render_ms": (t1 - t0) * 1000, "save_ms": (time.perf_counter() - t1) * 1000},
+                   results=results, stock=stock or DEFAULT_STOCK)
+    return [result["path"] for result in results]
+
+def _build_docx(lot_number: str, work_orders: List[Dict], sheets: List[Dict], stock: LabelStock,
+                barcode_profile: str | None = None) -> Document:
+    doc = Document()
+    stock.setup_document(doc)
+    look = {"scale": stock.font_scale, "barcode_width": stock.barcode_w_in, "barcode_profile": barcode_profile}
+
     # ---------- COVER ----------
-    cover_table = _new_labels_table(doc)
-    cover_cells = list(_iter_cells_in_slot_order(cover_table))
+    cover_table = _new_labels_table(doc, stock)
+    cover_cells = list(_iter_cells_in_slot_order(cover_table, stock))
 
     # Put up to 4 WOs on cover (slots 0..3); remaining slots left blank
-    for i, wo in enumerate(work_orders[:4]):
+    for i, wo in enumerate(work_orders[:min(4, stock.capacity)]):
         fill_label_cell(
             cover_cells[i],
             lot_number=lot_number,
             wo=wo,
             qty_override=int(wo.get("total_qty", 1)),
-            hide_qty=False
+            hide_qty=False,
+            **look
         )
 
     # ---------- SHEETS ----------
-    # We'll fill labels sequentially across 6-slot tables.
-    current_table = _new_labels_table(doc)
-    cell_iter = iter(_iter_cells_in_slot_order(current_table))
+    # We'll fill labels sequentially across page tables.
+    current_table = _new_labels_table(doc, stock)
+    cell_iter = iter(_iter_cells_in_slot_order(current_table, stock))
 
     def next_cell():
         nonlocal current_table, cell_iter
@@ -72,8 +109,8 @@ def generate_docx(lot_number: str, color: str, work_orders: List[Dict], sheets:
             return next(cell_iter)
         except StopIteration:
             # Start next table WITHOUT page break
-            current_table = _new_labels_table(doc)
-            cell_iter = iter(_iter_cells_in_slot_order(current_table))
+            current_table = _new_labels_table(doc, stock)
+            cell_iter = iter(_iter_cells_in_slot_order(current_table, stock))
             return next(cell_iter)
 
     for sheet in sheets:
@@ -89,11 +126,8 @@ def generate_docx(lot_number: str, color: str, work_orders: List[Dict], sheets:
                 lot_number=lot_number,
                 wo=work_orders[int(wo_index)],
                 sheet_number=sheet_no,
-                hide_qty=True
+                hide_qty=True,
+                **look
             )
 
-    # Save
-    filename = _sanitize_filename(f"LOT {lot_number} {color}.docx")
-    path = os.path.join(output_dir, filename)
-    doc.save(path)
-    return path
+    return doc
@@ -0,0 +1,444 @@
+"""
+Merge generated lot documents into one print file, at the package level.
+
+Lot DOCX files are combined without python-docx and without re-rendering a
+label: the first file is the base (styles, settings, footer); the body of
+every other file is appended after a section break, which also starts the
+next lot on a new page. Each lot keeps its own page setup (label stock)
+and restarts its page numbers; "Page X of Y" counts the pages of the lot
+(NUMPAGES in the footer becomes SECTIONPAGES).
+
+Pictures referenced by the appended bodies, and the lots' header/footer
+parts, are copied once per distinct content (sha256): the same barcode
+printed in several lots is one media part. A lot without a footer gets an
+empty one, so it does not inherit the previous lot's.
+
+Bodies are spliced as bytes: relationship ids (r:embed, ...) and drawing
+ids are renumbered with one regex pass per body, and only the small
+section properties are parsed. Merge time follows file size, not label
+count.
+
+    python -m core.docx_merge -o "output/SHIFT WHITE.docx" "output/LOT 08811 WHITE.docx" ...
+    python -m core.docx_merge -o "output/SHIFT WHITE.docx" --color WHITE --lots 08811 08812
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import os
+import posixpath
+import re
+import sys
+import time
+import zipfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+PKG_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+IMAGE_RELTYPE = R_NS + "/image"
+R_ID = f"{{{R_NS}}}id"
+
+# Header / footer parts: relationship type, content type, root element
+SECTION_PARTS = {
+    "headerReference": ("header", R_NS + "/header",
+                        "application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml", "hdr"),
+    "footerReference": ("footer", R_NS + "/footer",
+                        "application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml", "ftr"),
+}
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS = "word/_rels/document.xml.rels"
+CONTENT_TYPES = "[Content_Types].xml"
+
+IMAGE_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "jpg": "image/jpeg", "gif": "image/gif",
+               "bmp": "image/bmp", "tiff": "image/tiff"}
+
+# Byte patterns of python-docx/Word document.xml
+_ROOT_TAG = re.compile(rb"<w:document\b[^>]*>")
+_NS_DECL = re.compile(rb'\sxmlns:(\w+)="([^"]*)"')
+_R_ATTR = re.compile(rb'(\sr:[A-Za-z]+=")([^"]*)(")')
+_DOCPR_ID = re.compile(rb'(<wp:docPr\b[^>]*?\sid=")(\d+)(")')
+
+# sectPr children that come after pgNumType (schema order)
+_AFTER_PG_NUM = ("cols", "formProt", "vAlign", "noEndnote", "titlePg", "textDirection", "bidi",
+                 "rtlGutter", "docGrid", "printerSettings", "sectPrChange")
+
+
+class MergeError(ValueError):
+    """Input is not a lot document that can be merged."""
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+def _open(path: str) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise MergeError(f"{path}: not a Word document")
+
+
+def _read(zf: zipfile.ZipFile, name: str, path: str) -> bytes:
+    try:
+        return zf.read(name)
+    except KeyError:
+        raise MergeError(f"{path}: no {name} (not a Word document?)")
+
+
+def _rels(root) -> Dict[str, Tuple[str, str, Optional[str]]]:
+    """rId -> (type, target, target mode) of a parsed .rels part."""
+    return {rel.get("Id"): (rel.get("Type"), rel.get("Target"), rel.get("TargetMode")) for rel in root}
+
+
+def _part_name(target: str) -> str:
+    """Zip member of a relationship target of word/document.xml."""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join("word", target))
+
+
+class _Body:
+    """
+    document.xml as bytes: everything up to the body content (`head`), the
+    body content without the final sectPr, the final sectPr (parsed, small)
+    and the tail. Namespace prefixes are the ones declared on the root.
+    """
+
+    def __init__(self, xml: bytes, path: str):
+        from lxml import etree
+
+        root = _ROOT_TAG.search(xml)
+        start = xml.find(b"<w:body>")
+        end = xml.rfind(b"</w:body>")
+        if root is None or start < 0 or end < start:
+            raise MergeError(f"{path}: unexpected document.xml layout")
+        self.ns = {p.decode(): uri.decode() for p, uri in _NS_DECL.findall(root.group(0))}
+        for prefix, uri in (("w", W_NS), ("r", R_NS), ("wp", WP_NS)):
+            if self.ns.get(prefix, uri) != uri:
+                raise MergeError(f"{path}: prefix {prefix}: is bound to {self.ns[prefix]}")
+        start += len(b"<w:body>")
+        self.root_end = root.end()
+        self.head, self.tail = xml[:start], xml[end:]
+
+        content = xml[start:end]
+        self.sect = None
+        s = content.rfind(b"<w:sectPr")
+        last = content[s:].rstrip() if s >= 0 else b""
+        # The body's own sectPr is its last child (a paragraph's sectPr is followed by </w:p>)
+        if last and b"</w:p>" not in last and (last.endswith(b"</w:sectPr>") or last.count(b"<") == 1):
+            content = content[:s]
+            decls = b"".join(m.group(0) for m in _NS_DECL.finditer(root.group(0)))
+            self.sect = etree.fromstring(b"<w:wrap" + decls + b">" + last + b"</w:wrap>")[0]
+        self.content = content
+
+
+def _sect_xml(sect) -> bytes:
+    """sectPr serialized for the merged body (prefixes are declared on the root)."""
+    from lxml import etree
+
+    data = etree.tostring(sect)
+    end = data.index(b">")
+    return _NS_DECL.sub(b"", data[:end]) + data[end:]
+
+
+def _section_break(sect) -> bytes:
+    """Paragraph that ends a section with `sect` (next lot starts on a new page)."""
+    return b"<w:p><w:pPr>" + _sect_xml(sect) + b"</w:pPr></w:p>"
+
+
+def _restart_numbering(sect) -> None:
+    """Page numbers of this section start at 1."""
+    from lxml import etree
+
+    pg = sect.find(_w("pgNumType"))
+    if pg is None:
+        pg = etree.Element(_w("pgNumType"))
+        following = next((c for c in sect if c.tag in {_w(t) for t in _AFTER_PG_NUM}), None)
+        if following is None:
+            sect.append(pg)
+        else:
+            following.addprevious(pg)
+    pg.set(_w("start"), "1")
+
+
+class _Merged:
+    """Base package + the parts added while appending lots."""
+
+    def __init__(self, path: str, zf: zipfile.ZipFile, restart_numbering: bool):
+        from lxml import etree
+
+        self.names = zf.namelist()
+        self.restart_numbering = restart_numbering
+        self.body = _Body(_read(zf, DOCUMENT_PART, path), path)
+        if self.body.sect is None:
+            raise MergeError(f"{path}: document has no section properties")
+        self.extra_ns: Dict[str, str] = {}  # prefixes used by appended lots only
+        self.rels_root = etree.fromstring(_read(zf, DOCUMENT_RELS, path))
+        self.types_root = etree.fromstring(_read(zf, CONTENT_TYPES, path))
+        rels = _rels(self.rels_root)
+
+        self.next_rid = 1 + max((int(m.group(1)) for rid in rels if (m := re.fullmatch(r"rId(\d+)", rid))),
+                                default=0)
+        self.next_docpr = 1 + max((int(m.group(2)) for m in _DOCPR_ID.finditer(self.body.content)), default=0)
+        self.extensions = {d.get("Extension").lower() for d in self.types_root if d.get("Extension")}
+        self.added: List[Tuple[str, bytes]] = []  # new zip members
+        self.media_added = 0
+        self.by_hash: Dict[str, str] = {}  # sha256 of a picture / header / footer -> rId
+        for rid, (reltype, target, mode) in rels.items():
+            if mode != "External" and (reltype == IMAGE_RELTYPE or
+                                       reltype in {t for _, t, _, _ in SECTION_PARTS.values()}):
+                self.by_hash.setdefault(hashlib.sha256(zf.read(_part_name(target))).hexdigest(), rid)
+
+        # Header/footer kinds used by any section so far: ((tag, w:type) -> kind known)
+        self.ref_kinds = set()
+        self.section_part_names: List[str] = []  # base headers/footers (page-count field rewritten)
+        for ref in _section_refs(self.body.sect):
+            self.ref_kinds.add((etree.QName(ref).localname, ref.get(_w("type"), "default")))
+            if ref.get(R_ID) in rels:
+                self.section_part_names.append(_part_name(rels[ref.get(R_ID)][1]))
+
+    def add_namespaces(self, body: _Body, path: str) -> None:
+        for prefix, uri in body.ns.items():
+            known = self.body.ns.get(prefix, self.extra_ns.get(prefix, uri))
+            if known != uri:
+                raise MergeError(f"{path}: prefix {prefix}: is bound to {uri}, not {known}")
+            if prefix not in self.body.ns:
+                self.extra_ns[prefix] = uri
+
+    def head(self) -> bytes:
+        """Base document up to the body content, with the lots' extra namespace declarations."""
+        head, end = self.body.head, self.body.root_end - 1
+        extra = "".join(f' xmlns:{p}="{uri}"' for p, uri in self.extra_ns.items()).encode()
+        return head[:end] + extra + head[end:]
+
+    def _add_rel(self, reltype: str, target: str, mode: Optional[str] = None) -> str:
+        from lxml import etree
+
+        rid = f"rId{self.next_rid}"
+        self.next_rid += 1
+        rel = etree.SubElement(self.rels_root, f"{{{PKG_RELS_NS}}}Relationship",
+                               Id=rid, Type=reltype, Target=target)
+        if mode:
+            rel.set("TargetMode", mode)
+        return rid
+
+    def _next_name(self, stem: str, ext: str) -> str:
+        taken = set(self.names) | {name for name, _ in self.added}
+        n = 1
+        while f"word/{stem}{n}.{ext}" in taken:
+            n += 1
+        return f"{stem}{n}.{ext}"
+
+    def add_image(self, blob: bytes, ext: str) -> Tuple[str, bool]:
+        """rId of a picture in the merged document; (rId, True) if it was already there."""
+        from lxml import etree
+
+        digest = hashlib.sha256(blob).hexdigest()
+        if digest in self.by_hash:
+            return self.by_hash[digest], True
+        ext = ext.lower()
+        name = self._next_name("media/image", ext)
+        self.added.append((f"word/{name}", blob))
+        self.media_added += 1
+        if ext not in self.extensions:
+            etree.SubElement(self.types_root, f"{{{CT_NS}}}Default", Extension=ext,
+                             ContentType=IMAGE_TYPES.get(ext, f"image/{ext}"))
+            self.extensions.add(ext)
+        rid = self.by_hash[digest] = self._add_rel(IMAGE_RELTYPE, name)
+        return rid, False
+
+    def add_section_part(self, tag: str, blob: bytes) -> str:
+        """rId of a header/footer part with this content (added once)."""
+        from lxml import etree
+
+        digest = hashlib.sha256(blob).hexdigest()
+        if digest in self.by_hash:
+            return self.by_hash[digest]
+        stem, reltype, content_type, _ = SECTION_PARTS[tag]
+        name = self._next_name(stem, "xml")
+        if self.restart_numbering:
+            blob = _section_page_count(blob)
+        self.added.append((f"word/{name}", blob))
+        etree.SubElement(self.types_root, f"{{{CT_NS}}}Override", PartName=f"/word/{name}",
+                         ContentType=content_type)
+        rid = self.by_hash[digest] = self._add_rel(reltype, name)
+        return rid
+
+    def empty_section_part(self, tag: str) -> str:
+        root = SECTION_PARTS[tag][3]
+        return self.add_section_part(tag, f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                                          f'<w:{root} xmlns:w="{W_NS}"><w:p/></w:{root}>'.encode())
+
+
+def _section_refs(sect) -> list:
+    if sect is None:
+        return []
+    return [c for c in sect if c.tag in (_w("headerReference"), _w("footerReference"))]
+
+
+def _section_page_count(blob: bytes) -> bytes:
+    """"Page X of Y" counts the pages of the section (the lot), not of the merged file."""
+    return re.sub(rb"\bNUMPAGES\b", b"SECTIONPAGES", blob)
+
+
+def _map_section_refs(merged: _Merged, zf: zipfile.ZipFile, path: str, sect, rels) -> None:
+    """Point a lot's header/footer references at parts of the merged package."""
+    from lxml import etree
+
+    have = set()
+    for ref in _section_refs(sect):
+        tag = etree.QName(ref).localname
+        reltype, target, _ = rels.get(ref.get(R_ID), (None, "", None))
+        name = _part_name(target)
+        if name not in zf.namelist():
+            raise MergeError(f"{path}: missing {tag} part {target}")
+        if posixpath.join(posixpath.dirname(name), "_rels", posixpath.basename(name) + ".rels") in zf.namelist():
+            raise MergeError(f"{path}: cannot merge a {tag[:6]} with pictures or links ({target})")
+        ref.set(R_ID, merged.add_section_part(tag, zf.read(name)))
+        have.add((tag, ref.get(_w("type"), "default")))
+
+    # Kinds an earlier lot had but this one does not: empty part instead of inheriting it
+    for i, (tag, kind) in enumerate(sorted(merged.ref_kinds - have)):
+        ref = etree.Element(_w(tag))
+        ref.set(_w("type"), kind)
+        ref.set(R_ID, merged.empty_section_part(tag))
+        sect.insert(i, ref)
+    merged.ref_kinds |= have
+
+
+def merge_documents(inputs: Sequence[str], output: str, *, restart_numbering: bool = True,
+                    compression: Optional[str] = None) -> dict:
+    """
+    Merge lot documents (in order) into `output` (written atomically, see
+    core.docx_save). Returns {"path", "lots", "bytes", "media_added",
+    "media_shared", "merge_ms"}. Raises MergeError for unusable inputs.
+    """
+    from lxml import etree
+
+    from .docx_save import write_package
+
+    if not inputs:
+        raise MergeError("Nothing to merge.")
+    t0 = time.perf_counter()
+    counts = {"shared": 0}
+
+    with _open(inputs[0]) as base_zip:
+        merged = _Merged(inputs[0], base_zip, restart_numbering)
+        base_entries = [(name, base_zip.read(name)) for name in merged.names]
+
+    chunks = [merged.head(), merged.body.content]  # head() again at the end (namespaces)
+    last_sect = merged.body.sect
+    if restart_numbering:
+        _restart_numbering(last_sect)
+
+    for path in inputs[1:]:
+        with _open(path) as zf:
+            body = _Body(_read(zf, DOCUMENT_PART, path), path)
+            rels = _rels(etree.fromstring(_read(zf, DOCUMENT_RELS, path)))
+            merged.add_namespaces(body, path)
+
+            # Every relationship the body uses -> one in the merged document
+            rid_map: Dict[bytes, bytes] = {}
+
+            def relink(m):
+                rid = m.group(2)
+                if rid not in rid_map:
+                    if rid.decode() not in rels:
+                        raise MergeError(f"{path}: broken relationship {rid.decode()}")
+                    reltype, target, mode = rels[rid.decode()]
+                    if mode == "External":
+                        new = merged._add_rel(reltype, target, mode)
+                    elif reltype == IMAGE_RELTYPE:
+                        new, reused = merged.add_image(zf.read(_part_name(target)),
+                                                       posixpath.splitext(target)[1][1:])
+                        counts["shared"] += reused
+                    else:
+                        raise MergeError(f"{path}: cannot merge a body that links to {target}")
+                    rid_map[rid] = new.encode()
+                return m.group(1) + rid_map[rid] + m.group(3)
+
+            content = _R_ATTR.sub(relink, body.content)
+
+            sect = body.sect
+            if sect is None:  # no page setup of its own: same as the previous lot
+                sect = copy.deepcopy(last_sect)
+                for ref in _section_refs(sect):
+                    sect.remove(ref)
+            _map_section_refs(merged, zf, path, sect, rels)
+
+        def renumber(m):
+            merged.next_docpr += 1
+            return m.group(1) + str(merged.next_docpr - 1).encode() + m.group(3)
+
+        # Previous lot's section ends here; this lot takes over the final sectPr
+        chunks += [_section_break(last_sect), _DOCPR_ID.sub(renumber, content)]
+        if restart_numbering:
+            _restart_numbering(sect)
+        last_sect = sect
+
+    chunks[0] = merged.head()
+    chunks += [_sect_xml(last_sect), merged.body.tail]
+
+    def xml(root) -> bytes:
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    replaced = {DOCUMENT_PART: b"".join(chunks), DOCUMENT_RELS: xml(merged.rels_root),
+                CONTENT_TYPES: xml(merged.types_root)}
+    if restart_numbering and len(inputs) > 1:
+        base_parts = dict(base_entries)
+        for name in merged.section_part_names:
+            if name in base_parts:
+                replaced[name] = _section_page_count(base_parts[name])
+
+    entries = [(name, replaced.get(name, blob)) for name, blob in base_entries] + merged.added
+    result = write_package(entries, output, compression)
+    return {"path": output, "lots": len(inputs), "bytes": result["bytes"], "media_added": merged.media_added,
+            "media_shared": counts["shared"], "merge_ms": (time.perf_counter() - t0) * 1000}
+
+
+def lot_paths(lots: Sequence[str], color: str, output_dir: str = "output") -> List[str]:
+    """Generated document of each lot in `color` (LOT <lot> <COLOR>.docx); raises MergeError if missing."""
+    from main import sanitize_filename
+
+    paths = [os.path.join(output_dir, f"{sanitize_filename(f'LOT {lot} {color.upper()}')}.docx") for lot in lots]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise MergeError("Not generated yet:\n" + "\n".join(missing))
+    return paths
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Merge generated lot documents into one print file.")
+    ap.add_argument("inputs", nargs="*", help="Lot DOCX files, in print order")
+    ap.add_argument("-o", "--output", required=True)
+    ap.add_argument("--lots", nargs="+", default=None, help="Lot numbers instead of file paths (needs --color)")
+    ap.add_argument("--color", default=None)
+    ap.add_argument("--output-dir", default="output", help="Where --lots documents are (default: output)")
+    ap.add_argument("--continuous", action="store_true", help="Number pages through the whole file")
+    ap.add_argument("--compression", choices=["stored", "fast", "default", "max"], default=None)
+    args = ap.parse_args(argv)
+
+    try:
+        inputs = list(args.inputs)
+        if args.lots:
+            if not args.color:
+                ap.error("--lots needs --color")
+            inputs += lot_paths(args.lots, args.color, args.output_dir)
+        result = merge_documents(inputs, args.output, restart_numbering=not args.continuous,
+                                 compression=args.compression)
+    except (MergeError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {result['lots']} lots merged in {result['merge_ms']:.0f} ms: {result['path']} "
+          f"({result['bytes'] / 1024:.0f} KB, {result['media_added']} pictures added, "
+          f"{result['media_shared']} shared)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Save stage for label documents: snapshot, compress, replace atomically.
+
+doc.save(path) zips straight into the final path at zlib's default level.
+A crash (or Word holding the file) halfway through leaves a truncated DOCX,
+and the caller waits for the whole zip/write. Here a save is split in:
+  1. snapshot(doc): the package parts serialized to (member name, bytes),
+     in the calling thread, so the document can be changed right after.
+     Uses python-docx's package writer internals (requirements.txt pins the
+     tested range); without them it falls back to doc.save() into memory
+     and re-reads the members (slower: zips and unzips once more)
+  2. write_package(): zip the snapshot into a temp file next to the target,
+     fsync, then os.replace() it onto the target (old file or new file,
+     never half a file)
+Step 2 can run on worker threads (BackgroundSaver); zlib releases the GIL,
+so several colors compress in parallel while the next lot renders.
+
+Compression levels (COMPRESSION):
+    stored   no compression: largest file, fastest save
+    fast     deflate level 1
+    default  deflate level 6 (what doc.save() writes)
+    max      deflate level 9
+
+    python -m core.docx_save bench [--sheets 50] [--runs 3]   time / size per level
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+COMPRESSION: Dict[str, Tuple[int, Optional[int]]] = {
+    "stored": (zipfile.ZIP_STORED, None),
+    "fast": (zipfile.ZIP_DEFLATED, 1),
+    "default": (zipfile.ZIP_DEFLATED, 6),
+    "max": (zipfile.ZIP_DEFLATED, 9),
+}
+DEFAULT_COMPRESSION = "default"
+SAVE_WORKERS = 2
+
+Entries = List[Tuple[str, bytes]]
+
+
+def _compression(name: Optional[str]) -> Tuple[str, int, Optional[int]]:
+    name = name or DEFAULT_COMPRESSION
+    try:
+        method, level = COMPRESSION[name]
+    except KeyError:
+        raise ValueError(f"Unknown compression '{name}' (have: {', '.join(COMPRESSION)})")
+    return name, method, level
+
+
+class _Collector:
+    """Stands in for python-docx's zip writer and keeps the members in memory."""
+
+    def __init__(self):
+        self.entries: Entries = []
+
+    def write(self, pack_uri, blob: bytes) -> None:
+        self.entries.append((pack_uri.membername, blob))
+
+    def close(self) -> None:
+        pass
+
+
+def snapshot(doc) -> Entries:
+    """Serialized package members of `doc`, in the order doc.save() writes them."""
+    from docx.opc.pkgwriter import PackageWriter
+
+    if not all(hasattr(PackageWriter, name)
+               for name in ("_write_content_types_stream", "_write_pkg_rels", "_write_parts")):
+        return _snapshot_via_save(doc)
+
+    package = doc.part.package
+    parts = list(package.parts)
+    for part in parts:
+        part.before_marshal()
+    collector = _Collector()
+    PackageWriter._write_content_types_stream(collector, parts)
+    PackageWriter._write_pkg_rels(collector, package.rels)
+    PackageWriter._write_parts(collector, parts)
+    return collector.entries
+
+
+def _snapshot_via_save(doc) -> Entries:
+    """snapshot() through the public API only: save into memory, read the members back."""
+    buf = io.BytesIO()
+    doc.save(buf)
+    with zipfile.ZipFile(buf) as zf:
+        return [(info.filename, zf.read(info)) for info in zf.infolist()]
+
+
+def _temp_path(path: str) -> str:
+    # Same folder as the target, so os.replace() is a rename, not a copy
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def _replace(tmp: str, path: str) -> None:
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_package(entries: Entries, path: str, compression: Optional[str] = None) -> dict:
+    """Zip a snapshot into `path` atomically; returns {"path", "compression", "bytes", "save_ms"}."""
+    name, method, level = _compression(compression)
+    t0 = time.perf_counter()
+    tmp = _temp_path(path)
+    try:
+        with open(tmp, "xb") as f:
+            with zipfile.ZipFile(f, "w", compression=method, compresslevel=level) as zf:
+                for member, blob in entries:
+                    zf.writestr(member, blob)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _replace(tmp, path)
+    return {"path": path, "compression": name, "bytes": os.path.getsize(path),
+            "save_ms": (time.perf_counter() - t0) * 1000}
+
+
+def copy_atomic(source: str, path: str) -> dict:
+    """Copy an already saved document to `path` (temp file + rename)."""
+    t0 = time.perf_counter()
+    tmp = _temp_path(path)
+    try:
+        shutil.copyfile(source, tmp)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _replace(tmp, path)
+    return {"path": path, "compression": "copy", "bytes": os.path.getsize(path),
+            "save_ms": (time.perf_counter() - t0) * 1000}
+
+
+def save_docx(doc, path: str, compression: Optional[str] = None) -> dict:
+    """Drop-in for doc.save(path): atomic, at the selected compression level."""
+    t0 = time.perf_counter()
+    result = write_package(snapshot(doc), path, compression)
+    result["save_ms"] = (time.perf_counter() - t0) * 1000
+    return result
+
+
+class BackgroundSaver:
+    """
+    Writes document snapshots on worker threads.
+
+        with BackgroundSaver() as saver:
+            future = saver.save(doc, path)     # returns once the snapshot is taken
+            ...                                # doc may be patched / re-rendered here
+        future.result()                        # {"path", "bytes", "save_ms", ...}
+    Leaving the with-block waits for every pending write.
+    """
+
+    def __init__(self, workers: int = SAVE_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docx-save")
+
+    def save(self, doc, path: str, compression: Optional[str] = None) -> Future:
+        t0 = time.perf_counter()
+        entries = snapshot(doc)
+        snapshot_ms = (time.perf_counter() - t0) * 1000
+        return self._pool.submit(self._write, entries, path, compression, snapshot_ms)
+
+    def copy(self, source: Future, path: str) -> Future:
+        """Copy the file of an earlier save() once it is written."""
+        return self._pool.submit(lambda: copy_atomic(source.result()["path"], path))
+
+    @staticmethod
+    def _write(entries: Entries, path: str, compression: Optional[str], snapshot_ms: float) -> dict:
+        result = write_package(entries, path, compression)
+        result["save_ms"] += snapshot_ms
+        return result
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "BackgroundSaver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def save_variants(doc, targets: Sequence[Tuple[str, dict]], compression: Optional[str] = None) -> List[dict]:
+    """
+    Save one document to several paths, each with its color variant
+    (core.color_variants) patched in for the snapshot and undone right after.
+    Paths with an identical variant are copies of the first one saved.
+    targets = [(path, variant), ...]; returns the save results in that order.
+    """
+    with BackgroundSaver() as saver:
+        futures = submit_variants(saver, doc, targets, compression)
+    return [f.result() for f in futures]
+
+
+def submit_variants(saver: BackgroundSaver, doc, targets: Sequence[Tuple[str, dict]],
+                    compression: Optional[str] = None) -> List[Future]:
+    """save_variants() without waiting: returns once every snapshot is taken."""
+    from .color_variants import apply_variant, variant_signature
+
+    futures: List[Future] = []
+    first: Dict[str, Future] = {}  # variant signature -> first save with it
+    for path, variant in targets:
+        signature = variant_signature(variant)
+        if signature in first:
+            futures.append(saver.copy(first[signature], path))
+            continue
+        undo = apply_variant(doc, variant)
+        try:
+            future = saver.save(doc, path, compression)
+        finally:
+            undo()
+        first[signature] = future
+        futures.append(future)
+    return futures
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Save time and file size per compression level.")
+    ap.add_argument("command", choices=["bench"])
+    ap.add_argument("--sheets", type=int, default=50)
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    import main as console_main
+    from .renderers import sample_lot
+
+    lot = sample_lot(args.sheets, 3, 6)
+    doc, render_s = console_main.build_doc(lot["lot"], lot["work_orders"], lot["sheets"])
+    print(f"LOT {lot['lot']}: rendered in {render_s * 1000:.0f} ms\n")
+
+    t0 = time.perf_counter()
+    entries = snapshot(doc)
+    print(f"snapshot   {(time.perf_counter() - t0) * 1000:8.1f} ms  "
+          f"{sum(len(b) for _, b in entries) / 1024:8.0f} KB uncompressed\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.docx")
+        for name in COMPRESSION:
+            results = [write_package(entries, path, name) for _ in range(args.runs)]
+            ms = statistics.median(r["save_ms"] for r in results)
+            print(f"{name:8} {ms:8.1f} ms  {results[-1]['bytes'] / 1024:8.0f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
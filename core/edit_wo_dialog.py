@@ -5,16 +5,20 @@ from typing import List, Dict, Optional
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QLabel
+    QTableWidget, QTableWidgetItem, QMessageBox, QLabel, QFileDialog, QInputDialog
 )
 
+from .flow_logic import MAX_WORK_ORDERS, validate_work_order_row
+from .wo_import import DEFAULT_PROFILE_NAME, WorkOrderImportError, import_work_orders, load_profiles
+
 WorkOrder = Dict[str, object]
 
 
 class EditWorkOrdersDialog(QDialog):
     HEADERS = ["EC-Part #", "TAG + DESCRIPTION", "PLNM-Part #", "WO #", "TOTAL QTY"]
 
-    def __init__(self, parent, work_orders: Optional[List[WorkOrder]] = None, *, title: str = "Work Orders"):
+    def __init__(self, parent, work_orders: Optional[List[WorkOrder]] = None, *, title: str = "Work Orders",
+                 lot_number: Optional[str] = None):
         super().__init__(parent)
         self.setWindowTitle(title)
         self.resize(900, 420)
@@ -23,6 +27,7 @@ class EditWorkOrdersDialog(QDialog):
             work_orders = []
 
         self._result: Optional[List[WorkOrder]] = None
+        self._lot_number = lot_number
 
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Fill the table. Click Save to continue."))
@@ -38,12 +43,7 @@ class EditWorkOrdersDialog(QDialog):
         layout.addWidget(self.table)
 
         # Fill rows (if any)
-        for r, wo in enumerate(work_orders):
-            self._set_item(r, 0, str(wo.get("part", "")).strip())
-            self._set_item(r, 1, str(wo.get("tag_desc", "")).strip())
-            self._set_item(r, 2, str(wo.get("code", "")).strip())
-            self._set_item(r, 3, str(wo.get("work_order", "")).strip())
-            self._set_item(r, 4, str(int(wo.get("total_qty", 1))))
+        self._fill_rows(work_orders)
 
         # If started empty, prefill qty with 1
         if len(work_orders) == 0:
@@ -52,10 +52,12 @@ class EditWorkOrdersDialog(QDialog):
         btn_row = QHBoxLayout()
         self.add_btn = QPushButton("Add WO")
         self.del_btn = QPushButton("Remove Selected")
+        self.import_btn = QPushButton("Import File...")
         self.save_btn = QPushButton("Save")
         self.cancel_btn = QPushButton("Cancel")
         btn_row.addWidget(self.add_btn)
         btn_row.addWidget(self.del_btn)
+        btn_row.addWidget(self.import_btn)
         btn_row.addStretch(1)
         btn_row.addWidget(self.save_btn)
         btn_row.addWidget(self.cancel_btn)
@@ -63,9 +65,18 @@ class EditWorkOrdersDialog(QDialog):
 
         self.add_btn.clicked.connect(self._add_row)
         self.del_btn.clicked.connect(self._remove_selected)
+        self.import_btn.clicked.connect(self._import_file)
         self.save_btn.clicked.connect(self._save)
         self.cancel_btn.clicked.connect(self.reject)
 
+    def _fill_rows(self, work_orders: List[WorkOrder]):
+        for r, wo in enumerate(work_orders):
+            self._set_item(r, 0, str(wo.get("part", "")).strip())
+            self._set_item(r, 1, str(wo.get("tag_desc", "")).strip())
+            self._set_item(r, 2, str(wo.get("code", "")).strip())
+            self._set_item(r, 3, str(wo.get("work_order", "")).strip())
+            self._set_item(r, 4, str(int(wo.get("total_qty", 1))))
+
     def _set_item(self, r: int, c: int, text: str):
         item = QTableWidgetItem(text)
         if c == 4:
@@ -73,7 +84,7 @@ class EditWorkOrdersDialog(QDialog):
         self.table.setItem(r, c, item)
 
     def _add_row(self):
-        if self.table.rowCount() >= 4:
+        if self.table.rowCount() >= MAX_WORK_ORDERS:
             QMessageBox.warning(self, "Limit reached", "Maximum 4 Work Orders allowed.")
             return
 
@@ -83,6 +94,39 @@ class EditWorkOrdersDialog(QDialog):
             self._set_item(r, c, "" if c != 4 else "1")
 
 
+    def _import_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Work Orders", "", "ERP exports (*.csv *.xlsx *.xlsm);;All files (*)"
+        )
+        if not path:
+            return
+
+        profiles = load_profiles()
+        name = DEFAULT_PROFILE_NAME
+        if len(profiles) > 1:
+            name, ok = QInputDialog.getItem(self, "Import profile", "Column mapping:", list(profiles), 0, False)
+            if not ok:
+                return
+
+        try:
+            wos, errors = import_work_orders(path, profiles[name], self._lot_number)
+        except (WorkOrderImportError, OSError) as e:
+            QMessageBox.warning(self, "Import", f"Cannot import file:\n{e}")
+            return
+
+        if errors:
+            shown = errors[:30]
+            if len(errors) > len(shown):
+                shown.append(f"... and {len(errors) - len(shown)} more")
+            QMessageBox.warning(self, "Import", "Some rows were not imported:\n\n" + "\n".join(shown))
+
+        wos = wos[:MAX_WORK_ORDERS]
+        if not wos:
+            return
+
+        self.table.setRowCount(len(wos))
+        self._fill_rows(wos)
+
     def _remove_selected(self):
         rows = sorted({idx.row() for idx in self.table.selectedIndexes()}, reverse=True)
         if not rows:
@@ -100,36 +144,15 @@ class EditWorkOrdersDialog(QDialog):
             wo_num = (self.table.item(r, 3).text() if self.table.item(r, 3) else "").strip()
             qty_txt = (self.table.item(r, 4).text() if self.table.item(r, 4) else "").strip()
 
-            # Skip completely empty rows
-            if not part and not tag_desc and not code and not wo_num and not qty_txt:
-                continue
-
-            if not part:
-                QMessageBox.warning(self, "Validation", f"Row {r+1}: Part # is required.")
+            wo, error = validate_work_order_row(part, tag_desc, code, wo_num, qty_txt)
+            if error:
+                QMessageBox.warning(self, "Validation", f"Row {r+1}: {error}")
                 return
-            if not wo_num:
-                QMessageBox.warning(self, "Validation", f"Row {r+1}: WO # is required.")
-                return
-            try:
-                total_qty = int(qty_txt)
-                if total_qty <= 0:
-                    raise ValueError
-            except Exception:
-                QMessageBox.warning(self, "Validation", f"Row {r+1}: TOTAL QTY must be a positive integer.")
-                return
-
-            wos.append(
-                {
-                    "part": part,
-                    "tag_desc": tag_desc,
-                    "code": code,
-                    "work_order": wo_num,
-                    "total_qty": total_qty,
-                }
-            )
+            if wo is not None:
+                wos.append(wo)
 
         # 🚨 AQUI VA EL LIMITE DE 4 WO
-        if len(wos) > 4:
+        if len(wos) > MAX_WORK_ORDERS:
             QMessageBox.warning(self, "Limit reached", "Maximum 4 Work Orders allowed.")
             return
 
@@ -145,12 +168,14 @@ class EditWorkOrdersDialog(QDialog):
         return self._result
 
 
-def work_orders_table_dialog(parent, work_orders: Optional[List[WorkOrder]], *, title: str) -> Optional[List[WorkOrder]]:
+def work_orders_table_dialog(parent, work_orders: Optional[List[WorkOrder]], *, title: str,
+                             lot_number: Optional[str] = None) -> Optional[List[WorkOrder]]:
     """
     Unified dialog for both initial entry and editing.
     Returns updated list if user saves, None if cancelled.
+    lot_number filters file imports whose profile maps a LOT column.
     """
-    dlg = EditWorkOrdersDialog(parent, work_orders, title=title)
+    dlg = EditWorkOrdersDialog(parent, work_orders, title=title, lot_number=lot_number)
     if dlg.exec() == QDialog.Accepted:
         return dlg.result_work_orders()
     return None
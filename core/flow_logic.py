@@ -1,10 +1,58 @@
 from __future__ import annotations
 
-from typing import List, Dict
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .preflight import code_problem
 
 WorkOrder = Dict[str, object]
 Sheet = Dict[str, object]
 
+MAX_WORK_ORDERS = 4
+
+# Work order text fields, in table/column order
+WO_FIELDS = ("part", "tag_desc", "code", "work_order", "total_qty")
+
+
+def validate_work_order_row(part: str, tag_desc: str, code: str, wo_num: str,
+                            qty_txt: str) -> Tuple[Optional[WorkOrder], Optional[str]]:
+    """
+    Validation rules for one Work Order row (table entry or file import).
+    Returns (work_order, None) if valid, (None, error) if not,
+    and (None, None) for a completely empty row (to be skipped).
+    """
+    part = (part or "").strip()
+    tag_desc = (tag_desc or "").strip()
+    code = (code or "").strip()
+    wo_num = (wo_num or "").strip()
+    qty_txt = (qty_txt or "").strip()
+
+    # Skip completely empty rows
+    if not part and not tag_desc and not code and not wo_num and not qty_txt:
+        return None, None
+
+    if not part:
+        return None, "Part # is required."
+    if not wo_num:
+        return None, "WO # is required."
+    code_error = code_problem(code)
+    if code_error:
+        return None, code_error
+    try:
+        total_qty = int(qty_txt)
+        if total_qty <= 0:
+            raise ValueError
+    except Exception:
+        return None, "TOTAL QTY must be a positive integer."
+
+    return {
+        "part": part,
+        "tag_desc": tag_desc,
+        "code": code,
+        "work_order": wo_num,
+        "total_qty": total_qty,
+    }, None
+
 
 def render_work_orders_summary(work_orders: List[WorkOrder]) -> str:
     """
@@ -33,30 +81,77 @@ def render_work_orders_summary(work_orders: List[WorkOrder]) -> str:
     return "\n".join(lines)
 
 
+class NestSummary:
+    """
+    Per-sheet / per-WO quantities of a nest, aggregated once into flat arrays
+    (one int conversion per allocation). Views read cells by index; the
+    console text is produced lazily by iter_text_lines() / text().
+    """
+
+    def __init__(self, work_orders: List[WorkOrder], sheets: List[Sheet]):
+        self.work_orders = work_orders
+        self.wo_count = n_wo = len(work_orders)
+        self.sheet_count = len(sheets)
+
+        self.sheet_numbers = array("q", bytes(8 * len(sheets)))
+        self.qty = array("q", bytes(8 * len(sheets) * n_wo))   # row-major: sheet x WO
+        self.sheet_totals = array("q", bytes(8 * len(sheets)))
+        self.wo_totals = array("q", bytes(8 * n_wo))
+        self.expected = array("q", (int(wo.get("total_qty", 0)) for wo in work_orders))
+
+        qty = self.qty
+        for row, sh in enumerate(sheets):
+            self.sheet_numbers[row] = int(sh["sheet_number"])
+            base = row * n_wo
+            for (i, q) in sh["allocations"]:
+                q = int(q)
+                if q > 0:
+                    qty[base + int(i)] += q
+            self.sheet_totals[row] = sum(qty[base:base + n_wo])
+
+        for i in range(n_wo):
+            self.wo_totals[i] = sum(qty[i::n_wo]) if n_wo else 0
+
+    def cell(self, row: int, wo_index: int) -> int:
+        return self.qty[row * self.wo_count + wo_index]
+
+    def mismatch(self, wo_index: int) -> int:
+        """Allocated minus expected pieces for one WO (0 = OK)."""
+        return self.wo_totals[wo_index] - self.expected[wo_index]
+
+    @property
+    def mismatched(self) -> List[int]:
+        return [i for i in range(self.wo_count) if self.mismatch(i)]
+
+    @property
+    def total_pieces(self) -> int:
+        return sum(self.wo_totals)
+
+    def iter_text_lines(self):
+        """Console-like nesting summary, one line at a time."""
+        yield "================= NEST SUMMARY ================="
+        for row in range(self.sheet_count):
+            yield f"\nSHEET {self.sheet_numbers[row]}:"
+            for i in range(self.wo_count):
+                q = self.cell(row, i)
+                if q > 0:
+                    wo = self.work_orders[i]
+                    yield f"  - WO {wo['work_order']} | PART {wo['part']} -> {q} pcs"
+
+        yield "\nTOTALS BY WORK ORDER:"
+        for i, wo in enumerate(self.work_orders):
+            yield (f"  WO {wo['work_order']} | PART {wo['part']} -> {self.wo_totals[i]} pcs "
+                   f"(expected {self.expected[i]})")
+        yield "\n================================================"
+
+    def text(self) -> str:
+        return "\n".join(self.iter_text_lines())
+
+
 def render_summary_text(work_orders: List[WorkOrder], sheets: List[Sheet]) -> str:
     """
     Console-like nesting summary.
     sheets format:
       sheets = [{"sheet_number": 1, "allocations": [(wo_index, qty), ...]}, ...]
     """
-    totals = {i: 0 for i in range(len(work_orders))}
-    lines: List[str] = []
-    lines.append("================= NEST SUMMARY =================")
-
-    for sh in sheets:
-        lines.append(f"\nSHEET {int(sh['sheet_number'])}:")
-        for (i, qty) in sh["allocations"]:
-            if int(qty) > 0:
-                wo = work_orders[int(i)]
-                totals[int(i)] += int(qty)
-                lines.append(f"  - WO {wo['work_order']} | PART {wo['part']} -> {qty} pcs")
-
-    lines.append("\nTOTALS BY WORK ORDER:")
-    for i, wo in enumerate(work_orders):
-        lines.append(
-            f"  WO {wo['work_order']} | PART {wo['part']} -> {totals[i]} pcs "
-            f"(expected {wo['total_qty']})"
-        )
-
-    lines.append("\n================================================")
-    return "\n".join(lines)
+    return NestSummary(work_orders, sheets).text()
@@ -0,0 +1,381 @@
+"""
+Embedded SQLite record of every generated document.
+
+One row per generation in `jobs` (lot, color, output path, content hash,
+timings, full WO + sheets data), plus normalized `job_work_orders` and
+`job_allocations` rows so "which lot did WO 12345 go into" is an indexed
+lookup. Stored jobs carry everything needed to regenerate (reprint) them.
+Serialized lots (core.serials) also get their serial range per WO in
+`job_serials`; `serial_counters` holds the next free number per counter.
+
+    python -m core.job_store wo 12345
+    python -m core.job_store lot 08811
+    python -m core.job_store serial PLNM-4471-08811-0012
+    python -m core.job_store reprint 42
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from typing import Dict, List, Optional
+
+from .barcode_profiles import DEFAULT_PROFILE
+from .serials import format_serial, is_serialized, piece_counts, serial_prefix
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+DEFAULT_DB_PATH = os.path.join("output", "jobs.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    lot             TEXT NOT NULL,
+    color           TEXT NOT NULL,
+    kind            TEXT NOT NULL DEFAULT 'full',
+    stock           TEXT,
+    barcode_profile TEXT,
+    output_path     TEXT NOT NULL,
+    content_hash    TEXT,
+    created_at      REAL NOT NULL,
+    timings_json    TEXT NOT NULL DEFAULT '{}',
+    work_orders_json TEXT NOT NULL,
+    sheets_json     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_work_orders (
+    job_id      INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    wo_index    INTEGER NOT NULL,
+    work_order  TEXT NOT NULL,
+    part        TEXT NOT NULL,
+    code        TEXT NOT NULL,
+    tag_desc    TEXT NOT NULL,
+    total_qty   INTEGER NOT NULL,
+    PRIMARY KEY (job_id, wo_index)
+);
+CREATE TABLE IF NOT EXISTS job_allocations (
+    job_id       INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    sheet_number INTEGER NOT NULL,
+    wo_index     INTEGER NOT NULL,
+    qty          INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS serial_counters (
+    name        TEXT PRIMARY KEY,
+    next_serial INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_serials (
+    job_id       INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    wo_index     INTEGER NOT NULL,
+    counter      TEXT NOT NULL,
+    template     TEXT NOT NULL,
+    serial_first INTEGER NOT NULL,
+    serial_last  INTEGER NOT NULL,
+    value_prefix TEXT,
+    PRIMARY KEY (job_id, wo_index)
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_lot ON jobs(lot);
+CREATE INDEX IF NOT EXISTS ix_jwo_work_order ON job_work_orders(work_order);
+CREATE INDEX IF NOT EXISTS ix_jwo_part ON job_work_orders(part);
+CREATE INDEX IF NOT EXISTS ix_jwo_code ON job_work_orders(code);
+CREATE INDEX IF NOT EXISTS ix_jalloc_job ON job_allocations(job_id);
+CREATE INDEX IF NOT EXISTS ix_jserial_range ON job_serials(serial_first, serial_last);
+"""
+
+# Keys that only exist transiently while rendering (never persisted)
+_TRANSIENT_KEYS = ("remaining", "qty_override", "hide_qty", "serial_line", "piece_of")
+
+
+def file_hash(path: str) -> Optional[str]:
+    """sha256 of a file's bytes, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class JobStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DEFAULT_DB_PATH
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        cols = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "kind" not in cols:
+            conn.execute("ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'full'")
+            conn.commit()
+        if "stock" not in cols:
+            conn.execute("ALTER TABLE jobs ADD COLUMN stock TEXT")
+            conn.commit()
+        if "barcode_profile" not in cols:
+            conn.execute("ALTER TABLE jobs ADD COLUMN barcode_profile TEXT")
+            conn.commit()
+        serial_cols = {row["name"] for row in conn.execute("PRAGMA table_info(job_serials)")}
+        if "value_prefix" not in serial_cols:
+            conn.execute("ALTER TABLE job_serials ADD COLUMN value_prefix TEXT")
+            rows = conn.execute(
+                "SELECT s.job_id, s.wo_index, s.template, j.lot, w.code, w.part, w.work_order"
+                " FROM job_serials s JOIN jobs j ON j.id = s.job_id"
+                " JOIN job_work_orders w ON w.job_id = s.job_id AND w.wo_index = s.wo_index"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE job_serials SET value_prefix = ? WHERE job_id = ? AND wo_index = ?",
+                [(serial_prefix(r["template"], dict(r), r["lot"]), r["job_id"], r["wo_index"]) for r in rows],
+            )
+            conn.commit()
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jserial_prefix ON job_serials(value_prefix)")
+
+    # ---------- Write ----------
+    def record_job(self, lot_number: str, color: str, work_orders: List[WorkOrder],
+                   sheets: List[Sheet], output_path: str,
+                   timings: Optional[Dict[str, float]] = None, kind: str = "full",
+                   stock: Optional[str] = None, barcode_profile: Optional[str] = None) -> int:
+        """
+        Store one generated document. Returns the job id.
+        kind: "full" (whole lot) or "delta" (only changed labels; the stored
+        WOs/sheets are still the complete new nest).
+        stock: label stock profile the labels were laid out on (None = default).
+        barcode_profile: core.barcode_profiles name the barcodes were sized with.
+        """
+        wos = [{k: v for k, v in wo.items() if k not in _TRANSIENT_KEYS} for wo in work_orders]
+        sheets_data = [
+            {"sheet_number": int(sh["sheet_number"]),
+             "allocations": [[int(i), int(q)] for (i, q) in sh["allocations"]]}
+            for sh in sheets
+        ]
+
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (lot, color, kind, stock, barcode_profile, output_path, content_hash, created_at,"
+                " timings_json, work_orders_json, sheets_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(lot_number), str(color).upper(), kind, stock, barcode_profile, output_path,
+                    file_hash(output_path),
+                    time.time(), json.dumps(timings or {}), json.dumps(wos), json.dumps(sheets_data),
+                ),
+            )
+            job_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO job_work_orders (job_id, wo_index, work_order, part, code, tag_desc, total_qty)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (job_id, i, str(wo.get("work_order", "")).strip(), str(wo.get("part", "")).strip(),
+                     str(wo.get("code", "")).strip(), str(wo.get("tag_desc", "")).strip(),
+                     int(wo.get("total_qty", 0)))
+                    for i, wo in enumerate(wos)
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO job_allocations (job_id, sheet_number, wo_index, qty) VALUES (?, ?, ?, ?)",
+                [
+                    (job_id, sh["sheet_number"], i, q)
+                    for sh in sheets_data
+                    for (i, q) in sh["allocations"]
+                    if q > 0
+                ],
+            )
+            pieces = piece_counts(wos, sheets_data)
+            conn.executemany(
+                "INSERT INTO job_serials (job_id, wo_index, counter, template, serial_first, serial_last,"
+                " value_prefix) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (job_id, i, wo["serial_counter"], wo["serial_template"],
+                     int(wo["serial_first"]), int(wo["serial_first"]) + pieces[i] - 1,
+                     serial_prefix(wo["serial_template"], wo, lot_number))
+                    for i, wo in enumerate(wos)
+                    if is_serialized(wo) and pieces[i] > 0
+                ],
+            )
+        return job_id
+
+    def reserve_serials(self, counter: str, count: int) -> int:
+        """
+        Reserve `count` consecutive numbers of a serial counter; returns the
+        first. The update takes the database write lock, so concurrent
+        reservations (other processes) get disjoint blocks.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO serial_counters (name, next_serial) VALUES (?, 1)", (counter,))
+            conn.execute("UPDATE serial_counters SET next_serial = next_serial + ? WHERE name = ?",
+                         (int(count), counter))
+            (next_serial,) = conn.execute("SELECT next_serial FROM serial_counters WHERE name = ?",
+                                          (counter,)).fetchone()
+        return next_serial - int(count)
+
+    # ---------- Read ----------
+    def _jobs_where(self, join: str, where: str, params: tuple) -> List[dict]:
+        sql = (
+            "SELECT DISTINCT jobs.id, jobs.lot, jobs.color, jobs.kind, jobs.output_path, jobs.content_hash,"
+            " jobs.created_at FROM jobs " + join + " WHERE " + where +
+            " ORDER BY jobs.created_at DESC, jobs.id DESC"
+        )
+        with closing(self._connect()) as conn:
+            return [dict(r) for r in conn.execute(sql, params)]
+
+    def find_by_lot(self, lot_number: str) -> List[dict]:
+        return self._jobs_where("", "jobs.lot = ?", (str(lot_number).strip(),))
+
+    def find_by_work_order(self, work_order: str) -> List[dict]:
+        return self._jobs_where(
+            "JOIN job_work_orders w ON w.job_id = jobs.id", "w.work_order = ?", (str(work_order).strip(),)
+        )
+
+    def find_by_part(self, part: str) -> List[dict]:
+        return self._jobs_where(
+            "JOIN job_work_orders w ON w.job_id = jobs.id", "w.part = ?", (str(part).strip(),)
+        )
+
+    def find_by_code(self, code: str) -> List[dict]:
+        return self._jobs_where(
+            "JOIN job_work_orders w ON w.job_id = jobs.id", "w.code = ?", (str(code).strip(),)
+        )
+
+    def find_by_output_path(self, path: str) -> List[dict]:
+        """Jobs that wrote this file (as given, or with / separators), newest first."""
+        return self._jobs_where("", "jobs.output_path IN (?, ?)", (path, path.replace(os.sep, "/")))
+
+    def find_by_serial(self, value: str) -> List[dict]:
+        """
+        Jobs that printed a serialized barcode value, newest first. Each job
+        dict also gets "wo_index", "seq" (piece of the WO) and "serial".
+        Candidates are found through indexes: ranges holding a number of the
+        value as counter value ({serial} templates), or WOs whose serials
+        start with a prefix of the value ({seq} templates); a match is
+        confirmed by formatting the template.
+        """
+        numbers = sorted({int(n) for n in re.findall(r"\d+", value)})
+        if not numbers:
+            return []
+        prefixes = [value[:k] for k in range(len(value) + 1)]
+        where = " OR ".join(["(s.serial_first <= ? AND s.serial_last >= ?)"] * len(numbers))
+        where += f" OR s.value_prefix IN ({', '.join('?' * len(prefixes))})"
+        params = [n for n in numbers for _ in range(2)] + prefixes
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT j.id, j.lot, j.color, j.kind, j.stock, j.output_path, j.created_at, s.wo_index,"
+                " s.template, s.serial_first, s.serial_last, w.code, w.part, w.work_order"
+                " FROM job_serials s JOIN jobs j ON j.id = s.job_id"
+                " JOIN job_work_orders w ON w.job_id = s.job_id AND w.wo_index = s.wo_index"
+                f" WHERE {where}"
+                " ORDER BY j.created_at DESC, j.id DESC",
+                params,
+            ).fetchall()
+
+        out: List[dict] = []
+        for row in rows:
+            first, total = row["serial_first"], row["serial_last"] - row["serial_first"] + 1
+            wo = {"code": row["code"], "part": row["part"], "work_order": row["work_order"]}
+            seqs = {n - first + 1 for n in numbers if first <= n <= row["serial_last"]}
+            seqs |= {n for n in numbers if 1 <= n <= total}
+            for seq in sorted(seqs):
+                if format_serial(row["template"], wo, row["lot"], seq, total, first + seq - 1) == value:
+                    job = {k: row[k] for k in ("id", "lot", "color", "kind", "stock", "output_path",
+                                               "created_at", "wo_index")}
+                    out.append(dict(job, seq=seq, serial=first + seq - 1))
+                    break
+        return out
+
+    def latest_for_lot(self, lot_number: str) -> Optional[dict]:
+        """Most recent full job data for a lot (what is currently printed), or None."""
+        jobs = self.find_by_lot(lot_number)
+        return self.load_job(jobs[0]["id"]) if jobs else None
+
+    def load_job(self, job_id: int) -> Optional[dict]:
+        """
+        Full job, ready to regenerate:
+        {"id", "lot", "color", "kind", "stock", "barcode_profile", "output_path", "content_hash",
+         "created_at", "timings", "work_orders", "sheets"}  (allocations as (wo_index, qty) tuples)
+        Jobs stored before barcode profiles were printed with the built-in default.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (int(job_id),)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["barcode_profile"] = job["barcode_profile"] or DEFAULT_PROFILE
+        job["timings"] = json.loads(job.pop("timings_json"))
+        job["work_orders"] = json.loads(job.pop("work_orders_json"))
+        job["sheets"] = [
+            {"sheet_number": sh["sheet_number"], "allocations": [(i, q) for (i, q) in sh["allocations"]]}
+            for sh in json.loads(job.pop("sheets_json"))
+        ]
+        for wo in job["work_orders"]:
+            wo["remaining"] = wo["total_qty"]
+        return job
+
+
+def describe_job(job: dict) -> str:
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(job["created_at"]))
+    kind = "" if job.get("kind", "full") == "full" else f" ({job['kind']})"
+    return f"#{job['id']}  LOT {job['lot']}  {job['color']}{kind}  {when}  {job['output_path']}"
+
+
+def reprint_job(job_id: int, store: Optional[JobStore] = None) -> str:
+    """Regenerate a stored job (same lot, WOs, sheets, color, label stock and barcode profile). Returns the path."""
+    from .docx_adapter import generate_doc_with_gui_color
+
+    job = (store or JobStore()).load_job(job_id)
+    if job is None:
+        raise KeyError(f"Job #{job_id} not found.")
+    return generate_doc_with_gui_color(
+        lot_number=job["lot"],
+        work_orders=job["work_orders"],
+        sheets=job["sheets"],
+        color=job["color"],
+        stock=job["stock"],
+        barcode_profile=job["barcode_profile"],
+    )
+
+
+def main(argv: List[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    finders = {"lot": "find_by_lot", "wo": "find_by_work_order", "part": "find_by_part", "code": "find_by_code",
+               "serial": "find_by_serial"}
+    if len(argv) != 2 or argv[0] not in list(finders) + ["reprint"]:
+        print(f"Usage: python -m core.job_store ({'|'.join(finders)}|reprint) <value>")
+        return 2
+
+    store = JobStore()
+    if argv[0] == "reprint":
+        try:
+            print(reprint_job(int(argv[1]), store))
+        except (KeyError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        return 0
+
+    jobs = getattr(store, finders[argv[0]])(argv[1])
+    if not jobs:
+        print("No jobs found.")
+        return 1
+    for job in jobs:
+        print(describe_job(job))
+        if "seq" in job:
+            print(f"    WO index {job['wo_index']}, piece {job['seq']} (serial #{job['serial']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
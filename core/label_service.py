@@ -0,0 +1,411 @@
+"""
+Local HTTP label-generation service (asyncio, stdlib only).
+
+    python -m core.label_service [--host 127.0.0.1] [--port 8765] [--workers 2] [--barcode-profile NAME]
+    python -m core.label_service --self-check
+
+Endpoints (JSON unless noted):
+    POST /jobs               body = job (watch-folder job file format)
+                             -> 202 {"id", "status", "coalesced"}
+    GET  /jobs/<id>          -> {"id", "status", "lot", "color", "output_path", "error", ...}
+    GET  /jobs/<id>/result   -> the DOCX (application/vnd...document), 409 until done
+    GET  /health             -> {"ok": true, "jobs": n}
+
+Rendering runs in a process pool (workers warm the docx/barcode stack once),
+so the event loop only parses requests and moves bytes. Identical requests
+submitted while the first one is still queued/running are coalesced onto
+the same job id.
+
+LocalClient talks to a LabelService in-process (no socket), for scripts;
+HttpClient has the same interface over a real connection. The self-check
+serves on an ephemeral 127.0.0.1 port and goes through HttpClient, writing
+into a temporary folder (no job store or metrics records).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .watch_folder import JobFileError, generate_job, parse_job, warm_up_worker
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+MAX_BODY = 2 * 1024 * 1024
+MAX_FINISHED_JOBS = 1000
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# (status code, headers, body)
+Response = Tuple[int, Dict[str, str], bytes]
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 410: "Gone", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _json_response(status: int, payload: dict) -> Response:
+    return status, {"Content-Type": "application/json"}, json.dumps(payload).encode("utf-8")
+
+
+def _request_key(job: dict) -> str:
+    raw = json.dumps(job, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class LabelService:
+    def __init__(self, workers: int = DEFAULT_WORKERS, output_dir: str = "output", record: bool = True,
+                 barcode_profile: Optional[str] = None):
+        """
+        record=False: no job store / metrics records;
+        barcode_profile: for jobs that do not name one.
+        """
+        from .barcode_profiles import get_profile
+
+        self.workers = max(1, int(workers))
+        self.output_dir = output_dir
+        self.record = record
+        self.barcode_profile = get_profile(barcode_profile).name
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, dict] = {}      # id -> job record (insertion order = age)
+        self._pending: Dict[str, str] = {}    # request key -> id of queued/running job
+
+    # ----- lifecycle -----
+    def start(self) -> None:
+        if self._executor is None:
+            # spawn, not fork: the event loop process already runs threads (resolver, file reads)
+            # whose locks a forked worker could inherit held
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                                 initializer=warm_up_worker)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    # ----- jobs -----
+    def submit(self, data) -> Tuple[dict, bool]:
+        """Validate and queue a job; returns (job record, coalesced). Raises JobFileError."""
+        job = parse_job(data, self.barcode_profile)
+        key = _request_key(job)
+
+        existing = self._pending.get(key)
+        if existing is not None:
+            return self._jobs[existing], True
+
+        record = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "queued",
+            "lot": job["lot"],
+            "color": job["color"],
+            "submitted_at": datetime.now().isoformat(timespec="seconds"),
+            "output_path": None,
+            "error": None,
+        }
+        self._jobs[record["id"]] = record
+        self._pending[key] = record["id"]
+        self._forget_old_jobs()
+        asyncio.get_running_loop().create_task(self._run(record, job, key))
+        return record, False
+
+    async def _run(self, record: dict, job: dict, key: str) -> None:
+        self.start()
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        record["status"] = "running"
+        try:
+            result = await loop.run_in_executor(self._executor, generate_job, job, self.output_dir, self.record)
+            # Same LOT + COLOR overwrite the same file: remember what we produced
+            record.update(status="done", output_path=result["output_path"],
+                          sha256=await loop.run_in_executor(None, _file_sha256, result["output_path"]))
+        except Exception as e:  # reported to the client, the service keeps running
+            record.update(status="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            self._pending.pop(key, None)
+
+    def _forget_old_jobs(self) -> None:
+        finished = [jid for jid, r in self._jobs.items() if r["status"] in ("done", "failed")]
+        for jid in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[jid]
+
+    def status(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    # ----- routing (shared by the HTTP server and LocalClient) -----
+    async def handle(self, method: str, path: str, body: bytes = b"") -> Response:
+        parts = [p for p in path.split("?", 1)[0].split("/") if p]
+
+        if parts == ["health"] and method == "GET":
+            return _json_response(200, {"ok": True, "jobs": len(self._jobs)})
+
+        if parts == ["jobs"]:
+            if method != "POST":
+                return _json_response(405, {"error": "Use POST /jobs"})
+            try:
+                data = json.loads(body.decode("utf-8") or "null")
+                record, coalesced = self.submit(data)
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                return _json_response(400, {"error": f"Invalid JSON: {e}"})
+            except JobFileError as e:
+                return _json_response(400, {"error": str(e)})
+            return _json_response(202, {"id": record["id"], "status": record["status"], "coalesced": coalesced})
+
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            if method != "GET":
+                return _json_response(405, {"error": "Use GET"})
+            record = self.status(parts[1])
+            if record is None:
+                return _json_response(404, {"error": f"Unknown job {parts[1]}"})
+            if len(parts) == 2:
+                return _json_response(200, record)
+            if parts[2] != "result":
+                return _json_response(404, {"error": f"Unknown resource {parts[2]}"})
+            return await self._result(record)
+
+        return _json_response(404, {"error": f"Not found: {path}"})
+
+    async def _result(self, record: dict) -> Response:
+        if record["status"] != "done":
+            return _json_response(409, {"error": f"Job is {record['status']}", "job": record})
+
+        def _read() -> Optional[bytes]:
+            try:
+                with open(record["output_path"], "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            return data if hashlib.sha256(data).hexdigest() == record["sha256"] else None
+
+        data = await asyncio.get_running_loop().run_in_executor(None, _read)
+        if data is None:
+            return _json_response(410, {"error": "Result file was replaced or removed (same LOT + COLOR "
+                                                 "generated again); submit the job again."})
+        name = os.path.basename(record["output_path"])
+        return 200, {"Content-Type": DOCX_TYPE,
+                     "Content-Disposition": f'attachment; filename="{name}"'}, data
+
+    # ----- HTTP/1.1 (one request per connection) -----
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            response = await self._read_request(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            response = _json_response(400, {"error": "Malformed request"})
+        except Exception as e:
+            response = _json_response(500, {"error": f"{type(e).__name__}: {e}"})
+
+        status, headers, body = response
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Response:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, path, _ = request_line.split(" ", 2)
+
+        length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        if length > MAX_BODY:
+            return _json_response(413, {"error": f"Body larger than {MAX_BODY} bytes"})
+
+        body = await reader.readexactly(length) if length else b""
+        return await self.handle(method.upper(), path, body)
+
+    async def start_server(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Listening server (port 0: ephemeral, see server.sockets[0].getsockname())."""
+        self.start()
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        server = await self.start_server(host, port)
+        print(f"✅ Label service on http://{host}:{port} ({self.workers} worker(s))")
+        async with server:
+            await server.serve_forever()
+
+
+class LocalClient:
+    """In-process client: same routing as HTTP, no socket."""
+
+    def __init__(self, service: LabelService):
+        self.service = service
+
+    async def _send(self, method: str, path: str, body: bytes) -> Response:
+        return await self.service.handle(method, path, body)
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, object]:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        status, headers, data = await self._send(method, path, body)
+        if headers.get("Content-Type") == "application/json":
+            return status, json.loads(data)
+        return status, data
+
+    async def submit(self, job: dict) -> dict:
+        return (await self.request("POST", "/jobs", job))[1]
+
+    async def wait(self, job_id: str, timeout: float = 60.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            _, record = await self.request("GET", f"/jobs/{job_id}")
+            if record.get("status") in ("done", "failed") or time.monotonic() > deadline:
+                return record
+            await asyncio.sleep(0.05)
+
+    async def download(self, job_id: str) -> Tuple[int, object]:
+        return await self.request("GET", f"/jobs/{job_id}/result")
+
+
+class HttpClient(LocalClient):
+    """Same interface as LocalClient, over HTTP/1.1 (one connection per request)."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.host = host
+        self.port = port
+
+    async def _send(self, method: str, path: str, body: bytes) -> Response:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                    f"Content-Length: {len(body)}", "Connection: close"]
+            if body:
+                head.append("Content-Type: application/json")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+
+        head, _, data = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip()] = value.strip()
+        return status, headers, data
+
+
+# ---------- Self-check ----------
+def _sample_job(lot: str, qty: int = 8) -> dict:
+    return {
+        "lot": lot, "color": "WHITE",
+        "work_orders": [{"part": "EC-100", "tag_desc": "BRACKET", "code": "PLNM-100",
+                         "work_order": "12345", "total_qty": qty}],
+        "sheets": [{"sheet_number": 1, "allocations": [[0, qty]]}],
+    }
+
+
+async def _self_check(workers: int) -> int:
+    # Throwaway output folder, no records: the check never touches production data
+    tmp = tempfile.mkdtemp(prefix="label-service-")
+    service = LabelService(workers, output_dir=tmp, record=False)
+    server = await service.start_server(DEFAULT_HOST, 0)
+    client = HttpClient(DEFAULT_HOST, server.sockets[0].getsockname()[1])
+    failures: List[str] = []
+
+    def check(ok: bool, what: str) -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {what}")
+        if not ok:
+            failures.append(what)
+
+    try:
+        status, body = await client.request("POST", "/jobs", {"lot": "X"})
+        check(status == 400, f"invalid job rejected ({status})")
+
+        # Two identical concurrent submissions -> one job
+        a, b = await asyncio.gather(client.submit(_sample_job("SELFCHECK-1")),
+                                    client.submit(_sample_job("SELFCHECK-1")))
+        check(a["id"] == b["id"] and b["coalesced"], "identical concurrent requests coalesced")
+
+        c = await client.submit(_sample_job("SELFCHECK-2", qty=3))
+        check(c["id"] != a["id"], "different request gets its own job")
+
+        # Event loop keeps answering while jobs render
+        t0 = time.perf_counter()
+        status, _ = await client.request("GET", "/health")
+        check(status == 200 and time.perf_counter() - t0 < 0.05, "loop responsive during rendering")
+
+        status, early = await client.download(c["id"])
+        check(status in (200, 409), f"download before done -> {status}")
+
+        for job in (a, c):
+            record = await client.wait(job["id"])
+            check(record["status"] == "done", f"job {job['id']} {record['status']} "
+                                              f"({record.get('duration_ms')} ms) {record.get('error') or ''}")
+            status, data = await client.download(job["id"])
+            check(status == 200 and isinstance(data, bytes) and data[:2] == b"PK",
+                  f"download {job['id']} -> {status}")
+
+        status, _ = await client.request("GET", "/jobs/nope")
+        check(status == 404, "unknown job -> 404")
+
+        status, body = await client.request("PUT", "/jobs")
+        check(status == 405, f"wrong method -> {status}")
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print("\n" + ("✅ self-check passed" if not failures else f"❌ {len(failures)} check(s) failed"))
+    return 1 if failures else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Local HTTP label-generation service.")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--self-check", action="store_true",
+                    help="Run the client checks against a throwaway service on an ephemeral port and exit")
+    ap.add_argument("--barcode-profile", default=None,
+                    help="Barcode profile for jobs that do not name one (core.barcode_profiles)")
+    args = ap.parse_args(argv)
+
+    if args.self_check:
+        return asyncio.run(_self_check(args.workers))
+
+    try:
+        service = LabelService(args.workers, barcode_profile=args.barcode_profile)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
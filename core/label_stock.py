@@ -0,0 +1,302 @@
+"""
+Label stock profiles: page size, label grid, gaps, margins, barcode width
+and font scale of the stock the labels are printed on.
+
+A profile is plain data (built-ins below, more in config/label_stocks.json):
+    {
+      "avery-5163": {
+        "description": "4 x 2 in labels, 10 per Letter sheet",
+        "page_in": [8.5, 11], "rows": 5, "cols": 2,
+        "margins_in": {"top": 0.5, "bottom": 0.5, "left": 0.156, "right": 0.156},
+        "gap_in": [0.1875, 0],          # between columns, between rows
+        "barcode_w_in": 1.2, "font_scale": 0.7, "footer": false,
+        "row_height": "exact"
+      }
+    }
+Missing keys fall back to the default stock (letter-3x2, the layout of the
+python-docx default template: Letter, 1" / 1.25" margins, 3 x 2 labels).
+
+"row_height": "exact" fixes every row at the label height (label sheets: the
+grid must not move). "auto" leaves rows at their content height like the
+original documents, so a long TAG + DESCRIPTION grows its row instead of
+being clipped; the table then keeps Word's autofit unless "label_w_in" fixes
+the cell width (docx-core: 2.6 in cells, wider than the margins allow).
+Unlike the other keys these two are not taken from the default stock: a
+profile without them gets exact rows and cells that split the usable width.
+
+get_stock() turns a profile into a LabelStock once and keeps it: slot
+geometry (label boxes, table grid cells with gap rows/columns) and per-page
+capacity are computed when the stock is loaded, not per label.
+
+    python -m core.label_stock list
+    python -m core.label_stock plan <job id>     pages / labels per stock
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+Profile = Dict[str, object]
+
+STOCKS_PATH = os.path.join("config", "label_stocks.json")
+
+DEFAULT_STOCK = "letter-3x2"
+COVER_WO_SLOTS = 4          # cover page: LOT label + up to 4 WOs
+BREAK_ALLOWANCE_IN = 0.05   # room left under the grid for the 1 pt page-break paragraph
+
+BUILTIN_STOCKS: Dict[str, Profile] = {
+    "letter-3x2": {
+        "description": "Letter, 3 x 2 labels of 3 x 3 in (default document layout)",
+        "page_in": [8.5, 11.0], "rows": 3, "cols": 2,
+        "margins_in": {"top": 1.0, "bottom": 1.0, "left": 1.25, "right": 1.25},
+        "gap_in": [0.0, 0.0],
+        "barcode_w_in": 1.35, "font_scale": 1.0, "footer": True,
+        "row_height": "auto",
+    },
+    "letter-4x2": {
+        "description": "Letter, 4 x 2 labels of 3.625 x 2.5 in",
+        "page_in": [8.5, 11.0], "rows": 4, "cols": 2,
+        "margins_in": {"top": 0.5, "bottom": 0.5, "left": 0.5, "right": 0.5},
+        "gap_in": [0.25, 0.0],
+        "barcode_w_in": 1.35, "font_scale": 0.85, "footer": False,
+        "row_height": "exact",
+    },
+    "letter-5x2": {
+        "description": "Letter, 5 x 2 labels of 4 x 2 in (5163-type sheets)",
+        "page_in": [8.5, 11.0], "rows": 5, "cols": 2,
+        "margins_in": {"top": 0.5, "bottom": 0.5, "left": 0.15625, "right": 0.15625},
+        "gap_in": [0.1875, 0.0],
+        "barcode_w_in": 1.2, "font_scale": 0.7, "footer": False,
+        "row_height": "exact",
+    },
+    "letter-2x3": {
+        "description": "Letter, 2 x 3 labels of 2.6 x 4.5 in (core/docx_generator layout)",
+        "page_in": [8.5, 11.0], "rows": 2, "cols": 3,
+        "margins_in": {"top": 1.0, "bottom": 1.0, "left": 1.25, "right": 1.25},
+        "gap_in": [0.0, 0.0],
+        "barcode_w_in": 2.2, "font_scale": 1.0, "footer": False,
+        "row_height": "auto", "label_w_in": 2.6,
+    },
+}
+
+
+class LabelStockError(ValueError):
+    """Profile is incomplete or its labels do not fit on the page."""
+
+
+class LabelStock:
+    """
+    One stock profile with its geometry precomputed (inches).
+
+    slots[i]      -> (grid row, grid col) of label i in the page table
+    slot_boxes[i] -> (x, y, w, h) of label i on the page
+    Labels fill row by row; gaps are extra table rows/columns between them.
+    """
+
+    def __init__(self, name: str, profile: Profile):
+        base = BUILTIN_STOCKS[DEFAULT_STOCK]
+        p = dict(base, **profile)
+        margins = dict(base["margins_in"], **(profile.get("margins_in") or {}))
+        try:
+            self.name = name
+            self.description = str(p.get("description", ""))
+            self.page_w_in, self.page_h_in = (float(v) for v in p["page_in"])
+            self.rows, self.cols = int(p["rows"]), int(p["cols"])
+            self.margins_in = {k: float(margins[k]) for k in ("top", "bottom", "left", "right")}
+            self.col_gap_in, self.row_gap_in = (float(v) for v in p["gap_in"])
+            self.barcode_w_in = float(p["barcode_w_in"])
+            self.font_scale = float(p["font_scale"])
+            self.footer = bool(p["footer"])
+            # Not inherited from the default stock: a stock without them is a label sheet
+            self.exact_rows = {"exact": True, "auto": False}[profile.get("row_height", "exact")]
+            fixed_w = None if profile.get("label_w_in") is None else float(profile["label_w_in"])
+            self.fixed_width = fixed_w is not None
+        except (KeyError, TypeError, ValueError) as e:
+            raise LabelStockError(f"Label stock '{name}': invalid profile ({e}).")
+
+        m = self.margins_in
+        usable_w = self.page_w_in - m["left"] - m["right"] - (self.cols - 1) * self.col_gap_in
+        usable_h = self.page_h_in - m["top"] - m["bottom"] - (self.rows - 1) * self.row_gap_in
+        if self.rows < 1 or self.cols < 1 or self.rows * self.cols < 2:
+            raise LabelStockError(f"Label stock '{name}': needs at least 2 labels per page.")
+        if usable_w <= 0 or usable_h <= 0:
+            raise LabelStockError(f"Label stock '{name}': labels do not fit on the page.")
+
+        self.label_w_in = fixed_w or usable_w / self.cols
+        self.label_h_in = usable_h / self.rows
+        if fixed_w is not None and (fixed_w <= 0 or fixed_w * self.cols + (self.cols - 1) * self.col_gap_in
+                                    > self.page_w_in):
+            raise LabelStockError(f"Label stock '{name}': labels do not fit on the page.")
+        if self.barcode_w_in > self.label_w_in:
+            raise LabelStockError(f"Label stock '{name}': barcode is wider than the label.")
+
+        self.capacity = self.rows * self.cols
+        self.cover_wo_slots = min(COVER_WO_SLOTS, self.capacity - 1)
+
+        # Page table: label cells with a gap column/row between neighbours
+        col_step = 2 if self.col_gap_in > 0 else 1
+        row_step = 2 if self.row_gap_in > 0 else 1
+        self.grid_cols = (self.cols - 1) * col_step + 1
+        self.grid_rows = (self.rows - 1) * row_step + 1
+        self.col_widths_in = [self.label_w_in if c % col_step == 0 else self.col_gap_in
+                              for c in range(self.grid_cols)]
+        self.row_heights_in = [self.label_h_in if r % row_step == 0 else self.row_gap_in
+                               for r in range(self.grid_rows)]
+
+        self.slots: List[Tuple[int, int]] = []
+        self.slot_boxes: List[Tuple[float, float, float, float]] = []
+        for r in range(self.rows):
+            for c in range(self.cols):
+                self.slots.append((r * row_step, c * col_step))
+                self.slot_boxes.append((m["left"] + c * (self.label_w_in + self.col_gap_in),
+                                        m["top"] + r * (self.label_h_in + self.row_gap_in),
+                                        self.label_w_in, self.label_h_in))
+
+    # ---------- Counts ----------
+    @property
+    def label_size_in(self) -> Tuple[float, float]:
+        return self.label_w_in, self.label_h_in
+
+    def page_count(self, flow_length: int) -> int:
+        """Pages of a lot: cover page + flow pages (at least one)."""
+        return 1 + max(1, -(-flow_length // self.capacity))
+
+    def render_signature(self) -> Dict[str, float]:
+        """
+        What changes a rendered label cell (goes into render-cache fragment keys).
+        The cell width is not part of it: core.render_cache keeps the target cell's.
+        """
+        return {"font_scale": self.font_scale, "barcode_w_in": self.barcode_w_in}
+
+    # ---------- DOCX ----------
+    def setup_document(self, doc) -> None:
+        from docx.shared import Inches
+
+        m = self.margins_in
+        for section in doc.sections:
+            section.page_width = Inches(self.page_w_in)
+            section.page_height = Inches(self.page_h_in)
+            section.top_margin = Inches(m["top"])
+            section.left_margin = Inches(m["left"])
+            section.right_margin = Inches(m["right"])
+            # An exact grid fills the page to the bottom margin: leave room for the break paragraph
+            allowance = BREAK_ALLOWANCE_IN if self.exact_rows else 0.0
+            section.bottom_margin = Inches(max(0.0, m["bottom"] - allowance))
+
+    def add_table(self, doc):
+        """One page of label cells (column widths; row heights if the stock fixes them)."""
+        from docx.enum.table import WD_ROW_HEIGHT_RULE
+        from docx.shared import Inches
+
+        table = doc.add_table(rows=self.grid_rows, cols=self.grid_cols)
+        if self.exact_rows or self.fixed_width or self.grid_cols > self.cols:
+            table.autofit = False  # Word must not resize the grid
+        for column, width in zip(table.columns, self.col_widths_in):
+            if not self.fixed_width:  # fixed: cell widths only, grid as python-docx lays it out
+                column.width = Inches(width)
+            for cell in column.cells:
+                cell.width = Inches(width)
+        if self.exact_rows:
+            for row, height in zip(table.rows, self.row_heights_in):
+                row.height = Inches(height)
+                row.height_rule = WD_ROW_HEIGHT_RULE.EXACTLY
+        return table
+
+    def cell(self, table, slot: int):
+        r, c = self.slots[slot]
+        return table.cell(r, c)
+
+    def add_page_break(self, doc) -> None:
+        """
+        Page break in a 1 pt paragraph under an exact grid, so it fits under a
+        full page; a plain page break (like the original documents) otherwise.
+        """
+        from docx.enum.text import WD_BREAK
+        from docx.shared import Pt
+
+        if not self.exact_rows:
+            doc.add_page_break()
+            return
+
+        p = doc.add_paragraph()
+        fmt = p.paragraph_format
+        fmt.space_before = fmt.space_after = Pt(0)
+        fmt.line_spacing = Pt(1)
+        run = p.add_run()
+        run.font.size = Pt(1)
+        run.add_break(WD_BREAK.PAGE)
+
+
+def load_profiles(path: str = STOCKS_PATH) -> Dict[str, Profile]:
+    profiles = dict(BUILTIN_STOCKS)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles.update({str(k).strip(): v for k, v in json.load(f).items()})
+    return profiles
+
+
+_STOCKS: Dict[str, LabelStock] = {}
+
+
+def get_stock(name: Optional[str] = None) -> LabelStock:
+    """Named stock with its geometry computed on first use (then cached)."""
+    name = name or DEFAULT_STOCK
+    stock = _STOCKS.get(name)
+    if stock is None:
+        profiles = load_profiles()
+        if name not in profiles:
+            raise LabelStockError(f"Unknown label stock '{name}' (have: {', '.join(profiles)})")
+        stock = _STOCKS[name] = LabelStock(name, profiles[name])
+    return stock
+
+
+def available_stocks() -> List[str]:
+    return list(load_profiles())
+
+
+def lot_counts(stock: LabelStock, work_orders, sheets) -> Tuple[int, int]:
+    """(pages, labels) of a lot on this stock, before anything is rendered."""
+    flow = sum(1 + sum(int(q) for (_, q) in sh["allocations"] if int(q) > 0) for sh in sheets)
+    labels = 1 + min(stock.cover_wo_slots, len(work_orders)) + flow
+    return stock.page_count(flow), labels
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Label stock profiles.")
+    ap.add_argument("command", choices=["list", "plan"])
+    ap.add_argument("job_id", type=int, nargs="?")
+    args = ap.parse_args(argv)
+
+    try:
+        stocks = [get_stock(name) for name in available_stocks()]
+    except LabelStockError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.command == "list":
+        for s in stocks:
+            print(f"{s.name:14} {s.rows}x{s.cols} = {s.capacity:2}/page  "
+                  f"{s.label_w_in:.3g} x {s.label_h_in:.3g} in  {s.description}")
+        return 0
+
+    from .job_store import JobStore
+
+    if args.job_id is None:
+        print("❌ plan needs a job id.")
+        return 2
+    job = JobStore().load_job(args.job_id)
+    if job is None:
+        print(f"❌ Job #{args.job_id} not found.")
+        return 1
+    print(f"LOT {job['lot']} (job #{job['id']}, printed on {job.get('stock') or DEFAULT_STOCK})\n")
+    for s in sorted(stocks, key=lambda s: lot_counts(s, job["work_orders"], job["sheets"])[0]):
+        pages, labels = lot_counts(s, job["work_orders"], job["sheets"])
+        print(f"{s.name:14} {pages:5} pages  {labels:6} labels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
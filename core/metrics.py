@@ -0,0 +1,295 @@
+"""
+Generation metrics log: one compact record per generated lot.
+
+Every run (console, GUI, watch folder) appends a JSON line to
+output/metrics.jsonl: labels, pages, distinct codes, phase durations,
+peak RSS, output bytes, backend, source and host. The file rotates by size
+(metrics.jsonl.1 ... .N, oldest dropped), so it can stay on for good.
+Rotation takes metrics.jsonl.lock (exclusive create), so two processes
+never shift the same files; whoever finds the lock taken just appends.
+Writing a record never fails a generation; problems are printed as ⚠️.
+
+Record:
+    {"ts", "host", "source", "backend", "lot", "stock", "colors", "labels", "pages",
+     "codes", "sheets", "wos", "render_ms", "save_ms", "total_ms", "labels_per_s",
+     "output_bytes", "compression", "peak_rss_mb", "python"}
+peak_rss_mb is the peak of the process so far (GUI / worker processes
+keep growing it over their lifetime), None where it cannot be read.
+
+    python -m core.metrics report [--by week|day|host|backend|source] [--days 90]
+    python -m core.metrics histogram [--by host] [--days 90]
+    python -m core.metrics tail [-n 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+DEFAULT_LOG_PATH = os.path.join("output", "metrics.jsonl")
+MAX_BYTES = 1 << 20   # rotate when the live file is larger (~4000 records)
+KEEP_FILES = 5        # rotated files kept next to the live one
+ROTATE_LOCK_STALE_S = 60.0  # a rotation lock this old was left by a crashed process
+
+SOURCES = ("console", "gui", "batch", "api")
+
+_source = "api"
+
+
+def set_source(name: str) -> None:
+    """Where runs of this process come from (entry points call this once)."""
+    global _source
+    if name not in SOURCES:
+        raise ValueError(f"Unknown metrics source '{name}' (have: {', '.join(SOURCES)})")
+    _source = name
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB (None if unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 1)  # bytes on macOS, KB else
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1 << 20), 1)
+    return None
+
+
+def distinct_codes(work_orders: List[WorkOrder], sheets: List[Sheet]) -> int:
+    """Distinct barcode values in a lot (every piece of a serialized WO has its own)."""
+    from .serials import is_serialized, piece_counts
+
+    counts = piece_counts(work_orders, sheets)
+    plain = {str(wo.get("code", "")).strip() for wo in work_orders if not is_serialized(wo)}
+    return len(plain - {""}) + sum(n for wo, n in zip(work_orders, counts) if is_serialized(wo))
+
+
+def build_record(*, backend: str, lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet],
+                 labels: int, pages: int, phases: Dict[str, float], results: Sequence[dict],
+                 stock: Optional[str] = None) -> dict:
+    """One metrics record; phases = {"render_ms": ..., "save_ms": ...}, results = docx_save results."""
+    total_ms = sum(phases.values())
+    record = {
+        "ts": round(time.time(), 3),
+        "host": socket.gethostname(),
+        "source": _source,
+        "backend": backend,
+        "lot": str(lot_number),
+        "stock": stock,
+        "colors": len(results),
+        "labels": labels,
+        "pages": pages,
+        "codes": distinct_codes(work_orders, sheets),
+        "sheets": len(sheets),
+        "wos": len(work_orders),
+    }
+    record.update({name: round(ms, 1) for name, ms in phases.items()})
+    record.update({
+        "total_ms": round(total_ms, 1),
+        "labels_per_s": round(labels / (total_ms / 1000), 1) if total_ms > 0 else None,
+        "output_bytes": sum(int(r.get("bytes", 0)) for r in results),
+        "compression": results[0].get("compression") if results else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "python": platform.python_version(),
+    })
+    return record
+
+
+class MetricsLog:
+    """Append-only JSON-lines file with size-based rotation."""
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, max_bytes: int = MAX_BYTES, keep: int = KEEP_FILES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+
+    def files(self) -> List[str]:
+        """Existing log files, oldest first."""
+        rotated = [f"{self.path}.{n}" for n in range(self.keep, 0, -1)]
+        return [p for p in rotated + [self.path] if os.path.exists(p)]
+
+    def _rotate(self) -> None:
+        lock = f"{self.path}.lock"
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            # Another process is rotating; a stale lock is cleared for the next append
+            try:
+                if time.time() - os.path.getmtime(lock) > ROTATE_LOCK_STALE_S:
+                    os.remove(lock)
+            except OSError:
+                pass
+            return
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return  # rotated by another process between the size check and the lock
+            for n in range(self.keep - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{n}"):
+                    os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        finally:
+            os.remove(lock)
+
+    def append(self, record: dict) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            if os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+        except FileNotFoundError:
+            pass  # first record, or another process rotated it just now
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        # One write() of one line in append mode: records of parallel workers do not interleave
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def records(self, since: Optional[float] = None) -> Iterator[dict]:
+        for path in self.files():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn line from a crash
+                    if since is None or record.get("ts", 0) >= since:
+                        yield record
+
+
+def record_run(log: Optional[MetricsLog] = None, **fields) -> Optional[dict]:
+    """Build and append a record (build_record fields); never raises on I/O errors."""
+    try:
+        record = build_record(**fields)
+        (log or MetricsLog()).append(record)
+        return record
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not write generation metrics: {e}")
+        return None
+
+
+# ---------- Report ----------
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0..100) of an ascending sequence."""
+    if not sorted_values:
+        return float("nan")
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def _group_key(record: dict, by: str) -> str:
+    if by in ("week", "day"):
+        dt = datetime.fromtimestamp(record.get("ts", 0))
+        if by == "day":
+            return dt.strftime("%Y-%m-%d")
+        year, week, _ = dt.isocalendar()
+        return f"{year}-W{week:02d}"
+    return str(record.get(by) or "-")
+
+
+def group_throughput(records: Iterator[dict], by: str) -> Dict[str, List[dict]]:
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for record in records:
+        if record.get("labels_per_s"):
+            groups[_group_key(record, by)].append(record)
+    return dict(sorted(groups.items()))
+
+
+def render_report(groups: Dict[str, List[dict]], by: str) -> List[str]:
+    lines = [f"{by:>12} {'runs':>5} {'labels p50':>10} {'lbl/s p10':>10} {'p50':>8} {'p90':>8} "
+             f"{'p50 ms':>8} {'RSS max':>8}"]
+    for key, records in groups.items():
+        rates = sorted(r["labels_per_s"] for r in records)
+        labels = sorted(r.get("labels", 0) for r in records)
+        total = sorted(r.get("total_ms", 0) for r in records)
+        rss = [r["peak_rss_mb"] for r in records if r.get("peak_rss_mb") is not None]
+        lines.append(f"{key:>12} {len(records):5} {percentile(labels, 50):10} "
+                     f"{percentile(rates, 10):10.0f} {percentile(rates, 50):8.0f} {percentile(rates, 90):8.0f} "
+                     f"{percentile(total, 50):8.0f} {(f'{max(rss):.0f} MB' if rss else '-'):>8}")
+    return lines
+
+
+def render_histogram(rates: Sequence[float], width: int = 40) -> List[str]:
+    """Labels/sec histogram on doubling buckets (1-2, 2-4, ... labels/s)."""
+    if not rates:
+        return ["(no runs)"]
+    buckets: Dict[int, int] = defaultdict(int)
+    for rate in rates:
+        buckets[max(0, int(math.log2(rate))) if rate >= 1 else 0] += 1
+    top = max(buckets.values())
+    lines = []
+    for b in range(min(buckets), max(buckets) + 1):
+        n = buckets.get(b, 0)
+        bar = "#" * max(1 if n else 0, round(n / top * width))
+        lines.append(f"{2 ** b:>7}-{2 ** (b + 1):<7} lbl/s {n:6} {bar}")
+    return lines
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Generation metrics log.")
+    ap.add_argument("command", choices=["report", "histogram", "tail"])
+    ap.add_argument("--by", default=None, choices=["week", "day", "host", "backend", "source", "python"])
+    ap.add_argument("--days", type=float, default=90, help="Only runs of the last N days (0 = all)")
+    ap.add_argument("-n", type=int, default=20, help="tail: number of records")
+    ap.add_argument("--log", default=DEFAULT_LOG_PATH)
+    args = ap.parse_args(argv)
+
+    log = MetricsLog(args.log)
+    if not log.files():
+        print(f"❌ No metrics log at {args.log}")
+        return 1
+    since = time.time() - args.days * 86400 if args.days else None
+
+    if args.command == "tail":
+        for record in list(log.records(since))[-args.n:]:
+            when = datetime.fromtimestamp(record.get("ts", 0)).strftime("%Y-%m-%d %H:%M")
+            print(f"{when} {record.get('host', '-'):12} {record.get('backend', '-'):11} LOT {record.get('lot', '-'):10} "
+                  f"{record.get('labels', 0):6} labels {record.get('pages', 0):4} pages "
+                  f"{record.get('total_ms', 0):8.0f} ms {record.get('labels_per_s') or 0:7.0f} lbl/s")
+        return 0
+
+    if args.command == "histogram":
+        groups = group_throughput(log.records(since), args.by) if args.by else \
+            {"all runs": [r for r in log.records(since) if r.get("labels_per_s")]}
+        for key, records in groups.items():
+            print(f"\n{key} ({len(records)} runs)")
+            for line in render_histogram([r["labels_per_s"] for r in records]):
+                print("  " + line)
+        return 0
+
+    by = args.by or "week"
+    for line in render_report(group_throughput(log.records(since), by), by):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Import sheet allocations from CAM nest report exports (CSV or XML).
+
+Each report row says "sheet S holds Q pieces of part P" (optionally with the
+WO # and a sheet repeat count). Rows are matched to the lot's Work Orders
+through an index on WO # and part, accumulated into the usual `sheets`
+structure in one pass, and per-WO totals are checked against total_qty at
+the end of that same pass.
+
+Column / tag names come from a report profile (config/nest_profiles.json):
+    {
+      "format": "csv" | "xml",
+      "fields": {"sheet": "Sheet", "part": "Part", "qty": "Qty",
+                 "work_order": "WO", "repeat": "Sheet Qty"},   # last two optional
+      "delimiter": ",",              # csv
+      "sheet_tag": "Sheet",          # xml: element holding the sheet number
+      "part_tag": "Part"             # xml: element holding part/qty/WO
+    }
+For XML, field names are looked up as attributes first, then child element
+text; part elements inherit "sheet"/"repeat" from their enclosing sheet element.
+
+    python -m core.nest_import report.csv --lot 08811 [--profile NAME]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+Profile = Dict[str, object]
+
+PROFILES_PATH = os.path.join("config", "nest_profiles.json")
+
+DEFAULT_PROFILE_NAME = "csv"
+BUILTIN_PROFILES: Dict[str, Profile] = {
+    "csv": {
+        "format": "csv",
+        "fields": {"sheet": "Sheet", "part": "Part", "qty": "Qty", "work_order": "WO", "repeat": "Sheet Qty"},
+        "delimiter": ",",
+    },
+    "xml": {
+        "format": "xml",
+        "fields": {"sheet": "number", "part": "name", "qty": "qty", "work_order": "wo", "repeat": "repeat"},
+        "sheet_tag": "Sheet",
+        "part_tag": "Part",
+    },
+}
+
+REQUIRED_FIELDS = ("sheet", "part", "qty")
+
+
+class NestImportError(ValueError):
+    """Report cannot be read with the given profile."""
+
+
+def load_profiles(path: str = PROFILES_PATH) -> Dict[str, Profile]:
+    profiles = dict(BUILTIN_PROFILES)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles.update(json.load(f))
+    return profiles
+
+
+# ---------- Readers: yield (line/element no, {field: text}) ----------
+def _iter_csv(path: str, profile: Profile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    fields: Dict[str, str] = profile["fields"]
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=str(profile.get("delimiter") or ","))
+        index: Optional[Dict[str, int]] = None
+        for row in reader:
+            if index is None:
+                header = [h.strip().lower() for h in row]
+                if not any(header):
+                    continue
+                missing = [fields[k] for k in REQUIRED_FIELDS if fields[k].lower() not in header]
+                if missing:
+                    raise NestImportError(f"Line {reader.line_num}: missing column(s): {', '.join(missing)}")
+                index = {k: header.index(v.lower()) for k, v in fields.items() if v.lower() in header}
+                continue
+            yield reader.line_num, {k: (row[i].strip() if i < len(row) else "") for k, i in index.items()}
+        if index is None:
+            raise NestImportError("The report is empty (no header row found).")
+
+
+def _xml_value(el, name: str) -> Optional[str]:
+    if name in el.attrib:
+        return el.attrib[name].strip()
+    child = el.find(name)
+    if child is not None and child.text is not None:
+        return child.text.strip()
+    return None
+
+
+def _iter_xml(path: str, profile: Profile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    import xml.etree.ElementTree as ET
+
+    fields: Dict[str, str] = profile["fields"]
+    sheet_tag = profile.get("sheet_tag", "Sheet")
+    part_tag = profile.get("part_tag", "Part")
+
+    sheet_ctx: Dict[str, str] = {}
+    n = 0
+    try:
+        for event, el in ET.iterparse(path, events=("start", "end")):
+            if el.tag == sheet_tag and event == "start":
+                sheet_ctx = {}
+                for k in ("sheet", "repeat"):
+                    v = el.attrib.get(fields.get(k, ""))
+                    if v is not None:
+                        sheet_ctx[k] = v.strip()
+            elif el.tag == sheet_tag and event == "end":
+                el.clear()  # keep memory flat on big reports
+            elif el.tag == part_tag and event == "end":
+                n += 1
+                values = {k: _xml_value(el, v) for k, v in fields.items()}
+                for k in ("sheet", "repeat"):
+                    if values.get(k) is None and k in sheet_ctx:
+                        values[k] = sheet_ctx[k]
+                yield n, {k: v or "" for k, v in values.items()}
+    except ET.ParseError as e:
+        raise NestImportError(f"Invalid XML: {e}")
+
+
+def iter_report_rows(path: str, profile: Profile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    if profile.get("format") == "xml":
+        return _iter_xml(path, profile)
+    return _iter_csv(path, profile)
+
+
+# ---------- Matching ----------
+def _build_index(work_orders: List[WorkOrder]) -> Tuple[Dict[str, int], Dict[str, List[int]]]:
+    by_wo: Dict[str, int] = {}
+    by_part: Dict[str, List[int]] = {}
+    for i, wo in enumerate(work_orders):
+        by_wo[str(wo.get("work_order", "")).strip().upper()] = i
+        by_part.setdefault(str(wo.get("part", "")).strip().upper(), []).append(i)
+    return by_wo, by_part
+
+
+def import_nest_report(path: str, profile: Profile,
+                       work_orders: List[WorkOrder]) -> Tuple[List[Sheet], List[str]]:
+    """
+    Returns (sheets, errors). Sheets are numbered 1..N in CAM sheet order
+    (repeat counts expanded); errors include unmatched rows and per-WO
+    total mismatches against total_qty.
+    """
+    by_wo, by_part = _build_index(work_orders)
+    n_wo = len(work_orders)
+    expected = [int(wo.get("total_qty", 0)) for wo in work_orders]
+    totals = [0] * n_wo
+
+    # CAM sheet id -> (first-seen order, repeat, per-WO qty)
+    sheets_acc: Dict[str, Tuple[int, int, List[int]]] = {}
+    errors: List[str] = []
+    by_part_only: List[Tuple[Tuple[int, int, List[int]], List[int], int]] = []
+
+    for line_no, row in iter_report_rows(path, profile):
+        if not any(row.values()):
+            continue
+        sheet_id = row.get("sheet", "")
+        part = row.get("part", "").upper()
+        wo_num = row.get("work_order", "").upper()
+        try:
+            qty = int(float(row.get("qty", "") or "0"))
+            repeat = int(float(row.get("repeat", "") or "1"))
+            if qty < 0 or repeat < 1:
+                raise ValueError
+        except ValueError:
+            errors.append(f"Line {line_no}: invalid quantity (qty={row.get('qty')!r}, repeat={row.get('repeat')!r}).")
+            continue
+        if not sheet_id:
+            errors.append(f"Line {line_no}: sheet number is missing.")
+            continue
+
+        acc = sheets_acc.get(sheet_id)
+        if acc is None:
+            acc = (len(sheets_acc), repeat, [0] * n_wo)
+            sheets_acc[sheet_id] = acc
+        per_wo = acc[2]
+
+        # WO # wins when present; part-only rows are allocated after the pass,
+        # so explicit WO rows claim their quantities first
+        if wo_num:
+            i = by_wo.get(wo_num)
+            if i is None:
+                errors.append(f"Line {line_no}: WO {wo_num} is not in this lot.")
+                continue
+            per_wo[i] += qty
+            totals[i] += qty * acc[1]
+        else:
+            targets = by_part.get(part)
+            if not targets:
+                errors.append(f"Line {line_no}: PART {row.get('part')} does not match any Work Order.")
+                continue
+            if len(targets) == 1:
+                per_wo[targets[0]] += qty
+                totals[targets[0]] += qty * acc[1]
+            else:
+                by_part_only.append((acc, targets, qty))
+
+    # Same part on several WOs: fill them in list order up to their total_qty,
+    # the last one takes whatever is left (so overflow shows up as a mismatch)
+    for (_, repeat, per_wo), targets, qty in by_part_only:
+        left = qty
+        for n, i in enumerate(targets):
+            take = left if n == len(targets) - 1 else min(left, max(0, expected[i] - totals[i]) // repeat)
+            per_wo[i] += take
+            totals[i] += take * repeat
+            left -= take
+            if left <= 0:
+                break
+
+    # Per-WO total check (same accumulators, no second pass over the report)
+    for i, wo in enumerate(work_orders):
+        if totals[i] != expected[i]:
+            errors.append(
+                f"WO {wo.get('work_order')} | PART {wo.get('part')}: "
+                f"report total = {totals[i]} / expected = {expected[i]}"
+            )
+
+    def _sort_key(item):
+        sheet_id, (order, _, _) = item
+        return (0, int(sheet_id), order) if sheet_id.isdigit() else (1, 0, order)
+
+    sheets: List[Sheet] = []
+    for _, (_, repeat, per_wo) in sorted(sheets_acc.items(), key=_sort_key):
+        for _ in range(repeat):
+            sheets.append({
+                "sheet_number": len(sheets) + 1,
+                "allocations": [(i, per_wo[i]) for i in range(n_wo)],
+            })
+    return sheets, errors
+
+
+def main(argv: List[str] | None = None) -> int:
+    from .flow_logic import render_summary_text
+    from .job_store import JobStore
+
+    ap = argparse.ArgumentParser(description="Check a CAM nest report against a stored lot.")
+    ap.add_argument("path")
+    ap.add_argument("--lot", required=True, help="Lot whose last stored WOs are used for matching")
+    ap.add_argument("--profile", default=None, help="Report profile (default: by file extension)")
+    args = ap.parse_args(argv)
+
+    profiles = load_profiles()
+    name = args.profile or ("xml" if args.path.lower().endswith(".xml") else DEFAULT_PROFILE_NAME)
+    if name not in profiles:
+        print(f"❌ Unknown profile '{name}' (have: {', '.join(profiles)})")
+        return 2
+
+    job = JobStore().latest_for_lot(args.lot)
+    if job is None:
+        print(f"❌ LOT {args.lot} has no stored Work Orders.")
+        return 1
+
+    try:
+        sheets, errors = import_nest_report(args.path, profiles[name], job["work_orders"])
+    except (NestImportError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(render_summary_text(job["work_orders"], sheets))
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Preflight: validate a lot before anything is rendered.
+
+One pass over the WOs and sheet allocations catches what would otherwise
+fail (or print wrong) deep inside generation:
+  - WO fields: Part #, WO #, TOTAL QTY, text that cannot be stored in a
+    DOCX (control characters)
+  - barcode values: not empty, Code128 charset and length (core.code128)
+  - sheets: numbers, WO indexes and quantities; per-WO totals vs total_qty
+  - label stock and output: LOT # usable in a file name, output folder
+    writable, target files not open in another program
+Every problem is collected; nothing stops at the first one.
+
+    python -m core.preflight <job id | job file.json> [--output-dir output]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from .code128 import MAX_LENGTH, is_encodable
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+TEXT_FIELDS = (("part", "Part #"), ("tag_desc", "TAG + DESCRIPTION"), ("work_order", "WO #"))
+REQUIRED_FIELDS = ("part", "work_order")
+MAX_PATH = 259  # Windows MAX_PATH without the terminating NUL
+
+
+class PreflightError(ValueError):
+    """The lot has problems that would make generation fail; .problems lists all of them."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__(format_problems(problems))
+        self.problems = problems
+
+
+def _bad_text_chars(text: str) -> str:
+    # XML 1.0 (DOCX) allows tab, LF and CR as the only characters below space
+    return "".join(sorted({ch for ch in text if ord(ch) < 32 and ch not in "\t\n\r"}))
+
+
+def code_problem(code: str) -> Optional[str]:
+    """Why a barcode value cannot be printed as Code128, or None if it can."""
+    if not code:
+        return "Barcode code is required."
+    if not is_encodable(code):
+        bad = "".join(sorted({ch for ch in code if ord(ch) >= 128}))
+        return f"Barcode code has characters not allowed in Code128: {bad!r}"
+    if len(code) > MAX_LENGTH:
+        return f"Barcode code is {len(code)} characters long (max {MAX_LENGTH})."
+    return None
+
+
+def output_problems(lot_number: str, colors: Iterable[str], output_dir: str = "output") -> List[str]:
+    """Output folder / file problems only (checked once the colors are known)."""
+    from main import sanitize_filename
+
+    problems: List[str] = []
+    if not sanitize_filename(lot_number):
+        problems.append(f"LOT # {lot_number!r} has no characters allowed in a file name.")
+
+    if os.path.exists(output_dir) and not os.path.isdir(output_dir):
+        return problems + [f"Output folder {output_dir!r} is a file."]
+    existing = os.path.abspath(output_dir)
+    while not os.path.exists(existing):
+        existing = os.path.dirname(existing)
+    if not os.access(existing, os.W_OK):
+        return problems + [f"Output folder {existing!r} is not writable."]
+
+    for color in colors:
+        path = os.path.join(output_dir, sanitize_filename(f"LOT {lot_number} {color}") + ".docx")
+        if os.name == "nt" and len(os.path.abspath(path)) > MAX_PATH:
+            problems.append(f"Output path is too long for Windows: {os.path.abspath(path)}")
+        if os.path.exists(path):
+            try:
+                with open(path, "r+b"):
+                    pass  # opens without truncating; fails while Word holds the file
+            except OSError:
+                problems.append(f"{path} is open in another program (close it first).")
+    return problems
+
+
+def preflight(lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet], *,
+              colors: Iterable[str] = ("WHITE",), output_dir: Optional[str] = "output",
+              stock: Optional[str] = None) -> List[str]:
+    """
+    All problems of a lot, in data order ([] = ready to render).
+    output_dir=None skips the file system checks.
+    """
+    from .label_stock import get_stock
+
+    problems: List[str] = []
+    lot_number = str(lot_number or "").strip()
+    if not lot_number:
+        problems.append("LOT # is required.")
+    if not work_orders:
+        problems.append("No Work Orders.")
+
+    # ---------- Work orders ----------
+    totals: List[Optional[int]] = []
+    for n, wo in enumerate(work_orders, start=1):
+        label = f"WO {n} ({str(wo.get('work_order', '')).strip() or 'no WO #'})"
+        for field in REQUIRED_FIELDS:
+            if not str(wo.get(field, "")).strip():
+                problems.append(f"{label}: {dict(TEXT_FIELDS)[field]} is required.")
+        for field, name in TEXT_FIELDS:
+            bad = _bad_text_chars(str(wo.get(field, "")))
+            if bad:
+                problems.append(f"{label}: {name} contains control characters {bad!r}.")
+
+        error = code_problem(str(wo.get("code", "")).strip())
+        if error:
+            problems.append(f"{label}: {error}")
+
+        try:
+            total = int(wo.get("total_qty"))
+            if total <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            problems.append(f"{label}: TOTAL QTY must be a positive integer.")
+            total = None
+        totals.append(total)
+
+    # ---------- Sheets ----------
+    allocated = [0] * len(work_orders)
+    seen_sheets = set()
+    if not sheets:
+        problems.append("No sheets.")
+    for n, sh in enumerate(sheets, start=1):
+        try:
+            sheet_number = int(sh["sheet_number"])
+        except (KeyError, TypeError, ValueError):
+            problems.append(f"Sheet {n}: invalid sheet number.")
+            sheet_number = n
+        if sheet_number in seen_sheets:
+            problems.append(f"Sheet {sheet_number} appears more than once.")
+        seen_sheets.add(sheet_number)
+
+        for alloc in sh.get("allocations") or []:
+            try:
+                i, q = (int(v) for v in alloc)
+            except (TypeError, ValueError):
+                problems.append(f"Sheet {sheet_number}: invalid allocation {alloc!r}.")
+                continue
+            if not 0 <= i < len(work_orders):
+                problems.append(f"Sheet {sheet_number}: WO index {i} is not in this lot.")
+            elif q < 0:
+                problems.append(f"Sheet {sheet_number}: negative quantity for WO {work_orders[i].get('work_order')}.")
+            else:
+                allocated[i] += q
+
+    for i, (total, qty) in enumerate(zip(totals, allocated)):
+        if total is not None and qty != total:
+            wo = work_orders[i]
+            problems.append(f"WO {wo.get('work_order')} | PART {wo.get('part')}: {qty} pcs on sheets, "
+                            f"expected {total} ({'over' if qty > total else 'short'} by {abs(qty - total)}).")
+
+    # ---------- Stock / output ----------
+    try:
+        get_stock(stock)
+    except ValueError as e:
+        problems.append(str(e))
+    if output_dir is not None and lot_number:
+        problems.extend(output_problems(lot_number, [str(c).strip().upper() for c in colors], output_dir))
+    return problems
+
+
+def check(lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet], **options) -> None:
+    """preflight(), raising PreflightError with every problem if there is any."""
+    problems = preflight(lot_number, work_orders, sheets, **options)
+    if problems:
+        raise PreflightError(problems)
+
+
+def format_problems(problems: List[str], limit: int = 30) -> str:
+    lines = [f"{len(problems)} problem(s) found before generating:"]
+    lines += [f"  - {p}" for p in problems[:limit]]
+    if len(problems) > limit:
+        lines.append(f"  ... and {len(problems) - limit} more")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    import time
+
+    ap = argparse.ArgumentParser(description="Validate a stored job or a job file without rendering it.")
+    ap.add_argument("job", help="Job id (job store) or job file (.json, watch-folder format)")
+    ap.add_argument("--output-dir", default="output")
+    args = ap.parse_args(argv)
+
+    if args.job.isdigit():
+        from .job_store import JobStore
+        job = JobStore().load_job(int(args.job))
+        if job is None:
+            print(f"❌ Job #{args.job} not found.")
+            return 1
+    else:
+        with open(args.job, "r", encoding="utf-8") as f:
+            job = json.load(f)
+
+    t0 = time.perf_counter()
+    problems = preflight(job.get("lot", ""), job.get("work_orders") or [], job.get("sheets") or [],
+                         colors=[job.get("color") or "WHITE"], output_dir=args.output_dir, stock=job.get("stock"))
+    ms = (time.perf_counter() - t0) * 1000
+    if problems:
+        print(f"❌ {format_problems(problems, limit=len(problems))}\n({ms:.1f} ms)")
+        return 1
+    print(f"✅ LOT {job['lot']} is ready to generate ({ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Fast page preview rasterized straight from lot / WO / sheet data (Pillow).
+
+Pages follow main.generate_doc: page 1 = cover (LOT + first 4 WOs with QTY
+total), then the continuous flow of SHEET labels and piece labels
+(core.reprint.FlowIndex). Page size, label boxes, barcode width and font
+scale come from the label stock (core.label_stock); text lines and sizes
+follow label_layout. It is a preview, not the print output: fonts fall back
+to what is installed.
+
+Pages are rendered on demand and kept in an LRU of thumbnails.
+
+    python -m core.preview <job id> [page] [out.png] [--width 850] [--stock NAME]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .barcode_profiles import get_profile
+from .code128 import PYTHON_BARCODE_OPTIONS
+from .reprint import FlowIndex, LabelRef
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+# barcode_utils options of the "scaled" barcode profile (picture aspect ratio comes from these)
+BARCODE_OPTIONS = PYTHON_BARCODE_OPTIONS
+
+MAX_THUMBNAILS = 64
+FONT_CANDIDATES = {
+    False: ("calibri.ttf", "Carlito-Regular.ttf", "DejaVuSans.ttf"),
+    True: ("calibrib.ttf", "Carlito-Bold.ttf", "DejaVuSans-Bold.ttf"),
+}
+
+_fonts: Dict[Tuple[int, bool], ImageFont.ImageFont] = {}
+
+
+def load_font(px: int, bold: bool) -> ImageFont.ImageFont:
+    key = (px, bold)
+    font = _fonts.get(key)
+    if font is None:
+        for name in FONT_CANDIDATES[bold]:
+            try:
+                font = ImageFont.truetype(name, px)
+                break
+            except OSError:
+                continue
+        else:
+            font = ImageFont.load_default(size=px)
+        _fonts[key] = font
+    return font
+
+
+def label_lines(ref: LabelRef, lot_number: str, work_orders: List[WorkOrder]) -> List[Tuple[str, int, bool]]:
+    """(text, size pt, bold) per line; "" = barcode placeholder. Mirrors label_layout."""
+    kind, sheet_number, wo_index = ref
+    if kind == "cover_lot":
+        return [("Cover Page", 24, True), (f"LOT # {lot_number}", 24, True)]
+    if kind == "sheet":
+        return [(f"Sheet # {sheet_number}", 20, True), (f"LOT # {lot_number}", 20, True)]
+
+    wo = work_orders[wo_index]
+    lines = [(str(wo["part"]), 26, True), (str(wo["tag_desc"]), 20, False), ("", 0, False),
+             (f"WO {wo['work_order']}", 16, False), (f"LOT {lot_number}", 16, False)]
+    if kind == "cover_wo":
+        lines.append((f"QTY {wo['total_qty']}", 16, False))
+    return lines
+
+
+class PagePreview:
+    """Rasterizes preview pages of one lot; thumbnails are LRU-cached per (page, width)."""
+
+    def __init__(self, lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet],
+                 max_thumbnails: int = MAX_THUMBNAILS, stock: Optional[str] = None,
+                 barcode_profile: Optional[str] = None):
+        self.lot_number = lot_number
+        self.work_orders = work_orders
+        self.index = FlowIndex(work_orders, sheets, stock)
+        self.stock = self.index.stock
+        self.barcode_profile = get_profile(barcode_profile)
+        self.max_thumbnails = max_thumbnails
+        self._pages: "OrderedDict[Tuple[int, int], Image.Image]" = OrderedDict()
+        self._barcodes: Dict[Tuple[str, float], Image.Image] = {}
+
+    @property
+    def page_count(self) -> int:
+        return self.index.total_pages
+
+    def labels_on_page(self, page: int) -> List[Tuple[int, LabelRef]]:
+        """[(slot, label_ref)] for one page (1-based)."""
+        if page == 1:
+            out: List[Tuple[int, LabelRef]] = [(0, ("cover_lot", None, None))]
+            for i in range(min(self.index.cover_wo_slots, len(self.work_orders))):
+                out.append((1 + i, ("cover_wo", None, i)))
+            return out
+        start, end = self.index.page_range(page)
+        return [(pos - start, self.index.label_at(pos)) for pos in range(start, end)]
+
+    # ---------- Rendering ----------
+    def render_page(self, page: int, width_px: int) -> Image.Image:
+        key = (page, width_px)
+        img = self._pages.get(key)
+        if img is not None:
+            self._pages.move_to_end(key)
+            return img
+
+        img = self._render(page, width_px)
+        self._pages[key] = img
+        while len(self._pages) > self.max_thumbnails:
+            self._pages.popitem(last=False)
+        return img
+
+    def _render(self, page: int, width_px: int) -> Image.Image:
+        stock = self.stock
+        px_per_in = width_px / stock.page_w_in
+        img = Image.new("L", (width_px, round(stock.page_h_in * px_per_in)), 255)
+        draw = ImageDraw.Draw(img)
+
+        # Label outlines (the tables have no borders; drawn light for orientation)
+        boxes = [tuple(v * px_per_in for v in box) for box in stock.slot_boxes]
+        for x, y, w, h in boxes:
+            draw.rectangle([x, y, x + w, y + h], outline=220)
+
+        for slot, ref in self.labels_on_page(page):
+            self._draw_label(img, draw, boxes[slot], ref, px_per_in)
+
+        if stock.footer:
+            footer = f"Page {page} of {self.page_count}"
+            font = load_font(max(6, round(11 * px_per_in / 72)), False)
+            w = draw.textlength(footer, font=font)
+            y = img.height - stock.margins_in["bottom"] * px_per_in / 2
+            draw.text(((width_px - w) / 2, y), footer, fill=0, font=font, anchor="lm")
+        return img
+
+    def _lines(self, ref: LabelRef) -> List[Tuple[str, int, bool]]:
+        return label_lines(ref, self.lot_number, self.work_orders)
+
+    def _barcode(self, code: str, px_per_in: float) -> Optional[Image.Image]:
+        """Barcode picture at its placed size (core.barcode_profiles) in preview pixels."""
+        key = (code, px_per_in)
+        if key not in self._barcodes:
+            try:
+                bars, placed_in = self.barcode_profile.image(code, self.stock.barcode_w_in, BARCODE_OPTIONS)
+                width_px = max(1, round(placed_in * px_per_in))
+                height = max(1, round(width_px * bars.height / bars.width))
+                self._barcodes[key] = bars.convert("L").resize((width_px, height), Image.BILINEAR)
+            except ValueError:
+                self._barcodes[key] = None  # not encodable: leave the space empty
+        return self._barcodes[key]
+
+    def _draw_label(self, img: Image.Image, draw: ImageDraw.ImageDraw, box, ref: LabelRef,
+                    px_per_in: float) -> None:
+        x0, y0, w, h = box
+        px_per_pt = px_per_in / 72 * self.stock.font_scale
+        lines = self._lines(ref)
+        bars = self._barcode(str(self.work_orders[ref[2]]["code"]), px_per_in) if ref[2] is not None else None
+        barcode_w = bars.width if bars is not None else round(self.stock.barcode_w_in * px_per_in)
+        barcode_h = bars.height if bars is not None else round(barcode_w * 0.3)
+
+        heights = [barcode_h + 2 * px_per_pt if not text else size * px_per_pt * 1.2
+                   for text, size, _ in lines]
+        y = y0 + max(0.0, (h - sum(heights)) / 2)  # vertically centered cell
+
+        for (text, size, bold), line_h in zip(lines, heights):
+            if not text:
+                if bars is not None:
+                    img.paste(bars, (round(x0 + (w - barcode_w) / 2), round(y + px_per_pt)))
+            else:
+                font = load_font(max(4, round(size * px_per_pt)), bold)
+                text_w = draw.textlength(text, font=font)
+                draw.text((x0 + (w - text_w) / 2, y + line_h / 2), text, fill=0, font=font, anchor="lm")
+            y += line_h
+
+
+def main(argv: List[str] | None = None) -> int:
+    import time
+    from .job_store import JobStore
+
+    ap = argparse.ArgumentParser(description="Render a preview page of a stored job to PNG.")
+    ap.add_argument("job_id", type=int)
+    ap.add_argument("page", type=int, nargs="?", default=1)
+    ap.add_argument("out", nargs="?", default="preview.png")
+    ap.add_argument("--width", type=int, default=850)
+    ap.add_argument("--stock", default=None, help="Label stock (default: the one the job was printed on)")
+    args = ap.parse_args(argv)
+
+    job = JobStore().load_job(args.job_id)
+    if job is None:
+        print(f"❌ Job #{args.job_id} not found.")
+        return 1
+
+    try:
+        preview = PagePreview(job["lot"], job["work_orders"], job["sheets"], stock=args.stock or job["stock"],
+                              barcode_profile=job["barcode_profile"])
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if not 1 <= args.page <= preview.page_count:
+        print(f"❌ Page {args.page} is out of range (1-{preview.page_count}).")
+        return 1
+
+    t0 = time.perf_counter()
+    preview.render_page(args.page, args.width).save(args.out)
+    print(f"✅ {args.out} (page {args.page}/{preview.page_count}, {(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
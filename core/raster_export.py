@@ -0,0 +1,285 @@
+"""
+Printer-resolution raster export of a lot's labels (1-bit PNG or ZPL).
+
+Every label is rendered at the printer's native resolution (203/300/600 dpi)
+with the content of label_layout (add_cover_label, add_sheet_label,
+add_workorder_label; lines shared with core.preview.label_lines):
+  - text lines are rasterized without anti-aliasing by Pillow,
+  - the barcode is built from core.code128 bar widths with a whole number of
+    dots per module (no resampling, every module edge on a dot boundary),
+  - lines are composited into the label bitmap with NumPy array slicing.
+
+A lot has few distinct labels (cover, one per sheet, one per WO), so each
+distinct label is rendered once, in parallel over a process pool, and the
+print order is written as runs (label, count).
+
+Output (in output/LOT <lot> <dpi>DPI/):
+    png: one 1-bit PNG per distinct label + sequence.json (print order, counts)
+    zpl: LOT <lot>.zpl, one ^GF graphic field per run with ^PQ <count>;
+         --zpl-store sends each graphic once (~DG) and recalls it (^XG)
+
+Label size, barcode width and font scale come from the label stock
+(core.label_stock, default: the stock the job was printed on); --size
+overrides the label size.
+
+    python -m core.raster_export <job id> [--dpi 203] [--format png|zpl] [--stock NAME] [--size 3x3]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .barcode_profiles import module_dots
+from .code128 import bar_widths, mm_to_px
+from .label_stock import get_stock
+from .preview import label_lines, load_font
+from .serials import is_serialized
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+DPI_CHOICES = (203, 300, 600)
+
+# barcode_utils / label_layout: 1.35" wide picture (default stock), 12 mm bars, 1.5 mm quiet zone
+BARCODE_MAX_W_IN = 1.35
+BARCODE_H_MM = 12.0
+QUIET_ZONE_MM = 1.5
+LINE_SPACING = 1.2
+
+# Label key: ("cover_lot", None, None) | ("cover_wo", None, i) | ("sheet", n, None) | ("piece", None, i)
+LabelKey = Tuple[str, Optional[int], Optional[int]]
+
+
+# ---------- Bitmaps (True = black dot) ----------
+def text_mask(text: str, size_pt: float, bold: bool, dpi: int) -> np.ndarray:
+    from PIL import Image, ImageDraw
+
+    font = load_font(max(4, round(size_pt * dpi / 72)), bold)
+    left, top, right, bottom = font.getbbox(text)
+    img = Image.new("1", (max(1, right - left), max(1, bottom - top)), 1)
+    draw = ImageDraw.Draw(img)
+    draw.fontmode = "1"  # no anti-aliasing: crisp on thermal printers
+    draw.text((-left, -top), text, font=font, fill=0)
+    return ~np.array(img, dtype=bool)
+
+
+def barcode_module_dots(value: str, dpi: int, max_width_in: float = BARCODE_MAX_W_IN) -> int:
+    """Largest whole number of dots per module that keeps the symbol within max_width_in."""
+    return module_dots(value, dpi, max_width_in, QUIET_ZONE_MM)
+
+
+def barcode_mask(value: str, dpi: int, module_dots: Optional[int] = None,
+                 height_mm: float = BARCODE_H_MM) -> np.ndarray:
+    widths = np.array(bar_widths(value), dtype=np.intp)
+    dots = module_dots or barcode_module_dots(value, dpi)
+    black = (np.arange(len(widths)) % 2 == 0)  # bars and spaces alternate, starting with a bar
+    row = np.repeat(black, widths * dots)
+    quiet = np.zeros(mm_to_px(QUIET_ZONE_MM, dpi), dtype=bool)
+    row = np.concatenate([quiet, row, quiet])
+    return np.broadcast_to(row, (max(1, mm_to_px(height_mm, dpi)), row.size))
+
+
+def render_label(lines: Sequence[Tuple[str, int, bool]], code: Optional[str], dpi: int,
+                 size_in: Tuple[float, float], barcode_w_in: float = BARCODE_MAX_W_IN,
+                 font_scale: float = 1.0) -> np.ndarray:
+    """Compose one label: lines centered horizontally, block centered vertically."""
+    width, height = int(round(size_in[0] * dpi)), int(round(size_in[1] * dpi))
+    canvas = np.zeros((height, width), dtype=bool)
+
+    pieces: List[Tuple[np.ndarray, int]] = []  # (mask, line height)
+    for text, size, bold in lines:
+        if not text:
+            if code:
+                bars = barcode_mask(code, dpi, barcode_module_dots(code, dpi, barcode_w_in))
+                pieces.append((bars, bars.shape[0] + 2 * round(dpi / 72)))
+            continue
+        size = size * font_scale
+        mask = text_mask(text, size, bold, dpi)
+        pieces.append((mask, max(mask.shape[0], int(size * dpi / 72 * LINE_SPACING))))
+
+    y = max(0, (height - sum(h for _, h in pieces)) // 2)
+    for mask, line_h in pieces:
+        mh, mw = mask.shape
+        top = y + (line_h - mh) // 2
+        left = (width - mw) // 2
+        # Clip to the label (long TAG + DESCRIPTION lines are cut, as in a fixed-size label)
+        src_x0 = max(0, -left)
+        dst_x0, dst_x1 = max(0, left), min(width, left + mw)
+        dst_y0, dst_y1 = max(0, top), min(height, top + mh)
+        if dst_x1 > dst_x0 and dst_y1 > dst_y0:
+            canvas[dst_y0:dst_y1, dst_x0:dst_x1] |= mask[dst_y0 - top:dst_y1 - top,
+                                                         src_x0:src_x0 + dst_x1 - dst_x0]
+        y += line_h
+    return canvas
+
+
+def _render_task(args) -> np.ndarray:
+    """Render one label in a worker; returns packed rows (8x smaller to send back).
+    With a PNG path the worker also encodes the file, the slow part of a PNG export."""
+    lines, code, dpi, size_in, barcode_w_in, font_scale, png_path = args
+    mask = render_label(lines, code, dpi, size_in, barcode_w_in, font_scale)
+    packed = np.packbits(mask, axis=1)
+    if png_path:
+        save_png(packed, mask.shape[1], png_path, dpi)
+    return packed
+
+
+# ---------- Encoders ----------
+def gf_field(packed: np.ndarray) -> str:
+    """ZPL ^GF graphic field from packed rows (ASCII hex, 1 = black dot)."""
+    bytes_per_row = packed.shape[1]
+    data = packed.tobytes()
+    return f"^GFA,{len(data)},{len(data)},{bytes_per_row},{data.hex().upper()}"
+
+
+def save_png(packed: np.ndarray, width: int, path: str, dpi: int) -> None:
+    """1-bit PNG from packed rows; width in dots drops the row padding bits."""
+    from PIL import Image
+
+    # Mode "1" stores a set bit as white: raw mode "1;I" reads the black dots inverted
+    img = Image.frombytes("1", (width, packed.shape[0]), packed.tobytes(), "raw", "1;I", packed.shape[1])
+    img.save(path, dpi=(dpi, dpi))
+
+
+# ---------- Lot -> labels ----------
+def label_runs(work_orders: List[WorkOrder], sheets: List[Sheet],
+               cover_wo_slots: int = 4) -> List[Tuple[LabelKey, int]]:
+    """Print order of main.generate_doc as (label key, consecutive count)."""
+    runs: List[Tuple[LabelKey, int]] = [(("cover_lot", None, None), 1)]
+    runs += [(("cover_wo", None, i), 1) for i in range(min(cover_wo_slots, len(work_orders)))]
+    for sh in sheets:
+        runs.append((("sheet", int(sh["sheet_number"]), None), 1))
+        for i, q in sh["allocations"]:
+            if int(q) <= 0:
+                continue
+            key = ("piece", None, int(i))
+            if runs[-1][0] == key:
+                runs[-1] = (key, runs[-1][1] + int(q))
+            else:
+                runs.append((key, int(q)))
+    return runs
+
+
+def _label_content(key: LabelKey, lot_number: str, work_orders: List[WorkOrder]):
+    kind, sheet_number, wo_index = key
+    ref = ("cover_wo" if kind == "cover_wo" else kind, sheet_number, wo_index)
+    lines = label_lines(ref, lot_number, work_orders)
+    code = str(work_orders[wo_index]["code"]) if wo_index is not None else None
+    return lines, code
+
+
+def _label_name(n: int, key: LabelKey, work_orders: List[WorkOrder]) -> str:
+    kind, sheet_number, wo_index = key
+    if kind == "sheet":
+        return f"{n:04d}-sheet-{sheet_number}"
+    if wo_index is not None:
+        wo = str(work_orders[wo_index]["work_order"]).replace(os.sep, "_")
+        return f"{n:04d}-{kind.replace('_', '-')}-wo-{wo}"
+    return f"{n:04d}-cover"
+
+
+def export_lot(lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet], *,
+               dpi: int = 203, fmt: str = "png", stock: Optional[str] = None,
+               size_in: Optional[Tuple[float, float]] = None, output_dir: str = "output",
+               workers: Optional[int] = None, zpl_store: bool = False) -> str:
+    """Export all labels of a lot; returns the output folder (png) or .zpl path."""
+    import main as console_main
+
+    label_stock = get_stock(stock)
+    size_in = size_in or label_stock.label_size_in
+
+    if dpi not in DPI_CHOICES:
+        raise ValueError(f"DPI must be one of {', '.join(map(str, DPI_CHOICES))}.")
+    if fmt not in ("png", "zpl"):
+        raise ValueError(f"Unknown format '{fmt}' (png or zpl).")
+    if any(is_serialized(wo) for wo in work_orders):
+        raise ValueError("Serialized lots (one barcode per piece) cannot be exported as label runs.")
+
+    runs = label_runs(work_orders, sheets, label_stock.cover_wo_slots)
+    distinct: List[LabelKey] = list(dict.fromkeys(key for key, _ in runs))
+    base = console_main.sanitize_filename(f"LOT {lot_number} {dpi}DPI")
+    folder = os.path.join(output_dir, base)
+    os.makedirs(folder, exist_ok=True)
+    names = {key: _label_name(n, key, work_orders) + ".png" for n, key in enumerate(distinct, start=1)}
+    tasks = [(*_label_content(key, lot_number, work_orders), dpi, size_in,
+              label_stock.barcode_w_in, label_stock.font_scale,
+              os.path.join(folder, names[key]) if fmt == "png" else None) for key in distinct]
+
+    workers = workers or os.cpu_count() or 1
+    if len(tasks) > 8 and workers > 1:
+        # spawn: the GUI process runs threads whose locks a forked worker could inherit held
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            packed = list(pool.map(_render_task, tasks, chunksize=max(1, len(tasks) // 32)))
+    else:
+        packed = [_render_task(t) for t in tasks]
+    bitmap = dict(zip(distinct, packed))  # packed rows per distinct label
+
+    if fmt == "png":
+        sequence = {"lot": lot_number, "dpi": dpi, "stock": label_stock.name, "size_in": list(size_in),
+                    "labels": sum(n for _, n in runs),
+                    "sequence": [{"file": names[key], "count": n} for key, n in runs]}
+        with open(os.path.join(folder, "sequence.json"), "w", encoding="utf-8") as f:
+            json.dump(sequence, f, indent=2)
+        return folder
+
+    path = os.path.join(folder, console_main.sanitize_filename(f"LOT {lot_number}") + ".zpl")
+    width = int(round(size_in[0] * dpi))
+    with open(path, "w", encoding="ascii") as f:
+        if zpl_store:
+            graphic = {key: f"R:L{n:04d}.GRF" for n, key in enumerate(distinct, start=1)}
+            for key in distinct:
+                packed = bitmap[key]
+                f.write(f"~DG{graphic[key]},{packed.size},{packed.shape[1]},{packed.tobytes().hex().upper()}\n")
+            for key, n in runs:
+                f.write(f"^XA^PW{width}^FO0,0^XG{graphic[key]},1,1^FS^PQ{n}^XZ\n")
+        else:
+            for key, n in runs:
+                f.write(f"^XA^PW{width}^FO0,0{gf_field(bitmap[key])}^FS^PQ{n}^XZ\n")
+    return path
+
+
+def _parse_size(text: str) -> Tuple[float, float]:
+    w, _, h = text.lower().partition("x")
+    return float(w), float(h)
+
+
+def main(argv: List[str] | None = None) -> int:
+    import time
+    from .job_store import JobStore
+
+    ap = argparse.ArgumentParser(description="Export a stored job's labels at printer resolution.")
+    ap.add_argument("job_id", type=int)
+    ap.add_argument("--dpi", type=int, choices=DPI_CHOICES, default=203)
+    ap.add_argument("--format", choices=["png", "zpl"], default="png")
+    ap.add_argument("--stock", default=None, help="Label stock (default: the one the job was printed on)")
+    ap.add_argument("--size", type=_parse_size, default=None, help='Label size in inches, e.g. "4x3" (default: from the stock)')
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--zpl-store", action="store_true", help="Send each graphic once (~DG) and recall it (^XG)")
+    args = ap.parse_args(argv)
+
+    job = JobStore().load_job(args.job_id)
+    if job is None:
+        print(f"❌ Job #{args.job_id} not found.")
+        return 1
+
+    t0 = time.perf_counter()
+    try:
+        out = export_lot(job["lot"], job["work_orders"], job["sheets"], dpi=args.dpi, fmt=args.format,
+                         stock=args.stock or job["stock"], size_in=args.size, workers=args.workers,
+                         zpl_store=args.zpl_store)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {out} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
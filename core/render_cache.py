@@ -0,0 +1,322 @@
+"""
+Render cache for label cells.
+
+Each rendered label cell (cover, sheet header, piece) is memoized by a hash of
+its inputs (label kind, lot, WO label fields, QTY variant, LAYOUT_VERSION).
+A cache hit splices a copy of the cached cell XML into the table instead of
+rendering it again: paragraphs, runs and the barcode picture (image blob is
+re-related to the target document, deduplicated by python-docx). The cell
+width (w:tcW) is not part of a fragment: the target cell keeps the one its
+label stock gave it.
+
+Serialized piece labels (core.serials) are all different; they are
+rendered as a Variant: a copy of one cached base label per WO with the
+serial text and barcode picture swapped.
+
+On top of that, the last document built for each lot is kept in memory. When
+the page structure (pages x used slots) is unchanged, regeneration reuses it
+and only replaces the cells whose fragment key changed.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import io
+import json
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Bump when label_layout output changes, so old fragments are not reused
+LAYOUT_VERSION = 1
+
+MAX_FRAGMENTS = 4096
+MAX_DOCUMENTS = 4
+
+# Page plan: one list per page of (slot_index, fragment_key, render_fn(cell) or Variant)
+PagePlan = List[List[Tuple[int, str, Callable]]]
+
+
+def fragment_key(kind: str, lot_number: str, wo: Optional[dict] = None, **variant) -> str:
+    """Stable content hash of everything that ends up in one label cell."""
+    payload = {
+        "v": LAYOUT_VERSION,
+        "kind": kind,
+        "lot": str(lot_number),
+        "variant": variant,
+    }
+    if wo is not None:
+        payload["wo"] = [str(wo.get(f, "")) for f in ("part", "tag_desc", "code", "work_order")]
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _Fragment:
+    __slots__ = ("elements", "images")
+
+    def __init__(self, elements: list, images: Dict[str, bytes]):
+        self.elements = elements  # deep copies of the <w:tc> children
+        self.images = images      # rId (in source doc) -> image blob
+
+
+class FragmentCache:
+    """LRU of fragment key -> rendered cell XML + image blobs."""
+
+    def __init__(self, max_entries: int = MAX_FRAGMENTS):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, _Fragment]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[_Fragment]:
+        frag = self._items.get(key)
+        if frag is not None:
+            self._items.move_to_end(key)
+        return frag
+
+    def put(self, key: str, frag: _Fragment) -> None:
+        self._items[key] = frag
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+DEFAULT_CACHE = FragmentCache()
+
+
+class _DocState:
+    """Per-document bookkeeping: image blob -> rId, next free drawing id / media number."""
+
+    def __init__(self):
+        self.rids: Dict[bytes, str] = {}
+        self.next_id = 100000  # above anything python-docx assigns on a fresh doc
+        self.next_media: Optional[int] = None
+        self.next_rid: Optional[int] = None
+
+
+_DOC_STATES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _qn(tag: str) -> str:
+    from docx.oxml.ns import qn
+    return qn(tag)
+
+
+def _doc_state(part) -> _DocState:
+    state = _DOC_STATES.get(part)
+    if state is None:
+        state = _DocState()
+        _DOC_STATES[part] = state
+    return state
+
+
+def _capture(cell) -> _Fragment:
+    tc = cell._tc
+    part = cell.part
+    images: Dict[str, bytes] = {}
+    for blip in tc.iter(_qn("a:blip")):
+        rId = blip.get(_qn("r:embed"))
+        if rId and rId not in images:
+            images[rId] = part.related_parts[rId].blob
+
+    state = _doc_state(part)
+    for docpr in tc.iter(_qn("wp:docPr")):
+        state.next_id = max(state.next_id, int(docpr.get("id", "0")) + 1)
+
+    elements = [copy.deepcopy(child) for child in tc]
+    for el in elements:
+        if el.tag == _qn("w:tcPr"):
+            for width in el.findall(_qn("w:tcW")):
+                el.remove(width)  # belongs to the page table, not to the label
+    return _Fragment(elements, images)
+
+
+def _add_unique_image(part, state: _DocState, blob: bytes) -> str:
+    """
+    Relate an image that is known to be new to this document.
+    part.get_or_add_image() looks for a duplicate by hashing every image
+    already in the package and numbers media/rIds by scanning: quadratic
+    over thousands of unique (serialized) barcodes.
+    """
+    from docx.image.image import Image
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.opc.packuri import PackURI
+    from docx.parts.image import ImagePart
+
+    images = part.package.image_parts
+    if state.next_media is None:
+        state.next_media = max((p.partname.idx or 0 for p in images), default=0) + 1
+        state.next_rid = len(part.rels) + 1
+    # python-docx numbers the pictures it adds (add_picture on a re-rendered
+    # cell) len(image_parts) + 1: stay above that, or two parts share a name
+    state.next_media = max(state.next_media, len(images) + 1)
+    while f"rId{state.next_rid}" in part.rels:
+        state.next_rid += 1
+
+    image = Image.from_blob(blob)
+    image_part = ImagePart.from_image(image, PackURI(f"/word/media/image{state.next_media}.{image.ext}"))
+    images.append(image_part)
+    state.next_media += 1
+    rId = f"rId{state.next_rid}"
+    part.rels.add_relationship(RT.IMAGE, image_part, rId)
+    return rId
+
+
+def _splice(cell, frag: _Fragment, texts: Optional[Dict[str, str]] = None,
+            image: Optional[bytes] = None) -> None:
+    tc = cell._tc
+    part = cell.part
+    state = _doc_state(part)
+
+    width = tc.tcPr.tcW if tc.tcPr is not None else None
+    for child in list(tc):
+        tc.remove(child)
+    for el in frag.elements:
+        tc.append(copy.deepcopy(el))
+    if width is not None:
+        tc.get_or_add_tcPr()._insert_tcW(width)
+
+    embed = _qn("r:embed")
+    for blip in tc.iter(_qn("a:blip")):
+        if image is not None:
+            blip.set(embed, _add_unique_image(part, state, image))
+            continue
+        blob = frag.images[blip.get(embed)]
+        rId = state.rids.get(blob)
+        if rId is None:
+            rId, _ = part.get_or_add_image(io.BytesIO(blob))
+            state.rids[blob] = rId
+        blip.set(embed, rId)
+
+    if texts:
+        for t in tc.iter(_qn("w:t")):
+            if t.text in texts:
+                t.text = texts[t.text]
+
+    for docpr in tc.iter(_qn("wp:docPr")):
+        docpr.set("id", str(state.next_id))
+        state.next_id += 1
+
+
+class Variant:
+    """
+    Render function for a one-off label that differs from a base label only
+    in some text runs and its picture (serialized piece labels). The base is
+    rendered/cached once under base_key; each variant is a copy of it with
+    texts (old run text -> new) and the image swapped. The picture must have
+    the pixel size of the base picture (same extent on the page). Variants
+    themselves are not cached: every one is different.
+    """
+
+    __slots__ = ("base_key", "base_fn", "texts", "image")
+
+    def __init__(self, base_key: str, base_fn: Callable, texts: Dict[str, str], image: Optional[bytes] = None):
+        self.base_key = base_key
+        self.base_fn = base_fn
+        self.texts = texts
+        self.image = image
+
+    def render(self, cell, cache: FragmentCache) -> None:
+        frag = cache.get(self.base_key)
+        if frag is None:
+            cache.misses += 1
+            self.base_fn(cell)
+            frag = _capture(cell)
+            cache.put(self.base_key, frag)
+        _splice(cell, frag, self.texts, self.image)
+
+
+def render_cell(cell, key: str, render_fn: Callable, cache: FragmentCache = DEFAULT_CACHE) -> None:
+    """Fill `cell` from the cache, or render it with render_fn(cell) and cache the result."""
+    if isinstance(render_fn, Variant):
+        render_fn.render(cell, cache)
+        return
+    frag = cache.get(key)
+    if frag is not None:
+        cache.hits += 1
+        _splice(cell, frag)
+        return
+    cache.misses += 1
+    render_fn(cell)
+    cache.put(key, _capture(cell))
+
+
+def _prune_unused_images(doc) -> None:
+    """Drop image relationships no longer referenced (after cells were replaced)."""
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+    part = doc.part
+    used = set(part.element.xpath("//a:blip/@r:embed"))
+    for rId, rel in list(part.rels.items()):
+        if rel.reltype == RT.IMAGE and rId not in used:
+            del part.rels[rId]
+    state = _doc_state(part)
+    state.rids = {blob: rId for blob, rId in state.rids.items() if rId in used}
+
+
+class _BuiltDoc:
+    def __init__(self, doc, signature, cells, keys):
+        self.doc = doc
+        self.signature = signature
+        self.cells = cells  # (page, slot) -> cell
+        self.keys = keys    # (page, slot) -> fragment key
+
+
+_BUILT: "OrderedDict[str, _BuiltDoc]" = OrderedDict()
+
+
+def build_pages(pages: PagePlan, stock, *, doc_key: Optional[str] = None,
+                cache: FragmentCache = DEFAULT_CACHE) -> Tuple[object, bool]:
+    """
+    Build one table per page (page break between pages) on a label stock
+    (core.label_stock) and fill the planned slots.
+
+    If doc_key is given and the last document built under that key has the same
+    stock and page structure, it is reused and only changed cells are re-filled.
+    Returns (document, reused).
+    """
+    signature = (stock.name, tuple(tuple(slot for slot, _, _ in page) for page in pages))
+
+    built = _BUILT.get(doc_key) if doc_key is not None else None
+    if built is not None and built.signature == signature:
+        changed = False
+        for p, page in enumerate(pages):
+            for slot, key, fn in page:
+                if built.keys[(p, slot)] != key:
+                    render_cell(built.cells[(p, slot)], key, fn, cache)
+                    built.keys[(p, slot)] = key
+                    changed = True
+        if changed:
+            _prune_unused_images(built.doc)
+        _BUILT.move_to_end(doc_key)
+        return built.doc, True
+
+    from docx import Document
+
+    doc = Document()
+    stock.setup_document(doc)
+    cells: Dict[Tuple[int, int], object] = {}
+    keys: Dict[Tuple[int, int], str] = {}
+    variants = False
+    for p, page in enumerate(pages):
+        if p > 0:
+            stock.add_page_break(doc)
+        table = stock.add_table(doc)
+        for slot, key, fn in page:
+            cell = stock.cell(table, slot)
+            render_cell(cell, key, fn, cache)
+            cells[(p, slot)] = cell
+            keys[(p, slot)] = key
+            variants = variants or isinstance(fn, Variant)
+    if variants:
+        _prune_unused_images(doc)  # base labels rendered in place of their first variant
+
+    if doc_key is not None:
+        _BUILT[doc_key] = _BuiltDoc(doc, signature, cells, keys)
+        _BUILT.move_to_end(doc_key)
+        while len(_BUILT) > MAX_DOCUMENTS:
+            _BUILT.popitem(last=False)
+    return doc, False
@@ -0,0 +1,267 @@
+"""
+Renderer registry: one interface over the label document backends.
+
+Backends (select by name from the GUI "Renderer" combo or
+`python main.py --renderer NAME`):
+    docx-legacy  main.py + label_layout.py: 3x2 pages, cover LOT label,
+                 SHEET labels, one label per piece (job store, delta, reprint)
+    docx-core    core/docx_generator.py: 2x3 tables, one label per
+                 sheet/WO allocation with a SHEET line
+Other backends register themselves with register(). Backends import their
+heavy dependencies inside render(), so listing them is free. Every backend
+lays its pages out on a label stock (core.label_stock, stock=None = the
+backend's own default) and sizes barcodes with a barcode profile
+(core.barcode_profiles, barcode_profile=None = the default profile).
+Files are saved with core.docx_save (compression=None = its default).
+
+Conformance + benchmark harness (same sample lots for every backend):
+    python -m core.renderers check [--renderer NAME] [--stock NAME]
+    python -m core.renderers bench [--renderer NAME] [--stock NAME] [--sheets 50] [--runs 3]
+"""
+from __future__ import annotations
+
+import abc
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+DEFAULT_RENDERER = "docx-legacy"
+
+
+class Renderer(abc.ABC):
+    """Base backend. Subclasses set name/description and implement render_colors() + expected_labels()."""
+
+    name = ""
+    description = ""
+    default_stock: Optional[str] = None
+
+    @abc.abstractmethod
+    def render_colors(self, lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet],
+                      colors: List[str], output_dir: str = "output", record: bool = True,
+                      stock: Optional[str] = None, barcode_profile: Optional[str] = None,
+                      compression: Optional[str] = None) -> List[str]:
+        """One file per color from a single render; returns the paths.
+        record=False: do not store the job (conformance/benchmark renders)."""
+
+    def render(self, lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet],
+               color: str, output_dir: str = "output", record: bool = True,
+               stock: Optional[str] = None, barcode_profile: Optional[str] = None,
+               compression: Optional[str] = None) -> str:
+        return self.render_colors(lot_number, work_orders, sheets, [color], output_dir, record, stock,
+                                  barcode_profile, compression)[0]
+
+    @abc.abstractmethod
+    def expected_labels(self, work_orders: List[WorkOrder], sheets: List[Sheet]) -> int:
+        """Number of filled label cells this backend produces (used by the conformance check)."""
+
+
+class LegacyDocxRenderer(Renderer):
+    name = "docx-legacy"
+    description = "3x2 pages, cover + SHEET labels, one label per piece (main.py)"
+
+    def render_colors(self, lot_number, work_orders, sheets, colors, output_dir="output", record=True,
+                      stock=None, barcode_profile=None, compression=None):
+        import main as console_main
+
+        os.makedirs(output_dir, exist_ok=True)
+        return console_main.generate_doc_colors(lot_number, work_orders, sheets, colors, output_dir=output_dir,
+                                                record=record, stock=stock, compression=compression,
+                                                barcode_profile=barcode_profile)
+
+    def expected_labels(self, work_orders, sheets):
+        pieces = sum(int(q) for sh in sheets for (_, q) in sh["allocations"] if int(q) > 0)
+        return 1 + min(4, len(work_orders)) + len(sheets) + pieces
+
+
+class CoreDocxRenderer(Renderer):
+    name = "docx-core"
+    description = "2x3 tables, one label per sheet/WO allocation (core/docx_generator.py)"
+    default_stock = "letter-2x3"
+
+    def render_colors(self, lot_number, work_orders, sheets, colors, output_dir="output", record=True,
+                      stock=None, barcode_profile=None, compression=None):
+        # Not recorded in the job store (delta/reprint rebuild the legacy layout), only in the metrics log
+        from .docx_generator import generate_docx_colors
+        from .serials import is_serialized
+
+        if any(is_serialized(wo) for wo in work_orders):
+            raise ValueError(f"{self.name} prints one label per allocation; serialized lots need docx-legacy.")
+        return generate_docx_colors(lot_number, colors, work_orders, sheets, output_dir,
+                                    stock=stock or self.default_stock, compression=compression, record=record,
+                                    barcode_profile=barcode_profile)
+
+    def expected_labels(self, work_orders, sheets):
+        allocations = sum(1 for sh in sheets for (_, q) in sh["allocations"] if int(q) > 0)
+        return min(4, len(work_orders)) + allocations
+
+
+_REGISTRY: Dict[str, Renderer] = {}
+
+
+def register(renderer: Renderer) -> Renderer:
+    if not renderer.name:
+        raise ValueError("Renderer needs a name.")
+    _REGISTRY[renderer.name] = renderer
+    return renderer
+
+
+def get_renderer(name: Optional[str] = None) -> Renderer:
+    name = name or DEFAULT_RENDERER
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown renderer '{name}' (have: {', '.join(_REGISTRY)})")
+
+
+def available_renderers() -> List[str]:
+    return list(_REGISTRY)
+
+
+register(LegacyDocxRenderer())
+register(CoreDocxRenderer())
+
+
+# ---------- Conformance ----------
+def sample_lot(n_sheets: int = 4, n_wos: int = 3, qty_per_sheet: int = 5) -> dict:
+    work_orders = [
+        {"part": f"EC-{100 + i}", "tag_desc": f"TAG {i + 1} + BRACKET", "code": f"PLNM-{100 + i}",
+         "work_order": f"5550{i}", "total_qty": n_sheets * qty_per_sheet, "remaining": 0}
+        for i in range(n_wos)
+    ]
+    sheets = [{"sheet_number": s + 1, "allocations": [(i, qty_per_sheet) for i in range(n_wos)]}
+              for s in range(n_sheets)]
+    return {"lot": f"CHK{n_sheets}x{n_wos}", "work_orders": work_orders, "sheets": sheets}
+
+
+def check_document(path: str, renderer: Renderer, lot: dict) -> List[str]:
+    """Open a rendered DOCX and check it against the lot data; returns problems."""
+    from docx import Document
+
+    problems: List[str] = []
+    doc = Document(path)
+
+    texts: List[str] = []
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                text = cell.text.strip()
+                if text:
+                    texts.append(text)
+
+    expected = renderer.expected_labels(lot["work_orders"], lot["sheets"])
+    if len(texts) != expected:
+        problems.append(f"{len(texts)} label cells, expected {expected}")
+
+    body = "\n".join(texts)
+    if f"LOT {lot['lot']}" not in body and f"LOT # {lot['lot']}" not in body:
+        problems.append("LOT number missing")
+    for wo in lot["work_orders"]:
+        if f"WO {wo['work_order']}" not in body:
+            problems.append(f"WO {wo['work_order']} missing")
+    for sh in lot["sheets"]:
+        n = sh["sheet_number"]
+        if f"Sheet # {n}" not in body and f"SHEET {n}" not in body:
+            problems.append(f"sheet {n} missing")
+
+    # One distinct barcode picture per distinct code (identical images are deduplicated)
+    images = {rel.target_part.blob for rel in doc.part.rels.values() if "image" in rel.reltype}
+    codes = {str(wo["code"]) for wo in lot["work_orders"]}
+    if len(images) != len(codes):
+        problems.append(f"{len(images)} distinct barcode images, expected {len(codes)}")
+    return problems
+
+
+def _render_sample(renderer: Renderer, lot: dict, stock: Optional[str] = None, color: str = "WHITE") -> str:
+    out_dir = tempfile.mkdtemp(prefix=f"{renderer.name}-")
+    return renderer.render(lot["lot"], lot["work_orders"], lot["sheets"], color, out_dir, record=False,
+                           stock=stock)
+
+
+def _cleanup(path: str) -> None:
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def run_check(names: List[str], stock: Optional[str] = None) -> int:
+    failures = 0
+    lots = [sample_lot(1, 1, 1), sample_lot(4, 3, 5), sample_lot(3, 4, 7)]
+    for name in names:
+        renderer = get_renderer(name)
+        for lot in lots:
+            path = _render_sample(renderer, lot, stock)
+            problems = check_document(path, renderer, lot)
+            _cleanup(path)
+            status = "ok  " if not problems else "FAIL"
+            print(f"{status} {name:12} {lot['lot']:10} {'; '.join(problems)}")
+            failures += bool(problems)
+    print("\n" + ("✅ all backends conform" if not failures else f"❌ {failures} failure(s)"))
+    return 1 if failures else 0
+
+
+def run_bench(names: List[str], n_sheets: int, runs: int, stock: Optional[str] = None) -> int:
+    from .render_cache import DEFAULT_CACHE
+
+    lot = sample_lot(n_sheets, 3, 6)
+    results = []
+    for name in names:
+        renderer = get_renderer(name)
+        timings = []
+        problems: List[str] = []
+        for run in range(runs):
+            # Cold render each run (fresh fragment cache, new lot key): compare backends, not cache hits
+            DEFAULT_CACHE.clear()
+            run_lot = dict(lot, lot=f"{lot['lot']}-{run}")
+            t0 = time.perf_counter()
+            path = _render_sample(renderer, run_lot, stock)
+            timings.append((time.perf_counter() - t0) * 1000)
+            if run == 0:
+                problems = check_document(path, renderer, run_lot)
+            _cleanup(path)
+        results.append((name, statistics.median(timings), problems))
+
+    # Backends lay out different label counts for the same lot, so times are not
+    # comparable across backends: report each one's own throughput, no ranking.
+    print(f"Sample: {n_sheets} sheets x 3 WOs, {runs} run(s) each, median\n")
+    for name, ms, problems in results:
+        labels = get_renderer(name).expected_labels(lot["work_orders"], lot["sheets"])
+        status = "ok" if not problems else "FAIL: " + "; ".join(problems)
+        print(f"{name:12} {ms:9.1f} ms  {labels:6} labels  {labels / (ms / 1000):8.0f} labels/s  {status}")
+    return 1 if any(problems for _, _, problems in results) else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Renderer conformance check and benchmark.")
+    ap.add_argument("command", choices=["list", "check", "bench"])
+    ap.add_argument("--renderer", action="append", default=None, help="Backend name (repeatable; default: all)")
+    ap.add_argument("--stock", default=None, help="Label stock (default: each backend's own)")
+    ap.add_argument("--sheets", type=int, default=50, help="bench: sheets in the sample lot")
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    if args.command == "list":
+        for name in available_renderers():
+            print(f"{name:12} {get_renderer(name).description}")
+        return 0
+
+    names = args.renderer or available_renderers()
+    try:
+        for name in names:
+            get_renderer(name)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    if args.command == "check":
+        return run_check(names, args.stock)
+    return run_bench(names, args.sheets, args.runs, args.stock)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
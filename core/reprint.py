@@ -0,0 +1,341 @@
+"""
+Partial reprint: regenerate only selected labels of a lot, in the same
+page slots they had in the original document built by main.generate_doc().
+
+Original layout (main.generate_doc):
+  - page 1 = cover: slot 0 LOT label, slots 1-4 first 4 WOs (QTY = total)
+  - page 2.. = continuous flow, label stock capacity (core.label_stock) per page:
+      per sheet: 1 SHEET label, then one piece label per allocated qty
+
+Placements are computed arithmetically from per-sheet prefix sums
+(bisect), so the cost depends on the size of the selection, not the lot.
+
+Selection (dict, every key optional, union of all given keys):
+  {"sheets": [3, 5], "work_orders": ["12345"], "pieces": (10, 20), "pages": [4, 5, 6]}
+  pieces are 1-based, inclusive; counted within the selected WO(s) if
+  "work_orders" is given, else across all piece labels of the lot.
+
+    python -m core.reprint <job id> "sheets 3,5; pages 4-6"
+"""
+from __future__ import annotations
+
+import os
+import sys
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .docx_save import save_docx
+from .label_stock import get_stock
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+Selection = Dict[str, object]
+
+FIRST_FLOW_PAGE = 2
+
+# Label reference: (kind, sheet_number, wo_index)
+#   kind: "cover_lot" | "cover_wo" | "sheet" | "piece"
+LabelRef = Tuple[str, Optional[int], Optional[int]]
+
+
+class FlowIndex:
+    """
+    Prefix sums over the sheets flow of one lot, paged on a label stock.
+    Built in O(sheets x WOs); never iterates individual labels.
+    """
+
+    def __init__(self, work_orders: List[WorkOrder], sheets: List[Sheet], stock: Optional[str] = None):
+        self.work_orders = work_orders
+        self.sheets = sheets
+        self.stock = get_stock(stock)
+        self.slots_per_page = self.stock.capacity
+        self.cover_wo_slots = self.stock.cover_wo_slots
+        n_wo = len(work_orders)
+
+        self.sheet_numbers: List[int] = []
+        self.sheet_start: List[int] = []          # flow position of each SHEET label
+        self.sheet_alloc: List[List[Tuple[int, int]]] = []  # [(wo_index, qty>0)] in print order
+        self.sheet_alloc_cum: List[List[int]] = []  # offsets of each allocation within the sheet
+        self.piece_cum: List[int] = [0]           # piece labels before each sheet (lot-wide)
+        self.wo_cum: List[List[int]] = [[0] for _ in range(n_wo)]  # per WO: pieces before each sheet
+
+        pos = 0
+        for sh in sheets:
+            allocs = [(int(i), int(q)) for (i, q) in sh["allocations"] if int(q) > 0]
+            cum = [0]
+            for _, q in allocs:
+                cum.append(cum[-1] + q)
+
+            self.sheet_numbers.append(int(sh["sheet_number"]))
+            self.sheet_start.append(pos)
+            self.sheet_alloc.append(allocs)
+            self.sheet_alloc_cum.append(cum)
+            self.piece_cum.append(self.piece_cum[-1] + cum[-1])
+
+            per_wo = [0] * n_wo
+            for i, q in allocs:
+                per_wo[i] += q
+            for i in range(n_wo):
+                self.wo_cum[i].append(self.wo_cum[i][-1] + per_wo[i])
+
+            pos += 1 + cum[-1]
+
+        self.flow_length = pos
+        self._sheet_pos = {sn: k for k, sn in enumerate(self.sheet_numbers)}
+
+    # ---------- Geometry ----------
+    @property
+    def total_pages(self) -> int:
+        return self.stock.page_count(self.flow_length)
+
+    def page_slot(self, position: int) -> Tuple[int, int]:
+        """Flow position -> (page number, slot index on the page)."""
+        return FIRST_FLOW_PAGE + position // self.slots_per_page, position % self.slots_per_page
+
+    def label_at(self, position: int) -> LabelRef:
+        """What is printed at a flow position (O(log sheets))."""
+        k = bisect_right(self.sheet_start, position) - 1
+        offset = position - self.sheet_start[k]
+        if offset == 0:
+            return ("sheet", self.sheet_numbers[k], None)
+        j = bisect_right(self.sheet_alloc_cum[k], offset - 1) - 1
+        return ("piece", self.sheet_numbers[k], self.sheet_alloc[k][j][0])
+
+    def piece_seq(self, position: int) -> int:
+        """1-based piece number within its WO of the piece label at a flow position."""
+        k = bisect_right(self.sheet_start, position) - 1
+        offset = position - self.sheet_start[k] - 1
+        j = bisect_right(self.sheet_alloc_cum[k], offset) - 1
+        wo_index = self.sheet_alloc[k][j][0]
+        before = sum(q for (i, q) in self.sheet_alloc[k][:j] if i == wo_index)
+        return self.wo_cum[wo_index][k] + before + offset - self.sheet_alloc_cum[k][j] + 1
+
+    # ---------- Selections -> flow ranges ----------
+    def sheet_range(self, sheet_number: int) -> Tuple[int, int]:
+        k = self._sheet_pos[int(sheet_number)]
+        return self.sheet_start[k], self.sheet_start[k] + 1 + self.sheet_alloc_cum[k][-1]
+
+    def wo_ranges(self, wo_index: int, include_sheet_labels: bool = True) -> List[Tuple[int, int]]:
+        """Flow ranges of one WO's pieces (plus the SHEET labels of sheets it is on)."""
+        out = []
+        for k, allocs in enumerate(self.sheet_alloc):
+            for j, (i, q) in enumerate(allocs):
+                if i != wo_index:
+                    continue
+                if include_sheet_labels:
+                    out.append((self.sheet_start[k], self.sheet_start[k] + 1))
+                start = self.sheet_start[k] + 1 + self.sheet_alloc_cum[k][j]
+                out.append((start, start + q))
+        return out
+
+    def piece_position(self, piece: int, wo_index: Optional[int] = None) -> int:
+        """0-based piece number (lot-wide, or within one WO) -> flow position."""
+        if wo_index is None:
+            k = bisect_right(self.piece_cum, piece) - 1
+            return self.sheet_start[k] + 1 + (piece - self.piece_cum[k])
+
+        cum = self.wo_cum[wo_index]
+        k = bisect_right(cum, piece) - 1
+        rest = piece - cum[k]
+        for j, (i, q) in enumerate(self.sheet_alloc[k]):
+            if i != wo_index:
+                continue
+            if rest < q:
+                return self.sheet_start[k] + 1 + self.sheet_alloc_cum[k][j] + rest
+            rest -= q
+        raise IndexError(piece)
+
+    def page_range(self, page: int) -> Tuple[int, int]:
+        start = (page - FIRST_FLOW_PAGE) * self.slots_per_page
+        return start, min(start + self.slots_per_page, self.flow_length)
+
+
+def _wo_indexes(work_orders: List[WorkOrder], wo_numbers: Iterable[str]) -> List[int]:
+    wanted = {str(w).strip() for w in wo_numbers}
+    found = [i for i, wo in enumerate(work_orders) if str(wo.get("work_order", "")).strip() in wanted]
+    missing = wanted - {str(work_orders[i].get("work_order", "")).strip() for i in found}
+    if missing:
+        raise ValueError(f"WO not in this lot: {', '.join(sorted(missing))}")
+    return found
+
+
+def select_labels(index: FlowIndex, selection: Selection) -> List[Tuple[int, int, LabelRef]]:
+    """
+    Resolve a selection to [(page, slot, label_ref)] sorted by page/slot.
+    Cover labels are included only if page 1 is selected.
+    """
+    ranges: List[Tuple[int, int]] = []
+    cover = False
+    wo_idx = _wo_indexes(index.work_orders, selection.get("work_orders") or [])
+
+    for sn in selection.get("sheets") or []:
+        if int(sn) not in index._sheet_pos:
+            raise ValueError(f"Sheet {sn} is not in this lot.")
+        ranges.append(index.sheet_range(int(sn)))
+
+    pieces = selection.get("pieces")
+    if pieces:
+        first, last = int(pieces[0]), int(pieces[1])
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid piece range {first}-{last}.")
+        for i in (wo_idx or [None]):
+            available = index.piece_cum[-1] if i is None else index.wo_cum[i][-1]
+            for p in range(first - 1, min(last, available)):
+                pos = index.piece_position(p, i)
+                ranges.append((pos, pos + 1))
+    else:
+        for i in wo_idx:
+            ranges.extend(index.wo_ranges(i))
+
+    for page in selection.get("pages") or []:
+        page = int(page)
+        if page < 1 or page > index.total_pages:
+            raise ValueError(f"Page {page} is out of range (1-{index.total_pages}).")
+        if page == 1:
+            cover = True
+        else:
+            ranges.append(index.page_range(page))
+
+    positions = sorted({p for (a, b) in ranges for p in range(a, b)})
+
+    out: List[Tuple[int, int, LabelRef]] = []
+    if cover:
+        out.append((1, 0, ("cover_lot", None, None)))
+        for i in range(min(index.cover_wo_slots, len(index.work_orders))):
+            out.append((1, 1 + i, ("cover_wo", None, i)))
+    for pos in positions:
+        page, slot = index.page_slot(pos)
+        out.append((page, slot, index.label_at(pos)))
+    return out
+
+
+def _parse_numbers(text: str) -> List[int]:
+    out: List[int] = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            out.extend(range(int(a), int(b) + 1))
+        else:
+            out.append(int(part))
+    return out
+
+
+def parse_selection(text: str) -> Selection:
+    """
+    Parse "sheets 3,5-7; wo 12345; pieces 10-20; pages 4-6" into a Selection.
+    Raises ValueError on unknown keys / bad numbers.
+    """
+    sel: Selection = {}
+    for chunk in text.split(";"):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        key, _, rest = chunk.partition(" ")
+        key = key.lower()
+        rest = rest.strip()
+        if key in ("sheet", "sheets"):
+            sel["sheets"] = _parse_numbers(rest)
+        elif key in ("wo", "wos"):
+            sel["work_orders"] = [w.strip() for w in rest.split(",") if w.strip()]
+        elif key in ("piece", "pieces"):
+            nums = _parse_numbers(rest)
+            if not nums:
+                raise ValueError("pieces needs a number or range")
+            sel["pieces"] = (min(nums), max(nums))
+        elif key in ("page", "pages"):
+            sel["pages"] = _parse_numbers(rest)
+        else:
+            raise ValueError(f"Unknown selection '{key}' (use sheets/wo/pieces/pages).")
+    if not sel:
+        raise ValueError("Empty selection.")
+    return sel
+
+
+def generate_reprint_doc(lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet],
+                         selection: Selection, color: str, output_dir: str = "output",
+                         stock: Optional[str] = None, barcode_profile: Optional[str] = None) -> str:
+    """
+    Build a DOCX with only the selected labels, each in its original slot
+    (same label stock tables, barcode profile and label functions as
+    main.generate_doc). Pages with no selected label are skipped. Returns the
+    saved path.
+    """
+    from docx import Document
+
+    import main as console_main
+    from label_layout import add_cover_label, add_sheet_label, add_workorder_label
+    from .serials import is_serialized, piece_label_fields
+
+    index = FlowIndex(work_orders, sheets, stock)
+    picked = select_labels(index, selection)
+    if not picked:
+        raise ValueError("The selection does not contain any label.")
+
+    label_stock = index.stock
+    scale, barcode_width = label_stock.font_scale, label_stock.barcode_w_in
+    doc = Document()
+    label_stock.setup_document(doc)
+    table = None
+    current_page = None
+
+    for page, slot, (kind, sheet_number, wo_index) in picked:
+        if page != current_page:
+            if table is not None:
+                label_stock.add_page_break(doc)
+            table = label_stock.add_table(doc)
+            current_page = page
+
+        cell = label_stock.cell(table, slot)
+
+        if kind == "cover_lot":
+            add_cover_label(cell, lot_number, scale)
+        elif kind == "cover_wo":
+            wo = dict(work_orders[wo_index])
+            wo["qty_override"] = wo["total_qty"]
+            add_workorder_label(cell, wo, lot_number, scale, barcode_width, barcode_profile)
+        elif kind == "sheet":
+            add_sheet_label(cell, f"{sheet_number} - LOT # {lot_number}", scale)
+        elif is_serialized(work_orders[wo_index]):
+            # Same serial as in the original print
+            seq = index.piece_seq((page - FIRST_FLOW_PAGE) * index.slots_per_page + slot)
+            wo = piece_label_fields(work_orders[wo_index], lot_number, seq, index.wo_cum[wo_index][-1])
+            add_workorder_label(cell, wo, lot_number, scale, barcode_width, barcode_profile)
+        else:
+            wo = dict(work_orders[wo_index])
+            wo["hide_qty"] = True
+            add_workorder_label(cell, wo, lot_number, scale, barcode_width, barcode_profile)
+
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = console_main.sanitize_filename(f"LOT {lot_number} {color.strip().upper()} REPRINT")
+    filename = os.path.join(output_dir, f"{base_name}.docx")
+    save_docx(doc, filename)
+    return filename
+
+
+def main(argv: List[str] | None = None) -> int:
+    from .job_store import JobStore
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print('Usage: python -m core.reprint <job id> "sheets 3,5; wo 12345; pieces 10-20; pages 4-6"')
+        return 2
+
+    try:
+        job = JobStore().load_job(int(argv[0]))
+        if job is None:
+            raise ValueError(f"Job #{argv[0]} not found.")
+        path = generate_reprint_doc(job["lot"], job["work_orders"], job["sheets"],
+                                    parse_selection(argv[1]), job["color"], stock=job["stock"],
+                                    barcode_profile=job["barcode_profile"])
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
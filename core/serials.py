@@ -0,0 +1,221 @@
+"""
+Per-piece serialized barcodes.
+
+A serialized lot prints a unique barcode on every piece label instead of
+the WO's code. Numbers come from a named counter in the job store
+(core.job_store, SQLite): one block is reserved per lot when it is
+generated, so no two lots share a number, even from two processes. A lot
+that fails after the reservation leaves a gap; numbers are never reused.
+
+Serial templates (str.format fields, built-in names in TEMPLATES):
+    {code} {lot} {wo} {part}   WO / lot data
+    {seq}                      piece number of the WO in this lot (1..N)
+    {total}                    N
+    {serial}                   counter value (unique per counter)
+e.g. "{code}-{lot}-{seq:04d}" -> PLNM-4471-08811-0012
+
+The settings travel on each WO dict (serial_template, serial_counter,
+serial_first, serial_of_total), so they are stored with the job and a
+reprint prints the same serials. Piece labels then carry the serial as
+barcode + small text line, and optionally "n of N" instead of the QTY line.
+
+    python -m core.serials templates
+    python -m core.serials bench [--pieces 5000]    batch barcode rendering
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import string
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+WorkOrder = Dict[str, object]
+Sheet = Dict[str, object]
+
+TEMPLATES = {
+    "code-lot-seq": "{code}-{lot}-{seq:04d}",
+    "code-serial": "{code}-{serial:07d}",
+    "wo-seq": "{wo}-{seq:04d}",
+    "serial": "{serial:010d}",
+}
+DEFAULT_TEMPLATE = "code-lot-seq"
+DEFAULT_COUNTER = "default"
+SERIAL_FIELDS = ("serial_template", "serial_counter", "serial_first", "serial_of_total")
+
+PARALLEL_MIN = 2000  # barcodes; below this a process pool costs more than it saves
+
+
+class SerialError(ValueError):
+    """Serial template is invalid or produces values that cannot be printed."""
+
+
+def resolve_template(template: Optional[str]) -> str:
+    """Built-in template name or literal template -> template string."""
+    template = (template or DEFAULT_TEMPLATE).strip()
+    return TEMPLATES.get(template, template)
+
+
+def is_serialized(wo: WorkOrder) -> bool:
+    return wo.get("serial_first") is not None
+
+
+def format_serial(template: str, wo: WorkOrder, lot_number: str, seq: int, total: int, serial: int) -> str:
+    try:
+        return template.format(
+            code=str(wo.get("code", "")).strip(), lot=str(lot_number).strip(),
+            wo=str(wo.get("work_order", "")).strip(), part=str(wo.get("part", "")).strip(),
+            seq=seq, total=total, serial=serial,
+        )
+    except (KeyError, IndexError, ValueError) as e:
+        raise SerialError(f"Invalid serial template {template!r}: {e}")
+
+
+def serial_prefix(template: str, wo: WorkOrder, lot_number: str) -> Optional[str]:
+    """
+    Text every serial of the WO starts with: the template formatted up to its
+    first numbering field ({seq}, {total}). None for templates with {serial},
+    which are looked up by counter value instead (core.job_store.find_by_serial).
+    """
+    fields = {"code": str(wo.get("code", "")).strip(), "lot": str(lot_number).strip(),
+              "wo": str(wo.get("work_order", "")).strip(), "part": str(wo.get("part", "")).strip()}
+    parsed = list(string.Formatter().parse(template))
+    if any(name == "serial" for _, name, _, _ in parsed):
+        return None
+    out = []
+    for literal, name, spec, conversion in parsed:
+        out.append(literal)
+        if name is None:
+            continue
+        if name not in fields:
+            break  # {seq} / {total}: numbering starts here
+        value = string.Formatter().convert_field(fields[name], conversion)
+        out.append(format(value, spec or ""))
+    return "".join(out)
+
+
+def piece_serial(wo: WorkOrder, lot_number: str, seq: int, total: int) -> str:
+    """Serial of piece `seq` (1-based) of a serialized WO with `total` pieces in the lot."""
+    return format_serial(wo["serial_template"], wo, lot_number, seq, total, int(wo["serial_first"]) + seq - 1)
+
+
+def piece_label_fields(wo: WorkOrder, lot_number: str, seq: int, total: int) -> WorkOrder:
+    """WO dict for one piece label (label_layout.add_workorder_label flags)."""
+    value = piece_serial(wo, lot_number, seq, total)
+    out = dict(wo, code=value, serial_line=value, hide_qty=True)
+    if wo.get("serial_of_total"):
+        out["piece_of"] = (seq, total)
+    return out
+
+
+def piece_counts(work_orders: List[WorkOrder], sheets: List[Sheet]) -> List[int]:
+    counts = [0] * len(work_orders)
+    for sh in sheets:
+        for (i, q) in sh["allocations"]:
+            if int(q) > 0:
+                counts[int(i)] += int(q)
+    return counts
+
+
+def serialize_lot(lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet],
+                  template: Optional[str] = None, *, counter: str = DEFAULT_COUNTER,
+                  of_total: bool = False, store=None) -> List[WorkOrder]:
+    """
+    Reserve serial numbers for every piece of the lot and return copies of
+    the WOs with the serial fields set (the input list is not changed).
+    Raises SerialError if a serial would not be a printable Code128 value.
+    """
+    from .job_store import JobStore
+    from .preflight import code_problem
+
+    template = resolve_template(template)
+    counts = piece_counts(work_orders, sheets)
+    for i, wo in enumerate(work_orders):
+        format_serial(template, wo, lot_number, 1, counts[i], 1)  # bad template: fail before reserving
+
+    first = (store or JobStore()).reserve_serials(counter, sum(counts))
+    out: List[WorkOrder] = []
+    for i, wo in enumerate(work_orders):
+        wo = dict(wo, serial_template=template, serial_counter=counter, serial_first=first,
+                  serial_of_total=bool(of_total))
+        for seq in {1, counts[i]} - {0}:  # shortest / longest values of the block
+            value = piece_serial(wo, lot_number, seq, counts[i])
+            error = code_problem(value)
+            if error:
+                raise SerialError(f"WO {wo.get('work_order')}: serial {value!r}: {error}")
+        first += counts[i]
+        out.append(wo)
+    return out
+
+
+def lot_serials(lot_number: str, work_orders: List[WorkOrder], sheets: List[Sheet]) -> List[List[str]]:
+    """Serial values per WO in piece order ([] for WOs that are not serialized)."""
+    counts = piece_counts(work_orders, sheets)
+    return [[piece_serial(wo, lot_number, seq, n) for seq in range(1, n + 1)] if is_serialized(wo) else []
+            for wo, n in zip(work_orders, counts)]
+
+
+# ---------- Batch barcode images ----------
+def _render_chunk(values: Sequence[str], width_in: float, profile: str) -> List[bytes]:
+    from barcode_utils import barcode_picture
+    return [barcode_picture(v, width_in, profile).png for v in values]
+
+
+def render_barcodes(values: Sequence[str], workers: Optional[int] = None,
+                    width_in: float = 1.35, profile: Optional[str] = None) -> Dict[str, bytes]:
+    """
+    1-bit PNG per distinct value for a barcode slot width_in wide (same look
+    as barcode_utils, barcode profile `profile`, None = default). Large
+    batches are split over a process pool when more than one CPU is available.
+    """
+    from functools import partial
+    from .barcode_profiles import get_profile
+
+    render = partial(_render_chunk, width_in=width_in, profile=get_profile(profile).name)
+    values = list(dict.fromkeys(values))
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(values) >= PARALLEL_MIN:
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+
+        size = -(-len(values) // (workers * 4))
+        chunks = [values[k:k + size] for k in range(0, len(values), size)]
+        # spawn: the GUI process runs threads whose locks a forked worker could inherit held
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            images = [png for chunk in pool.map(render, chunks) for png in chunk]
+    else:
+        images = render(values)
+    return dict(zip(values, images))
+
+
+def png_size(png: bytes) -> Tuple[int, int]:
+    """(width, height) in pixels from the PNG header."""
+    return int.from_bytes(png[16:20], "big"), int.from_bytes(png[20:24], "big")
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Serialized barcodes.")
+    ap.add_argument("command", choices=["templates", "bench"])
+    ap.add_argument("--pieces", type=int, default=5000)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    if args.command == "templates":
+        wo = {"code": "PLNM-4471", "work_order": "12345", "part": "EC-100"}
+        for name, template in TEMPLATES.items():
+            print(f"{name:13} {template:24} {format_serial(template, wo, '08811', 12, 40, 1000012)}")
+        return 0
+
+    values = [f"PLNM-4471-08811-{n:05d}" for n in range(1, args.pieces + 1)]
+    t0 = time.perf_counter()
+    images = render_barcodes(values, args.workers)
+    dt = time.perf_counter() - t0
+    size = sum(len(png) for png in images.values())
+    print(f"{len(images)} barcodes in {dt * 1000:.0f} ms ({dt / len(images) * 1000:.3f} ms each), "
+          f"{size / len(images):.0f} bytes per PNG")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Batch edits of the nesting table (core.sheets_table_dialog).
+
+The table is a grid: one row per sheet, one column per WO, cells = qty.
+Each operation validates its whole block in one pass against the same
+rules as single-cell editing (non-negative integers, column total never
+above the WO's total_qty), and returns the new grid plus every problem
+found, so the dialog applies it in one update and shows one message.
+
+    paste_block          Excel/clipboard block (tab separated) at a cell
+    fill_down            first selected row copied into the rows below it
+    repeat_row           a sheet appended N more times
+    distribute_remaining remaining qty of each column spread over rows
+
+Cells that would push a column over its total are lowered to what is left
+(top to bottom), like the single-cell editor does.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+Grid = List[List[int]]
+Result = Tuple[Grid, List[str]]
+
+
+def parse_block(text: str) -> List[List[str]]:
+    """Clipboard text -> rows of cell strings (tabs from Excel; commas/semicolons as fallback)."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    while lines and not lines[-1].strip():
+        lines.pop()
+    sep = "\t" if "\t" in text else ";" if ";" in text else ","
+    return [line.split(sep) for line in lines]
+
+
+def _parse_qty(raw: str) -> Optional[int]:
+    raw = raw.strip()
+    if raw == "":
+        return 0
+    try:
+        value = int(float(raw)) if raw.endswith(".0") else int(raw)
+    except ValueError:
+        return None
+    return value if value >= 0 else None
+
+
+def _column_totals(grid: Grid, n_cols: int) -> List[int]:
+    totals = [0] * n_cols
+    for row in grid:
+        for c, v in enumerate(row):
+            totals[c] += v
+    return totals
+
+
+def _write(grid: Grid, totals: Sequence[int], cells: Sequence[Tuple[int, int, int]],
+           labels: Sequence[str], problems: List[str]) -> Grid:
+    """
+    New grid with `cells` ((row, col, value), in order) written. A column's
+    other cells keep their values; new values are lowered to what is left
+    of the column's total.
+    """
+    n_cols = len(totals)
+    out = [list(row) for row in grid]
+    need_rows = max((r for r, _, _ in cells), default=-1) + 1
+    while len(out) < need_rows:
+        out.append([0] * n_cols)
+
+    written = {(r, c) for r, c, _ in cells}
+    left = list(totals)
+    for r, row in enumerate(out):
+        for c, v in enumerate(row):
+            if (r, c) not in written:
+                left[c] -= v
+
+    lowered = [0] * n_cols
+    for r, c, v in cells:
+        allowed = max(0, min(v, left[c]))
+        if allowed < v:
+            lowered[c] += v - allowed
+        out[r][c] = allowed
+        left[c] -= allowed
+
+    for c, n in enumerate(lowered):
+        if n:
+            problems.append(f"{labels[c]}: {n} pcs over TOTAL QTY were not entered.")
+    return out
+
+
+def paste_block(grid: Grid, totals: Sequence[int], labels: Sequence[str], top: int, left: int,
+                block: List[List[str]]) -> Result:
+    """
+    Paste a block of cell strings with its top-left corner at (top, left).
+    Rows past the end become new sheets; columns past the last WO are dropped.
+    """
+    n_cols = len(totals)
+    problems: List[str] = []
+    cells: List[Tuple[int, int, int]] = []
+    dropped = 0
+    for i, values in enumerate(block):
+        for j, raw in enumerate(values):
+            r, c = top + i, left + j
+            if c >= n_cols:
+                dropped += 1 if raw.strip() else 0
+                continue
+            value = _parse_qty(raw)
+            if value is None:
+                problems.append(f"Sheet {r + 1}, {labels[c]}: {raw.strip()!r} is not a non-negative integer.")
+                continue
+            cells.append((r, c, value))
+    if dropped:
+        problems.append(f"{dropped} value(s) to the right of the last WO column were ignored.")
+    return _write(grid, totals, cells, labels, problems), problems
+
+
+def fill_down(grid: Grid, totals: Sequence[int], labels: Sequence[str], rows: Sequence[int],
+              cols: Sequence[int]) -> Result:
+    """Copy the first of `rows` into the other selected rows (selected columns only)."""
+    problems: List[str] = []
+    rows = sorted(set(rows))
+    if len(rows) < 2:
+        return grid, ["Select at least two sheet rows to fill down."]
+    source = grid[rows[0]]
+    cells = [(r, c, source[c]) for r in rows[1:] for c in sorted(set(cols))]
+    return _write(grid, totals, cells, labels, problems), problems
+
+
+def repeat_row(grid: Grid, totals: Sequence[int], labels: Sequence[str], row: int, times: int) -> Result:
+    """Append `times` copies of a sheet; only as many as the remaining totals allow."""
+    problems: List[str] = []
+    source = grid[row]
+    remaining = [t - s for t, s in zip(totals, _column_totals(grid, len(totals)))]
+    fit = min((remaining[c] // v for c, v in enumerate(source) if v > 0), default=0)
+    if not any(source):
+        return grid, [f"Sheet {row + 1} is empty."]
+    if fit < times:
+        limiting = [labels[c] for c, v in enumerate(source) if v > 0 and remaining[c] // v == fit]
+        problems.append(f"Only {fit} of {times} copies of sheet {row + 1} fit "
+                        f"(limited by {', '.join(limiting)}).")
+    return [list(r) for r in grid] + [list(source) for _ in range(max(0, min(fit, times)))], problems
+
+
+def distribute_remaining(grid: Grid, totals: Sequence[int], labels: Sequence[str], rows: Sequence[int],
+                         cols: Sequence[int]) -> Result:
+    """Spread what is left of each selected column evenly over the selected rows (first rows get the rest)."""
+    problems: List[str] = []
+    rows = sorted(set(rows))
+    if not rows:
+        return grid, ["Select the sheet rows to distribute over."]
+    column_totals = _column_totals(grid, len(totals))
+    cells: List[Tuple[int, int, int]] = []
+    for c in sorted(set(cols)):
+        remaining = totals[c] - column_totals[c]
+        if remaining <= 0:
+            continue
+        share, extra = divmod(remaining, len(rows))
+        cells.extend((r, c, grid[r][c] + share + (1 if k < extra else 0)) for k, r in enumerate(rows))
+    if not cells:
+        problems.append("Nothing left to distribute in the selected columns.")
+    return _write(grid, totals, cells, labels, problems), problems
@@ -3,11 +3,15 @@ from __future__ import annotations
 from typing import List, Dict, Optional
 
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QAction, QKeySequence
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QLabel, QHeaderView
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+    QTableWidget, QTableWidgetItem, QMessageBox, QLabel, QHeaderView, QFileDialog, QInputDialog
 )
 
+from . import sheet_edit
+from .nest_import import DEFAULT_PROFILE_NAME, NestImportError, import_nest_report, load_profiles
+
 WorkOrder = Dict[str, object]
 Sheet = Dict[str, object]
 
@@ -22,6 +26,8 @@ class SheetsTableDialog(QDialog):
     - Real-time "Remaining" table updates
     - Hard rule: Column totals can NEVER exceed each WO total_qty (enforced live)
     - Save rule: Column totals MUST equal each WO total_qty
+    - Batch edits (paste block, fill down, repeat sheet, distribute remaining)
+      are validated together (core.sheet_edit) and applied in one update
     """
 
     def __init__(self, parent, work_orders: List[WorkOrder], initial_sheets: Optional[List[Sheet]] = None):
@@ -64,29 +70,10 @@ class SheetsTableDialog(QDialog):
 
         # Rows: preload if initial_sheets provided
         if initial_sheets and len(initial_sheets) > 0:
-            self.table.setRowCount(len(initial_sheets))
+            self._fill_sheets(initial_sheets)
         else:
             self.table.setRowCount(1)
-
-        self._refresh_sheet_row_headers()
-
-        if initial_sheets and len(initial_sheets) > 0:
-            by_sheet = {}
-            for sh in initial_sheets:
-                sn = int(sh.get("sheet_number", 0))
-                allocs = {int(i): int(q) for (i, q) in sh.get("allocations", [])}
-                by_sheet[sn] = allocs
-
-            for r in range(self.table.rowCount()):
-                sn = r + 1
-                allocs = by_sheet.get(sn, {})
-                for c in range(self.table.columnCount()):
-                    val = int(allocs.get(c, 0))
-                    item = QTableWidgetItem(str(val))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.table.setItem(r, c, item)
-                    self._last_valid[(r, c)] = val
-        else:
+            self._refresh_sheet_row_headers()
             self._init_row(0)
 
         # Remaining table (right side)
@@ -106,10 +93,19 @@ class SheetsTableDialog(QDialog):
         btn_row = QHBoxLayout()
         self.add_sheet_btn = QPushButton("Add Sheet")
         self.remove_sheet_btn = QPushButton("Remove Selected Sheet(s)")
+        self.import_btn = QPushButton("Import Nest Report...")
+        self.paste_btn = QPushButton("Paste")
+        self.fill_down_btn = QPushButton("Fill Down")
+        self.repeat_btn = QPushButton("Repeat Sheet...")
+        self.distribute_btn = QPushButton("Distribute Remaining")
         self.save_btn = QPushButton("Save")
         self.cancel_btn = QPushButton("Cancel")
         btn_row.addWidget(self.add_sheet_btn)
         btn_row.addWidget(self.remove_sheet_btn)
+        btn_row.addWidget(self.import_btn)
+        btn_row.addSpacing(12)
+        for btn in (self.paste_btn, self.fill_down_btn, self.repeat_btn, self.distribute_btn):
+            btn_row.addWidget(btn)
         btn_row.addStretch(1)
         btn_row.addWidget(self.save_btn)
         btn_row.addWidget(self.cancel_btn)
@@ -117,11 +113,23 @@ class SheetsTableDialog(QDialog):
 
         self.add_sheet_btn.clicked.connect(self._add_sheet)
         self.remove_sheet_btn.clicked.connect(self._remove_selected_sheets)
+        self.import_btn.clicked.connect(self._import_nest_report)
+        self.paste_btn.clicked.connect(self._paste)
+        self.fill_down_btn.clicked.connect(self._fill_down)
+        self.repeat_btn.clicked.connect(self._repeat_sheet)
+        self.distribute_btn.clicked.connect(self._distribute_remaining)
         self.save_btn.clicked.connect(self._save)
         self.cancel_btn.clicked.connect(self.reject)
 
         self.table.itemChanged.connect(self._on_item_changed)
 
+        # Ctrl+V on the table pastes the clipboard block instead of editing one cell
+        paste_action = QAction("Paste", self.table)
+        paste_action.setShortcut(QKeySequence.Paste)
+        paste_action.setShortcutContext(Qt.WidgetShortcut)
+        paste_action.triggered.connect(self._paste)
+        self.table.addAction(paste_action)
+
     # ---------- Init helpers ----------
     def _refresh_sheet_row_headers(self):
         labels = [f"Sheet {r+1}" for r in range(self.table.rowCount())]
@@ -134,6 +142,30 @@ class SheetsTableDialog(QDialog):
             self.table.setItem(r, c, item)
             self._last_valid[(r, c)] = 0
 
+    def _fill_sheets(self, sheets: List[Sheet]):
+        by_sheet = {}
+        for sh in sheets:
+            sn = int(sh.get("sheet_number", 0))
+            allocs = {int(i): int(q) for (i, q) in sh.get("allocations", [])}
+            by_sheet[sn] = allocs
+
+        self._updating = True
+        try:
+            self.table.setRowCount(len(sheets))
+            self._last_valid = {}
+            for r in range(self.table.rowCount()):
+                sn = r + 1
+                allocs = by_sheet.get(sn, {})
+                for c in range(self.table.columnCount()):
+                    val = int(allocs.get(c, 0))
+                    item = QTableWidgetItem(str(val))
+                    item.setTextAlignment(Qt.AlignCenter)
+                    self.table.setItem(r, c, item)
+                    self._last_valid[(r, c)] = val
+        finally:
+            self._updating = False
+        self._refresh_sheet_row_headers()
+
     def _init_remaining_table(self):
         for r, wo in enumerate(self.work_orders):
             part = str(wo.get("part", "")).strip()
@@ -276,6 +308,130 @@ class SheetsTableDialog(QDialog):
         self._refresh_sheet_row_headers()
         self._update_remaining_table()
 
+    # ---------- Batch edits ----------
+    def _grid(self) -> List[List[int]]:
+        return [[self._cell_value(r, c) for c in range(self.table.columnCount())]
+                for r in range(self.table.rowCount())]
+
+    def _totals(self) -> List[int]:
+        return [self._expected_total(c) for c in range(self.table.columnCount())]
+
+    def _column_labels(self) -> List[str]:
+        return [f"WO {str(wo.get('work_order', '')).strip()}" for wo in self.work_orders]
+
+    def _selection(self):
+        """(rows, cols) covered by the selection; the current cell if nothing is selected."""
+        indexes = self.table.selectedIndexes()
+        if not indexes and self.table.currentRow() >= 0:
+            return [self.table.currentRow()], [self.table.currentColumn()]
+        return sorted({i.row() for i in indexes}), sorted({i.column() for i in indexes})
+
+    def _apply_grid(self, grid: List[List[int]]):
+        """
+        Write a whole grid in one update: signals blocked, only changed cells
+        touched, remaining table and row headers refreshed once at the end.
+        """
+        self._updating = True
+        self.table.blockSignals(True)
+        self.table.setUpdatesEnabled(False)
+        try:
+            old_rows = self.table.rowCount()
+            if len(grid) > old_rows:
+                self.table.setRowCount(len(grid))
+            for r, row in enumerate(grid):
+                for c, val in enumerate(row):
+                    it = self.table.item(r, c)
+                    if it is None:
+                        it = QTableWidgetItem(str(val))
+                        it.setTextAlignment(Qt.AlignCenter)
+                        self.table.setItem(r, c, it)
+                    elif r >= old_rows or self._last_valid.get((r, c)) != val or it.text().strip() != str(val):
+                        it.setText(str(val))
+                    self._last_valid[(r, c)] = val
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.blockSignals(False)
+            self._updating = False
+        self._refresh_sheet_row_headers()
+        self._update_remaining_table()
+
+    def _run_batch(self, title: str, grid: List[List[int]], problems: List[str]):
+        self._apply_grid(grid)
+        if problems:
+            shown = problems[:30]
+            if len(problems) > len(shown):
+                shown.append(f"... and {len(problems) - len(shown)} more")
+            QMessageBox.warning(self, title, "\n".join(shown))
+
+    def _paste(self):
+        block = sheet_edit.parse_block(QApplication.clipboard().text())
+        if not block:
+            return
+        rows, cols = self._selection()
+        top, left = (rows[0], cols[0]) if rows else (0, 0)
+        grid, problems = sheet_edit.paste_block(self._grid(), self._totals(), self._column_labels(), top, left, block)
+        self._run_batch("Paste", grid, problems)
+
+    def _fill_down(self):
+        rows, cols = self._selection()
+        grid, problems = sheet_edit.fill_down(self._grid(), self._totals(), self._column_labels(), rows, cols)
+        self._run_batch("Fill Down", grid, problems)
+
+    def _repeat_sheet(self):
+        rows, _ = self._selection()
+        if len(rows) != 1:
+            QMessageBox.information(self, "Repeat Sheet", "Select a cell in the sheet row you want to repeat.")
+            return
+        times, ok = QInputDialog.getInt(self, "Repeat Sheet", f"Add copies of Sheet {rows[0] + 1}:", 1, 1, 10000)
+        if not ok:
+            return
+        grid, problems = sheet_edit.repeat_row(self._grid(), self._totals(), self._column_labels(), rows[0], times)
+        self._run_batch("Repeat Sheet", grid, problems)
+
+    def _distribute_remaining(self):
+        rows, cols = self._selection()
+        grid, problems = sheet_edit.distribute_remaining(
+            self._grid(), self._totals(), self._column_labels(), rows, cols)
+        self._run_batch("Distribute Remaining", grid, problems)
+
+    def _import_nest_report(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Nest Report", "", "CAM nest reports (*.csv *.xml);;All files (*)"
+        )
+        if not path:
+            return
+
+        profiles = load_profiles()
+        default = "xml" if path.lower().endswith(".xml") else DEFAULT_PROFILE_NAME
+        names = list(profiles)
+        name, ok = QInputDialog.getItem(self, "Nest report profile", "Report format:",
+                                        names, names.index(default), False)
+        if not ok:
+            return
+
+        try:
+            sheets, errors = import_nest_report(path, profiles[name], self.work_orders)
+        except (NestImportError, OSError) as e:
+            QMessageBox.warning(self, "Import", f"Cannot import nest report:\n{e}")
+            return
+
+        if not sheets:
+            QMessageBox.warning(self, "Import", "No sheets found in the report.\n\n" + "\n".join(errors[:30]))
+            return
+
+        self._fill_sheets(sheets)
+        self._update_remaining_table()
+
+        if errors:
+            shown = errors[:30]
+            if len(errors) > len(shown):
+                shown.append(f"... and {len(errors) - len(shown)} more")
+            QMessageBox.warning(
+                self, "Import",
+                f"Imported {len(sheets)} sheet(s), but the report does not match the Work Orders:\n\n"
+                + "\n".join(shown) + "\n\nFix the allocations before saving."
+            )
+
     # ---------- Save ----------
     def _save(self):
         totals = [0] * len(self.work_orders)
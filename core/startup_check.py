@@ -0,0 +1,118 @@
+"""
+Startup import budget check (uses `python -X importtime`).
+
+    python -m core.startup_check                 # GUI + CLI entry modules
+    python -m core.startup_check --budget-ms 250
+    python -m core.startup_check --allow-missing  # skip entries that cannot be imported here
+
+Fails (exit code 1) if an entry module cannot be imported, takes longer than
+the budget to import, or pulls in the generation stack (python-docx, lxml,
+python-barcode, Pillow), which must only load on first generation.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Modules that must NOT be imported just to show the window / first prompt
+HEAVY_MODULES = ("docx", "lxml", "barcode", "PIL", "label_layout")
+
+# entry name -> module imported at startup
+ENTRY_POINTS = {
+    "gui": "app.ui_main",
+    "cli": "main",
+}
+
+DEFAULT_BUDGET_MS = 300.0
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module: str) -> Dict[str, int]:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns {module_name: cumulative_us} for every module imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"Cannot import {module}: {last[0]}")
+
+    times: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        times[parts[2].strip()] = cumulative
+    return times
+
+
+def check_entry(module: str, budget_ms: float) -> Tuple[float, List[str]]:
+    """Returns (import time in ms, list of problems)."""
+    times = measure_imports(module)
+    total_ms = times.get(module, 0) / 1000.0
+    problems: List[str] = []
+
+    if total_ms > budget_ms:
+        problems.append(f"import {module} took {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+
+    for name in times:
+        top = name.split(".")[0]
+        if top in HEAVY_MODULES and name == top:
+            problems.append(f"import {module} loads heavy module '{name}' at startup")
+
+    return total_ms, problems
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Check startup import time budget.")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    ap.add_argument("entries", nargs="*", metavar="ENTRY",
+                    help=f"Entry points to check: {', '.join(ENTRY_POINTS)} (default: all)")
+    ap.add_argument("--allow-missing", action="store_true",
+                    help="Skip entry points whose module cannot be imported (e.g. PySide6 not installed)")
+    args = ap.parse_args(argv)
+
+    unknown = [e for e in args.entries if e not in ENTRY_POINTS]
+    if unknown:
+        ap.error(f"unknown entry point(s): {', '.join(unknown)}")
+
+    failed = False
+    for entry in args.entries or list(ENTRY_POINTS):
+        module = ENTRY_POINTS[entry]
+        try:
+            total_ms, problems = check_entry(module, args.budget_ms)
+        except RuntimeError as e:
+            if args.allow_missing:
+                print(f"[{entry}] SKIP: {e}")
+                continue
+            print(f"[{entry}] FAIL: {e}")
+            failed = True
+            continue
+
+        status = "OK" if not problems else "FAIL"
+        print(f"[{entry}] {status}: import {module} = {total_ms:.1f} ms")
+        for p in problems:
+            print(f"    - {p}")
+        failed = failed or bool(problems)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
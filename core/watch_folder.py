@@ -0,0 +1,486 @@
+"""
+Watch-folder service: generate labels for job files dropped in an inbox.
+
+    python -m core.watch_folder [ROOT] [--workers 2] [--barcode-profile zebra-203]
+
+Folder layout under ROOT (default "watch"):
+    inbox/       drop <name>.json here (write to <name>.json.tmp, then rename)
+    processing/  claimed jobs (atomic rename from inbox)
+    done/        finished jobs + <name>.manifest.json (output path, timings)
+    failed/      rejected/failed jobs + <name>.manifest.json (error)
+
+Job file:
+    {"lot": "08811", "color": "WHITE",
+     "work_orders": [{"part": ..., "tag_desc": ..., "code": ..., "work_order": ..., "total_qty": 12}],
+     "sheets": [{"sheet_number": 1, "allocations": [[0, 6], [1, 0]]}]}
+"barcode_profile" is optional (core.barcode_profiles); without it the job
+gets the service's --barcode-profile.
+
+Inbox changes are picked up through filesystem events (watchdog, if
+installed) with a slow rescan as safety net; without watchdog the inbox is
+rescanned every --poll-interval seconds. Jobs run in a bounded process pool
+whose workers import python-docx/lxml/Pillow/label_layout once at start and
+keep their render cache between jobs.
+
+Restarts: a job only leaves processing/ after its manifest is written, so on
+start-up anything left in processing/ is run again. If its manifest already
+exists (crash between manifest and move), the job is only moved.
+
+Worker crashes: a job whose worker process died is counted in
+processing/<name>.json.crashes and retried on its own (nothing else runs
+meanwhile, so the next crash is its own). After MAX_WORKER_CRASHES it is
+filed in failed/ with error_type "WorkerCrashed".
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+JOB_SUFFIX = ".json"
+MANIFEST_SUFFIX = ".manifest.json"
+CRASHES_SUFFIX = ".crashes"
+FOLDERS = ("inbox", "processing", "done", "failed")
+
+DEFAULT_ROOT = "watch"
+DEFAULT_WORKERS = 2
+POLL_INTERVAL = 1.0      # seconds, without filesystem events
+RESCAN_INTERVAL = 10.0   # seconds, safety net with filesystem events
+MAX_WORKER_CRASHES = 3   # a job that takes its worker down this often is filed as failed
+
+
+class JobFileError(ValueError):
+    """Job file is not valid (bad JSON, missing fields, totals mismatch)."""
+
+
+# ---------- Job files ----------
+def load_job_file(path: str, barcode_profile: Optional[str] = None) -> dict:
+    """Read and validate a job file; raises JobFileError with all problems."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise JobFileError(f"Invalid JSON: {e}")
+    return parse_job(data, barcode_profile)
+
+
+def parse_job(data, barcode_profile: Optional[str] = None) -> dict:
+    """
+    Validate a job dict (job file format); raises JobFileError with all problems.
+    The job's own "barcode_profile" wins over `barcode_profile` (None = default).
+    """
+    from .barcode_profiles import BarcodeProfileError, get_profile
+    from .flow_logic import MAX_WORK_ORDERS, WO_FIELDS, validate_work_order_row
+
+    if not isinstance(data, dict):
+        raise JobFileError("Job file must contain a JSON object.")
+
+    errors: List[str] = []
+    lot = str(data.get("lot", "")).strip()
+    color = str(data.get("color", "")).strip().upper()
+    if not lot:
+        errors.append("'lot' is required.")
+    if not color:
+        errors.append("'color' is required.")
+    try:
+        barcode_profile = get_profile(str(data.get("barcode_profile") or "").strip() or barcode_profile).name
+    except BarcodeProfileError as e:
+        errors.append(str(e))
+
+    rows = data.get("work_orders") or []
+    if not isinstance(rows, list):
+        errors.append("'work_orders' must be a list.")
+        rows = []
+    work_orders = []
+    for n, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append(f"Work order {n}: must be an object.")
+            continue
+        wo, error = validate_work_order_row(*(str(row.get(f, "")) for f in WO_FIELDS))
+        if error:
+            errors.append(f"Work order {n}: {error}")
+        elif wo is not None:
+            wo["remaining"] = 0
+            work_orders.append(wo)
+    if not work_orders and not data.get("work_orders"):
+        errors.append("'work_orders' is empty.")
+    if len(work_orders) > MAX_WORK_ORDERS:
+        errors.append(f"Maximum {MAX_WORK_ORDERS} Work Orders allowed (found {len(work_orders)}).")
+
+    sheets = []
+    totals = [0] * len(work_orders)
+    raw_sheets = data.get("sheets") or []
+    if not isinstance(raw_sheets, list):
+        errors.append("'sheets' must be a list.")
+        raw_sheets = []
+    for n, sh in enumerate(raw_sheets, start=1):
+        if not isinstance(sh, dict):
+            errors.append(f"Sheet {n}: must be an object.")
+            continue
+        try:
+            sheet_number = int(sh.get("sheet_number", n))
+        except (TypeError, ValueError):
+            errors.append(f"Sheet {n}: invalid sheet_number {sh.get('sheet_number')!r}.")
+            continue
+        try:
+            allocations = [(int(i), int(q)) for (i, q) in sh["allocations"]]
+            for i, q in allocations:
+                if q < 0 or not 0 <= i < len(work_orders):
+                    raise ValueError
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"Sheet {n}: invalid allocations.")
+            continue
+        for i, q in allocations:
+            totals[i] += q
+        sheets.append({"sheet_number": sheet_number, "allocations": allocations})
+    if not sheets and not data.get("sheets"):
+        errors.append("'sheets' is empty.")
+
+    for i, wo in enumerate(work_orders):
+        if totals[i] != wo["total_qty"]:
+            errors.append(f"WO {wo['work_order']} | PART {wo['part']}: "
+                          f"sheets total = {totals[i]} / expected = {wo['total_qty']}")
+
+    if not errors:
+        # Data checks only (text, sheet numbers); output is checked when generating
+        from .preflight import preflight
+        errors = preflight(lot, work_orders, sheets, colors=[color], output_dir=None)
+
+    if errors:
+        raise JobFileError("\n".join(errors))
+    return {"lot": lot, "color": color, "work_orders": work_orders, "sheets": sheets,
+            "barcode_profile": barcode_profile}
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ---------- Worker process ----------
+def warm_up_worker() -> None:
+    """Process pool initializer: import the generation stack once per worker."""
+    from .docx_adapter import _load_generation_stack
+    from .metrics import set_source
+    set_source("batch")
+    _load_generation_stack()
+
+
+def _run_job(path: str, barcode_profile: Optional[str] = None) -> dict:
+    """Runs in a worker process. Returns the manifest fields of a finished job."""
+    return generate_job(load_job_file(path, barcode_profile))
+
+
+def generate_job(job: dict, output_dir: str = "output", record: bool = True) -> dict:
+    """
+    Generate a validated job (parse_job) in this process; returns output path + timing.
+    record=False skips the job store and metrics log.
+    """
+    from .docx_adapter import generate_doc_with_gui_color
+
+    t0 = time.perf_counter()
+    output_path = generate_doc_with_gui_color(job["lot"], job["work_orders"], job["sheets"], job["color"],
+                                              output_dir=output_dir, record=record,
+                                              barcode_profile=job.get("barcode_profile"))
+    return {
+        "lot": job["lot"],
+        "color": job["color"],
+        "barcode_profile": job.get("barcode_profile"),
+        "output_path": os.path.abspath(output_path),
+        "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "worker_pid": os.getpid(),
+    }
+
+
+# ---------- Service ----------
+class WatchFolderService:
+    def __init__(self, root: str = DEFAULT_ROOT, workers: int = DEFAULT_WORKERS,
+                 poll_interval: float = POLL_INTERVAL, barcode_profile: Optional[str] = None):
+        from .barcode_profiles import get_profile
+
+        self.root = os.path.abspath(root)
+        self.dirs = {name: os.path.join(self.root, name) for name in FOLDERS}
+        self.workers = max(1, int(workers))
+        self.max_in_flight = self.workers * 2  # the rest waits in inbox/
+        self.poll_interval = poll_interval
+        # Passed to every job: spawned workers (Windows) do not inherit this process's state
+        self.barcode_profile = get_profile(barcode_profile).name
+
+        self._wake: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Tuple[Future, str, str]] = {}  # name -> (future, sha256, started_at)
+        self._suspects: Set[str] = set()  # jobs in processing/ whose worker died: run alone
+        self._unfiled: Set[str] = set()   # finished but could not be filed: not rerun until restart
+        self._stop = threading.Event()
+        self._pool_broken = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._observer = None
+
+    # ----- folders -----
+    def _path(self, folder: str, name: str) -> str:
+        return os.path.join(self.dirs[folder], name)
+
+    def _manifest_path(self, folder: str, name: str) -> str:
+        return self._path(folder, name[: -len(JOB_SUFFIX)] + MANIFEST_SUFFIX)
+
+    def _crashes_path(self, name: str) -> str:
+        return self._path("processing", name + CRASHES_SUFFIX)
+
+    def _crashes(self, name: str) -> int:
+        try:
+            with open(self._crashes_path(name), "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _record_crash(self, name: str) -> int:
+        crashes = self._crashes(name) + 1
+        tmp = self._crashes_path(name) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(crashes))
+        os.replace(tmp, self._crashes_path(name))
+        return crashes
+
+    def _list_jobs(self, folder: str) -> List[str]:
+        with os.scandir(self.dirs[folder]) as it:
+            names = [e.name for e in it
+                     if e.is_file() and e.name.endswith(JOB_SUFFIX) and not e.name.endswith(MANIFEST_SUFFIX)]
+        return sorted(names, key=lambda n: os.path.getmtime(self._path(folder, n)))
+
+    # ----- lifecycle -----
+    def start(self) -> None:
+        for d in self.dirs.values():
+            os.makedirs(d, exist_ok=True)
+        self._executor = self._new_pool()
+        self._start_observer()
+        self._recover()
+        print(f"✅ Watching {self.dirs['inbox']} ({self.workers} worker(s), "
+              f"{'filesystem events' if self._observer else f'polling every {self.poll_interval:g}s'})")
+
+    def request_stop(self) -> None:
+        self._stop.set()
+        self._wake.put(None)
+
+    def stop(self) -> None:
+        self.request_stop()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._executor is not None:
+            # Running jobs finish and are filed; queued ones stay in processing/ for the next start
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def run_forever(self) -> None:
+        self.start()
+        try:
+            interval = RESCAN_INTERVAL if self._observer is not None else self.poll_interval
+            while not self._stop.is_set():
+                if self._pool_broken.is_set():
+                    self._restart_pool()
+                self._recover()  # crashed jobs waiting for a retry
+                self._claim_ready()
+                try:
+                    self._wake.get(timeout=interval)
+                except queue.Empty:
+                    pass
+        except KeyboardInterrupt:
+            print("\nStopping (waiting for running jobs)...")
+        finally:
+            self.stop()
+
+    def _restart_pool(self) -> None:
+        self._pool_broken.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: this process runs the observer and executor threads, whose
+        # locks a forked worker could inherit held (same start method as on Windows)
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                   initializer=warm_up_worker)
+
+    def _start_observer(self) -> None:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("⚠️ watchdog is not installed; falling back to polling the inbox.")
+            return
+
+        wake = self._wake
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    wake.put(getattr(event, "dest_path", None) or event.src_path)
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), self.dirs["inbox"], recursive=False)
+        self._observer.start()
+
+    # ----- jobs -----
+    def _recover(self) -> None:
+        """Resume jobs waiting in processing/: left by a previous run, or retried after a worker crash."""
+        pending = []
+        for name in self._list_jobs("processing"):
+            with self._lock:
+                if name in self._in_flight or name in self._unfiled:
+                    continue
+            manifest = self._manifest_path("done", name)
+            if os.path.exists(manifest) or os.path.exists(self._manifest_path("failed", name)):
+                folder = "done" if os.path.exists(manifest) else "failed"
+                self._move(name, folder)
+                print(f"↪ {name}: already {folder}, filed.")
+                continue
+            if self._crashes(name):
+                self._suspects.add(name)
+            pending.append(name)
+
+        with self._lock:
+            running = set(self._in_flight)
+        if running & self._suspects:
+            return  # a crashed job is being retried alone
+        suspects = [name for name in pending if name in self._suspects]
+        if suspects:
+            if not running:
+                print(f"↪ {suspects[0]}: retried alone after a worker crash.")
+                self._submit(suspects[0])
+            return  # wait until the pool is idle
+        for name in pending:
+            print(f"↪ {name}: resumed.")
+            self._submit(name)
+
+    def _claim_ready(self) -> None:
+        if self._suspects:
+            return  # new jobs wait until crashed jobs are retried
+        for name in self._list_jobs("inbox"):
+            with self._lock:
+                if len(self._in_flight) >= self.max_in_flight:
+                    return
+            for folder in ("done", "failed"):
+                if os.path.exists(self._path(folder, name)):
+                    # Same name already handled: keep both, never overwrite a result
+                    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+                    renamed = f"{name[: -len(JOB_SUFFIX)]}-{stamp}{JOB_SUFFIX}"
+                    os.replace(self._path("inbox", name), self._path("inbox", renamed))
+                    name = renamed
+                    break
+            try:
+                os.replace(self._path("inbox", name), self._path("processing", name))
+            except FileNotFoundError:
+                continue  # removed by the sender meanwhile
+            self._submit(name)
+
+    def _submit(self, name: str) -> None:
+        path = self._path("processing", name)
+        sha = _sha256(path)
+        started_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            try:
+                future = self._executor.submit(_run_job, path, self.barcode_profile)
+            except (BrokenProcessPool, RuntimeError):
+                # Pool died (or is being replaced) meanwhile: stays in processing/ for the next pass
+                self._pool_broken.set()
+                self._wake.put(None)
+                return
+            self._in_flight[name] = (future, sha, started_at)
+        future.add_done_callback(lambda f, name=name: self._finish(name, f))
+
+    def _move(self, name: str, folder: str) -> None:
+        os.replace(self._path("processing", name), self._path(folder, name))
+        try:
+            os.remove(self._crashes_path(name))
+        except FileNotFoundError:
+            pass
+        self._suspects.discard(name)
+
+    def _finish(self, name: str, future: Future) -> None:
+        # Runs on the executor's thread: an exception here would be swallowed
+        with self._lock:
+            _, sha, started_at = self._in_flight[name]
+        try:
+            if future.cancelled():
+                return  # shutting down; stays in processing/
+
+            manifest = {"job": name, "sha256": sha, "started_at": started_at,
+                        "finished_at": datetime.now().isoformat(timespec="seconds")}
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                # A worker died (not necessarily this job's fault): retry alone with a new pool
+                self._pool_broken.set()
+                crashes = self._record_crash(name)
+                self._suspects.add(name)
+                if crashes < MAX_WORKER_CRASHES:
+                    print(f"⚠️ {name}: worker process died ({crashes}/{MAX_WORKER_CRASHES}), job will be retried.")
+                    return
+                manifest.update(status="failed", error_type="WorkerCrashed",
+                                error=f"Worker process died {crashes} times while running this job.")
+                folder = "failed"
+                print(f"❌ {name}: {manifest['error']}")
+            elif error is None:
+                manifest.update(status="done", **future.result())
+                folder = "done"
+                print(f"✅ {name} -> {manifest['output_path']} ({manifest['duration_ms']:.0f} ms)")
+            else:
+                manifest.update(status="failed", error=str(error), error_type=type(error).__name__)
+                folder = "failed"
+                print(f"❌ {name}: {error}")
+
+            _write_json_atomic(self._manifest_path(folder, name), manifest)
+            self._move(name, folder)
+        except Exception as e:
+            self._unfiled.add(name)
+            print(f"❌ {name}: could not file the job ({type(e).__name__}: {e}); "
+                  "it stays in processing/ until the service restarts.")
+        finally:
+            with self._lock:
+                self._in_flight.pop(name, None)
+            self._wake.put(None)  # a slot is free: claim the next waiting job
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Generate labels for job files dropped in a watch folder.")
+    ap.add_argument("root", nargs="?", default=DEFAULT_ROOT)
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                    help="Inbox rescan interval when watchdog is not installed (seconds)")
+    ap.add_argument("--barcode-profile", default=None,
+                    help="Barcode profile for jobs that do not name one (core.barcode_profiles)")
+    args = ap.parse_args(argv)
+
+    try:
+        service = WatchFolderService(args.root, args.workers, args.poll_interval, args.barcode_profile)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    # Service managers stop with SIGTERM: finish running jobs like on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: service.request_stop())
+    service.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
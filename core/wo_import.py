@@ -0,0 +1,216 @@
+"""
+Bulk Work Order import from ERP exports (CSV / XLSX).
+
+Rows are streamed (csv.reader over the open file, openpyxl read-only
+iter_rows for XLSX), so large exports are never loaded whole. Columns are
+mapped to WO fields through a named import profile; every row is validated
+with the same rules as the Work Orders table (flow_logic.validate_work_order_row)
+and all problems are reported at once with their file line numbers.
+
+Profile (saved in config/import_profiles.json):
+    {
+      "columns": {"part": "Item", "tag_desc": "Description", "code": "PLNM",
+                  "work_order": "WO", "total_qty": "Qty", "lot": "Lot"},
+      "delimiter": ",",          # CSV only
+      "sheet": null              # XLSX worksheet name (null = first)
+    }
+"lot" is optional: when set, only rows for the requested lot are imported.
+
+    python -m core.wo_import export.csv [--profile NAME] [--lot 08811]
+    python -m core.wo_import --save-profile erp --column part=Item --column total_qty=Qty ...
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .flow_logic import MAX_WORK_ORDERS, WO_FIELDS, validate_work_order_row
+
+WorkOrder = Dict[str, object]
+Profile = Dict[str, object]
+
+PROFILES_PATH = os.path.join("config", "import_profiles.json")
+
+# Matches the Work Orders table headers (EditWorkOrdersDialog.HEADERS)
+DEFAULT_PROFILE_NAME = "table"
+DEFAULT_PROFILE: Profile = {
+    "columns": {
+        "part": "EC-Part #",
+        "tag_desc": "TAG + DESCRIPTION",
+        "code": "PLNM-Part #",
+        "work_order": "WO #",
+        "total_qty": "TOTAL QTY",
+    },
+    "delimiter": ",",
+    "sheet": None,
+}
+
+
+class WorkOrderImportError(ValueError):
+    """File cannot be read with the given profile (missing columns, bad format)."""
+
+
+# ---------- Profiles ----------
+def load_profiles(path: str = PROFILES_PATH) -> Dict[str, Profile]:
+    profiles: Dict[str, Profile] = {DEFAULT_PROFILE_NAME: DEFAULT_PROFILE}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles.update(json.load(f))
+    return profiles
+
+
+def save_profile(name: str, profile: Profile, path: str = PROFILES_PATH) -> None:
+    stored: Dict[str, Profile] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    stored[name] = profile
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2)
+
+
+# ---------- Streaming readers ----------
+def _iter_csv(path: str, profile: Profile) -> Iterator[Tuple[int, list]]:
+    # utf-8-sig: Excel "CSV UTF-8" exports start with a BOM
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=str(profile.get("delimiter") or ","))
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _iter_xlsx(path: str, profile: Profile) -> Iterator[Tuple[int, list]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise WorkOrderImportError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet_name = profile.get("sheet")
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        for line_no, row in enumerate(ws.iter_rows(values_only=True), start=1):
+            yield line_no, ["" if v is None else v for v in row]
+    finally:
+        wb.close()
+
+
+def _cell_text(value) -> str:
+    # Excel gives numbers as floats: 12345.0 -> "12345"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_rows(path: str, profile: Profile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (line number, {field: text}) for every data row after the header."""
+    ext = os.path.splitext(path)[1].lower()
+    rows = _iter_xlsx(path, profile) if ext in (".xlsx", ".xlsm") else _iter_csv(path, profile)
+
+    columns: Dict[str, str] = dict(profile["columns"])
+    index: Optional[Dict[str, int]] = None
+
+    for line_no, row in rows:
+        if index is None:
+            header = [_cell_text(h).lower() for h in row]
+            if not any(header):
+                continue  # blank lines before the header
+            missing = [col for col in columns.values() if col.strip().lower() not in header]
+            if missing:
+                raise WorkOrderImportError(f"Line {line_no}: missing column(s): {', '.join(missing)}")
+            index = {field: header.index(col.strip().lower()) for field, col in columns.items()}
+            continue
+
+        yield line_no, {
+            field: (_cell_text(row[i]) if i < len(row) else "")
+            for field, i in index.items()
+        }
+
+    if index is None:
+        raise WorkOrderImportError("The file is empty (no header row found).")
+
+
+# ---------- Import ----------
+def import_work_orders(path: str, profile: Profile,
+                       lot_number: Optional[str] = None) -> Tuple[List[WorkOrder], List[str]]:
+    """
+    Stream the file and validate every row.
+    Returns (work orders, errors); errors carry file line numbers.
+    """
+    wos: List[WorkOrder] = []
+    errors: List[str] = []
+    lot = str(lot_number).strip() if lot_number is not None else None
+
+    for line_no, values in iter_rows(path, profile):
+        if lot is not None and "lot" in values and values["lot"] != lot:
+            continue
+
+        wo, error = validate_work_order_row(*(values.get(f, "") for f in WO_FIELDS))
+        if error:
+            errors.append(f"Line {line_no}: {error}")
+        elif wo is not None:
+            wo["remaining"] = wo["total_qty"]
+            wos.append(wo)
+
+    if not wos and not errors:
+        errors.append("No Work Orders found" + (f" for LOT {lot}." if lot else "."))
+    elif len(wos) > MAX_WORK_ORDERS:
+        errors.append(f"Maximum {MAX_WORK_ORDERS} Work Orders allowed (found {len(wos)}).")
+
+    return wos, errors
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Validate a Work Order export (CSV/XLSX).")
+    ap.add_argument("path", nargs="?")
+    ap.add_argument("--profile", default=DEFAULT_PROFILE_NAME)
+    ap.add_argument("--lot", default=None)
+    ap.add_argument("--save-profile", metavar="NAME", help="Save a column mapping instead of importing")
+    ap.add_argument("--column", action="append", default=[], metavar="FIELD=HEADER",
+                    help=f"Column mapping for --save-profile; fields: {', '.join(WO_FIELDS)}, lot")
+    ap.add_argument("--delimiter", default=",")
+    ap.add_argument("--sheet", default=None)
+    args = ap.parse_args(argv)
+
+    if args.save_profile:
+        columns = dict(DEFAULT_PROFILE["columns"])
+        for item in args.column:
+            field, _, header = item.partition("=")
+            if field not in WO_FIELDS + ("lot",) or not header:
+                ap.error(f"bad --column '{item}'")
+            columns[field] = header
+        save_profile(args.save_profile, {"columns": columns, "delimiter": args.delimiter, "sheet": args.sheet})
+        print(f"✅ Profile '{args.save_profile}' saved to {PROFILES_PATH}")
+        return 0
+
+    if not args.path:
+        ap.error("path is required")
+
+    profiles = load_profiles()
+    if args.profile not in profiles:
+        print(f"❌ Unknown profile '{args.profile}' (have: {', '.join(profiles)})")
+        return 2
+
+    try:
+        wos, errors = import_work_orders(args.path, profiles[args.profile], args.lot)
+    except (WorkOrderImportError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    for wo in wos:
+        print(f"WO {wo['work_order']} | PART: {wo['part']} | TAG+DESC: {wo['tag_desc']} "
+              f"| CODE: {wo['code']} | TOTAL QTY: {wo['total_qty']}")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
-import os
+import io
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_ALIGN_VERTICAL
-from docx.shared import Pt, Inches
+from docx.shared import Emu, Pt
 
-from barcode_utils import create_barcode_temp
+from barcode_utils import barcode_picture
 
 
 # -------------------------------------------------
@@ -18,7 +18,7 @@ def clear_cell(cell):
     cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
 
 
-def add_centered_text(cell, text, size=10, bold=False):
+def add_centered_text(cell, text, size=10, bold=False, scale=1.0):
     """
     Add a centered paragraph with Calibri font.
 
@@ -27,6 +27,7 @@ def add_centered_text(cell, text, size=10, bold=False):
         text (str): Text to insert
         size (int): Font size in points
         bold (bool): Whether text should be bold
+        scale (float): Label stock font scale (size is multiplied by it)
     """
     p = cell.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -38,26 +39,26 @@ def add_centered_text(cell, text, size=10, bold=False):
 
     run = p.add_run(text)
     run.font.name = "Calibri"
-    run.font.size = Pt(size)
+    run.font.size = Pt(round(size * scale * 2) / 2)  # Word sizes are half points
     run.bold = bold
 
 
 # -------------------------------------------------
 # COVER PAGE LABELS
 # -------------------------------------------------
-def add_cover_label(cell, lot_number):
+def add_cover_label(cell, lot_number, scale=1.0):
     """
     Cover slot format:
       Cover Page
       LOT # <lot_number>
     """
     clear_cell(cell)
-    add_centered_text(cell, "Cover Page", size=24, bold=True)
-    add_centered_text(cell, f"LOT # {lot_number}", size=24, bold=True)
+    add_centered_text(cell, "Cover Page", size=24, bold=True, scale=scale)
+    add_centered_text(cell, f"LOT # {lot_number}", size=24, bold=True, scale=scale)
 
 
 
-def add_sheet_label(cell, text):
+def add_sheet_label(cell, text, scale=1.0):
     """
     Sheet slot format.
     The text is already pre-formatted by main.py.
@@ -80,10 +81,10 @@ def add_sheet_label(cell, text):
         sheet_part = text.strip()
         lot_part = ""
 
-    add_centered_text(cell, f"Sheet # {sheet_part}", size=20, bold=True)
+    add_centered_text(cell, f"Sheet # {sheet_part}", size=20, bold=True, scale=scale)
 
     if lot_part:
-        add_centered_text(cell, lot_part, size=20, bold=True)
+        add_centered_text(cell, lot_part, size=20, bold=True, scale=scale)
 
 
 
@@ -92,7 +93,7 @@ def add_sheet_label(cell, text):
 # WORK ORDER LABEL
 # -------------------------------------------------
 
-def add_workorder_label(cell, wo, lot_number):
+def add_workorder_label(cell, wo, lot_number, scale=1.0, barcode_width=1.35, barcode_profile=None):
     """
     Render a Work Order label.
 
@@ -104,24 +105,32 @@ def add_workorder_label(cell, wo, lot_number):
         * If wo["qty_override"] exists → prints QTY total
     - Sheets:
         * If wo["hide_qty"] == True → QTY line is omitted
+    - Serialized pieces (core.serials):
+        * wo["code"] is the piece serial, wo["serial_line"] prints it under the barcode
+        * If wo["piece_of"] = (n, N) → "n of N" line instead of QTY
 
     Parameters:
         cell: python-docx table cell
         wo (dict): Work order data
         lot_number (str): Current lot number
+        scale (float): Label stock font scale
+        barcode_width (float): Barcode slot width in inches (picture size per barcode profile)
+        barcode_profile (str): core.barcode_profiles name (None = default profile)
     """
     clear_cell(cell)
 
     # PART NUMBER (largest text)
-    add_centered_text(cell, wo["part"], size=26, bold=True)
+    add_centered_text(cell, wo["part"], size=26, bold=True, scale=scale)
 
     # TAG + DESCRIPTION (single combined line)
-    add_centered_text(cell, wo["tag_desc"], size=20)
+    add_centered_text(cell, wo["tag_desc"], size=20, scale=scale)
 
     # -------------------------------------------------
     # BARCODE
     # -------------------------------------------------
-    barcode_path = create_barcode_temp(wo["code"])
+    # Sized by the barcode profile (core.barcode_profiles): stretched to the
+    # slot, or whole printer dots per module at the printer's dpi
+    picture = barcode_picture(wo["code"], barcode_width, barcode_profile)
 
     p = cell.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -129,28 +138,34 @@ def add_workorder_label(cell, wo, lot_number):
     p.paragraph_format.space_after = Pt(1)
 
     run = p.add_run()
-    run.add_picture(barcode_path, width=Inches(1.35))
+    run.add_picture(io.BytesIO(picture.png), width=Emu(picture.width_emu))
 
-    # Remove temporary barcode image
-    os.remove(barcode_path)
+    # Human-readable serial (serialized piece labels only)
+    if wo.get("serial_line"):
+        add_centered_text(cell, wo["serial_line"], size=9, scale=scale)
 
     # -------------------------------------------------
     # TEXT FOOTER
     # -------------------------------------------------
 
     # Work Order number
-    add_centered_text(cell, f'WO {wo["work_order"]}', size=16)
+    add_centered_text(cell, f'WO {wo["work_order"]}', size=16, scale=scale)
 
     # Lot number
-    add_centered_text(cell, f'LOT {lot_number}', size=16)
+    add_centered_text(cell, f'LOT {lot_number}', size=16, scale=scale)
 
     # Quantity handling:
     # - Default → QTY 1
     # - Cover → QTY total (via qty_override)
     # - Sheets → no QTY line (via hide_qty)
-    if not wo.get("hide_qty", False):
+    # - Serialized pieces → "n of N" (via piece_of)
+    if wo.get("piece_of"):
+        n, total = wo["piece_of"]
+        add_centered_text(cell, f"{n} of {total}", size=16, scale=scale)
+    elif not wo.get("hide_qty", False):
         add_centered_text(
             cell,
             f'QTY {wo.get("qty_override", 1)}',
-            size=16
+            size=16,
+            scale=scale
         )
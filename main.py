@@ -1,24 +1,16 @@
+from __future__ import annotations
+
 import os
 import time
-from docx import Document
-
-from label_layout import (
-    add_cover_label,
-    add_sheet_label,
-    add_workorder_label,
-)
-
+from typing import TYPE_CHECKING
 
-
-# Footer fields for "Page X of Y"
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+# python-docx / label_layout (barcode + Pillow) are imported lazily on first
+# generation so the console prompts and the GUI start without loading them.
+if TYPE_CHECKING:
+    from docx.document import Document
 
 os.makedirs("output", exist_ok=True)
 
-# Fixed 6 slots per page (3 rows x 2 cols)
-SLOTS = [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1)]
-
 
 # -----------------------------
 # Input helpers (safe input)
@@ -80,9 +72,23 @@ def sanitize_filename(text: str) -> str:
 # -----------------------------
 # Footer: "Page X of Y"
 # -----------------------------
-def add_page_x_of_y_footer(document: Document) -> None:
-    """Add centered 'Page X of Y' to the footer using Word fields."""
+def add_page_x_of_y_footer(document: Document, first_page: int = 1, total_pages: int | None = None) -> None:
+    """
+    Add centered 'Page X of Y' to the footer using Word fields.
+    For one file of a chunked lot: numbering starts at first_page and Y is
+    the page count of the whole lot (total_pages) instead of NUMPAGES.
+    """
+    # Footer fields for "Page X of Y"
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
     section = document.sections[0]
+    if first_page != 1:
+        pg_num = OxmlElement("w:pgNumType")
+        pg_num.set(qn("w:start"), str(first_page))
+        section._sectPr.insert_element_before(
+            pg_num, "w:cols", "w:formProt", "w:vAlign", "w:noEndnote", "w:titlePg", "w:textDirection",
+            "w:bidi", "w:rtlGutter", "w:docGrid", "w:printerSettings", "w:sectPrChange")
     footer = section.footer
     footer.is_linked_to_previous = False
 
@@ -95,6 +101,10 @@ def add_page_x_of_y_footer(document: Document) -> None:
     fld_page.set(qn("w:instr"), "PAGE")
     p.runs[-1]._r.append(fld_page)
 
+    if total_pages is not None:
+        p.add_run(f" of {total_pages}")
+        return
+
     p.add_run(" of ")
 
     fld_pages = OxmlElement("w:fldSimple")
@@ -161,6 +171,32 @@ def edit_workorders(work_orders: list[dict]) -> None:
         print("✅ Work Order updated.")
 
 
+def import_workorders_from_file(lot_number: str) -> list[dict]:
+    """
+    Optionally load WOs from an ERP export (CSV/XLSX, default import profile).
+    Returns [] if the user prefers to type them.
+    """
+    from core.wo_import import (
+        DEFAULT_PROFILE_NAME, WorkOrderImportError, import_work_orders, load_profiles,
+    )
+
+    while True:
+        path = input("Import Work Orders from file (CSV/XLSX path, blank to type them): ").strip().strip('"')
+        if not path:
+            return []
+        try:
+            work_orders, errors = import_work_orders(path, load_profiles()[DEFAULT_PROFILE_NAME], lot_number)
+        except (WorkOrderImportError, OSError) as e:
+            print(f"❌ {e}")
+            continue
+        if errors:
+            for err in errors:
+                print(f"❌ {err}")
+            continue
+        print(f"✅ Imported {len(work_orders)} Work Order(s).")
+        return work_orders
+
+
 # -----------------------------
 # Sheet planning (manual nesting)
 # -----------------------------
@@ -206,126 +242,404 @@ def plan_sheets(work_orders: list[dict]) -> list[dict]:
     return sheets
 
 
+def import_sheets_from_report(work_orders: list[dict]) -> list[dict]:
+    """
+    Optionally load the sheet allocations from a CAM nest report (CSV/XML).
+    Returns [] if the user prefers to enter them by hand.
+    """
+    from core.nest_import import DEFAULT_PROFILE_NAME, NestImportError, import_nest_report, load_profiles
+
+    while True:
+        path = input("Import sheets from CAM nest report (CSV/XML path, blank to enter them): ").strip().strip('"')
+        if not path:
+            return []
+        profile = load_profiles()["xml" if path.lower().endswith(".xml") else DEFAULT_PROFILE_NAME]
+        try:
+            sheets, errors = import_nest_report(path, profile, work_orders)
+        except (NestImportError, OSError) as e:
+            print(f"❌ {e}")
+            continue
+        if errors or not sheets:
+            for err in errors or ["No sheets found in the report."]:
+                print(f"❌ {err}")
+            continue
+        for wo in work_orders:
+            wo["remaining"] = 0
+        print(f"✅ Imported {len(sheets)} sheet(s).")
+        return sheets
+
+
+def describe_serials(lot_number: str, work_orders: list[dict], sheets: list[dict]) -> str:
+    """First / last serial per serialized WO, one line each."""
+    from core.serials import is_serialized, lot_serials
+
+    return "\n".join(f"  WO {wo['work_order']}: {values[0]} .. {values[-1]} ({len(values)} pcs)"
+                     for wo, values in zip(work_orders, lot_serials(lot_number, work_orders, sheets))
+                     if is_serialized(wo) and values)
+
+
 def show_summary(work_orders: list[dict], sheets: list[dict]) -> None:
     """Print a summary of all sheets and totals per WO."""
-    print("\n================= NEST SUMMARY =================")
-    totals = {i: 0 for i in range(len(work_orders))}
+    from core.flow_logic import NestSummary
 
-    for sh in sheets:
-        print(f"\nSHEET {sh['sheet_number']}:")
-        for i, qty in sh["allocations"]:
-            if qty > 0:
-                wo = work_orders[i]
-                totals[i] += qty
-                print(f"  - WO {wo['work_order']} | PART {wo['part']} -> {qty} pcs")
-
-    print("\nTOTALS BY WORK ORDER:")
-    for i, wo in enumerate(work_orders):
-        print(f"  WO {wo['work_order']} | PART {wo['part']} -> {totals[i]} pcs (expected {wo['total_qty']})")
+    print()
+    for line in NestSummary(work_orders, sheets).iter_text_lines():
+        print(line)
 
 
 # -----------------------------
 # DOC generation (uses your existing label functions)
 # -----------------------------
-def generate_doc(lot_number: str, work_orders: list[dict], sheets: list[dict]) -> str:
+def generate_doc(lot_number: str, work_orders: list[dict], sheets: list[dict], stock: str | None = None,
+                 color: str | None = None, barcode_profile: str | None = None,
+                 compression: str | None = None, verify_dpi: int | None = None) -> str:
     """
     Build the DOCX using your current formatting functions.
     - Cover page: LOT + up to 4 WOs, QTY = total (override)
     - Sheets: each SHEET label uses the next available slot (no forced page breaks between sheets)
     - Sheets labels: no QTY line (hide flag)
+    - Page size, label grid and sizes come from the label stock (core.label_stock)
+    - Barcodes are sized by the barcode profile (core.barcode_profiles, None = default)
     """
-    doc = Document()
+    from core.barcode_profiles import get_profile
 
-    def new_page():
-        table = doc.add_table(rows=3, cols=2)
-        return table, 0
+    barcode_profile = get_profile(barcode_profile).name
+    doc, render_s = build_doc(lot_number, work_orders, sheets, stock, barcode_profile)
 
-    # ---------------- COVER PAGE ----------------
-    table, slot_idx = new_page()
+    # Ask user which color to include in the file name (unless already chosen)
+    if color is None:
+        color = input_choice("Choose label color (WHITE-R0/ORANGE-R4/GREEN-R6/YELLOW-R8): ",
+                             ["WHITE", "ORANGE", "GREEN", "YELLOW"])
 
-    # Slot 0: LOT (custom text)
-    add_cover_label(table.cell(0, 0), lot_number)
+    return save_colors(doc, lot_number, [color], work_orders, sheets, render_s, stock=stock,
+                       compression=compression, barcode_profile=barcode_profile, verify_dpi=verify_dpi)[0]
 
 
+def build_doc(lot_number: str, work_orders: list[dict], sheets: list[dict],
+              stock: str | None = None, barcode_profile: str | None = None) -> tuple[Document, float]:
+    """Render the label document (color independent). Returns (document, render seconds)."""
+    from core.render_cache import build_pages
 
+    t_start = time.perf_counter()
+    pages, label_stock, _ = plan_doc(lot_number, work_orders, sheets, stock, barcode_profile)
+    doc, reused = build_pages(pages, label_stock, doc_key=f"generate_doc:{lot_number}")
 
-    # Slots 1-4: WOs (slot 5 stays blank)
-    slot_idx = 1
-    for wo in work_orders:
-        if slot_idx >= 5:
-            break
+    # Footer numbering (already present on a reused document)
+    if not reused and label_stock.footer:
+        add_page_x_of_y_footer(doc)
 
-        r, c = SLOTS[slot_idx]
+    return doc, time.perf_counter() - t_start
 
-        # Cover: show total QTY using qty_override (do not remove any existing code in label_layout)
-        wo["qty_override"] = wo["total_qty"]
-        add_workorder_label(table.cell(r, c), wo, lot_number)
-        del wo["qty_override"]
 
-        slot_idx += 1
+def plan_doc(lot_number: str, work_orders: list[dict], sheets: list[dict], stock: str | None = None,
+             barcode_profile: str | None = None):
+    """
+    Lay the lot out on label slots without rendering anything.
+    Returns (page plan for core.render_cache.build_pages, label stock,
+    index of the page holding the last label of each sheet).
+    """
+    from core.barcode_profiles import get_profile
+    from core.label_stock import get_stock
+    from core.render_cache import Variant, fragment_key
+    from core.serials import is_serialized, lot_serials, piece_counts, piece_label_fields, png_size, render_barcodes
+    from label_layout import (
+        add_cover_label,
+        add_sheet_label,
+        add_workorder_label,
+    )
+
+    label_stock = get_stock(stock)
+    capacity = label_stock.capacity
+    scale = label_stock.font_scale
+    # font scale / barcode width / barcode profile: part of every fragment key
+    profile = get_profile(barcode_profile).name
+    look = dict(label_stock.render_signature(), barcode_profile=profile)
+
+    # Each planned slot is (slot index, fragment key, render function).
+    # Identical labels share a fragment key, so they are rendered once and
+    # copied (core.render_cache); unchanged cells are reused on regeneration.
+    def wo_label(wo: dict, **flags):
+        wo_flags = dict(wo, **flags)
+        key = fragment_key("wo", lot_number, wo, **flags, **look)
+        return key, lambda cell: add_workorder_label(cell, wo_flags, lot_number, scale,
+                                                     label_stock.barcode_w_in, profile)
+
+    # Serialized WOs (core.serials): a different barcode on every piece. All
+    # barcodes are rendered in one batch; each piece label is a Variant of one
+    # base label per WO and barcode size (serial text + picture swapped).
+    serialized = [is_serialized(wo) for wo in work_orders]
+    if any(serialized):
+        images = render_barcodes([v for values in lot_serials(lot_number, work_orders, sheets) for v in values],
+                                 width_in=label_stock.barcode_w_in, profile=profile)
+        totals = piece_counts(work_orders, sheets)
+        seqs = [0] * len(work_orders)
+        bases: dict = {}  # (wo index, barcode px size) -> (base key, base fields)
+
+    def serial_label(i: int):
+        seqs[i] += 1
+        fields = piece_label_fields(work_orders[i], lot_number, seqs[i], totals[i])
+        image = images[fields["code"]]
+        flags = {"hide_qty": True, "serial": fields["code"], "piece_of": fields.get("piece_of")}
+
+        base = bases.get((i, png_size(image)))
+        if base is None:
+            base = bases[(i, png_size(image))] = (fragment_key("wo-serial-base", lot_number, fields, **flags, **look),
+                                                   fields)
+        base_key, base_fields = base
+        texts = {base_fields["serial_line"]: fields["serial_line"]}
+        if "piece_of" in fields:
+            texts["{} of {}".format(*base_fields["piece_of"])] = "{} of {}".format(*fields["piece_of"])
+        render = Variant(base_key, lambda cell: add_workorder_label(cell, base_fields, lot_number, scale,
+                                                                    label_stock.barcode_w_in, profile),
+                         texts, image)
+        return fragment_key("wo", lot_number, fields, **flags, **look), render
+
+    # ---------------- COVER PAGE ----------------
+    # Slot 0: LOT (custom text)
+    cover = [(0, fragment_key("cover", lot_number, **look),
+              lambda cell: add_cover_label(cell, lot_number, scale))]
+
+    # Slots 1-4: WOs (other slots stay blank)
+    # Cover: show total QTY using qty_override (do not remove any existing code in label_layout)
+    for slot_idx, wo in enumerate(work_orders[:label_stock.cover_wo_slots], start=1):
+        key, fn = wo_label(wo, qty_override=wo["total_qty"])
+        cover.append((slot_idx, key, fn))
 
     # After cover, start next content on a new page
-    doc.add_page_break()
+    pages = [cover]
 
     # ---------------- SHEETS (continuous flow) ----------------
-    table, slot_idx = new_page()
+    page: list = []
+    pages.append(page)
+    sheet_last_page: list[int] = []
+
+    def place(key, fn):
+        nonlocal page
+        if len(page) >= capacity:
+            page = []
+            pages.append(page)
+        page.append((len(page), key, fn))
 
     for sh in sheets:
         # Place the SHEET label in the next available slot
-        if slot_idx >= 6:
-            doc.add_page_break()
-            table, slot_idx = new_page()
-
-        r, c = SLOTS[slot_idx]
         sheet_text = f"{sh['sheet_number']} - LOT # {lot_number}"
-        add_sheet_label(table.cell(r, c), sheet_text)
-        slot_idx += 1
-
+        place(fragment_key("sheet", lot_number, text=sheet_text, **look),
+              lambda cell, text=sheet_text: add_sheet_label(cell, text, scale))
 
         # Print labels per piece
         for i, qty in sh["allocations"]:
             if qty <= 0:
                 continue
-            wo = work_orders[i]
-
-            for _ in range(qty):
-                if slot_idx >= 6:
-                    doc.add_page_break()
-                    table, slot_idx = new_page()
-
-                r, c = SLOTS[slot_idx]
 
-                # Sheets: hide QTY line (your add_workorder_label checks this flag)
-                wo["hide_qty"] = True
-                add_workorder_label(table.cell(r, c), wo, lot_number)
-                del wo["hide_qty"]
+            if serialized[i]:
+                for _ in range(qty):
+                    place(*serial_label(i))
+                continue
 
-                slot_idx += 1
+            # Sheets: hide QTY line (your add_workorder_label checks this flag)
+            key, fn = wo_label(work_orders[i], hide_qty=True)
+            for _ in range(qty):
+                place(key, fn)
+        sheet_last_page.append(len(pages) - 1)
 
-    # Footer numbering
-    add_page_x_of_y_footer(doc)
+    return pages, label_stock, sheet_last_page
 
-    # Ask user which color to include in the file name
-    color = input_choice("Choose label color (WHITE-R0/ORANGE-R4/GREEN-R6/YELLOW-R8): ",
-                        ["WHITE", "ORANGE", "GREEN", "YELLOW"])
 
-    # Build file name: LOT <lot_number> <COLOR>.docx
-    base_name = sanitize_filename(f"LOT {lot_number} {color}")
-    filename = f"output/{base_name}.docx"
-
-    doc.save(filename)
-    return filename
+def save_colors(doc: Document, lot_number: str, colors: list[str], work_orders: list[dict],
+                sheets: list[dict], render_s: float = 0.0, *, output_dir: str = "output",
+                record: bool = True, stock: str | None = None, compression: str | None = None,
+                barcode_profile: str | None = None, verify_dpi: int | None = None) -> list[str]:
+    """
+    Save one rendered document once per color: LOT <lot_number> <COLOR>.docx.
+    Color variants (core.color_variants) are patched in before saving and
+    undone after; colors without a variant are copies of the first plain save.
+    Files are written atomically on background threads (core.docx_save).
+    record=False skips the job store and metrics log (test/benchmark renders).
+    verify_dpi: check every saved barcode at this printer dpi (core.barcode_verify).
+    """
+    from core.color_variants import load_variants, normalize_colors
+    from core.docx_save import save_variants
+
+    variants = load_variants()
+    colors = normalize_colors(colors)
+    # File names: LOT <lot_number> <COLOR>.docx
+    targets = [(f"{output_dir}/{sanitize_filename(f'LOT {lot_number} {color}')}.docx", variants.get(color, {}))
+               for color in colors]
+    t_save = time.perf_counter()
+    results = save_variants(doc, targets, compression)
+    save_ms = (time.perf_counter() - t_save) * 1000
+
+    from core.barcode_verify import verify_outputs
+    verify_outputs([result["path"] for result in results], lot_number, work_orders, sheets, dpi=verify_dpi)
+
+    if record:
+        from core.metrics import record_run
+        from core.renderers import get_renderer
+
+        legacy = get_renderer("docx-legacy")
+        record_run(backend=legacy.name, lot_number=lot_number, work_orders=work_orders, sheets=sheets,
+                   labels=legacy.expected_labels(work_orders, sheets), pages=len(doc.tables),
+                   phases={"render_ms": render_s * 1000, "save_ms": save_ms}, results=results, stock=stock)
+        for color, result in zip(colors, results):
+            record_generation(lot_number, color, work_orders, sheets, result["path"],
+                              {"render_ms": render_s * 1000, "save_ms": result["save_ms"],
+                               "save_bytes": result["bytes"], "compression": result["compression"]},
+                              stock, barcode_profile)
+            render_s = 0.0  # rendered once: charge it to the first color only
+
+    return [result["path"] for result in results]
+
+
+def generate_doc_colors(lot_number: str, work_orders: list[dict], sheets: list[dict],
+                        colors: list[str], *, output_dir: str = "output", record: bool = True,
+                        stock: str | None = None, compression: str | None = None,
+                        barcode_profile: str | None = None, verify_dpi: int | None = None,
+                        chunk_pages: int | None = None, chunk_sheets: int | None = None) -> list[str]:
+    """
+    Render the lot once and save it for every color in `colors`
+    (in files of chunk_pages pages / chunk_sheets sheets if either is given).
+    """
+    from core.barcode_profiles import get_profile
+
+    barcode_profile = get_profile(barcode_profile).name
+    if chunk_pages is not None or chunk_sheets is not None:
+        return generate_doc_chunked(lot_number, work_orders, sheets, colors, chunk_pages=chunk_pages,
+                                    chunk_sheets=chunk_sheets, output_dir=output_dir, record=record, stock=stock,
+                                    compression=compression, barcode_profile=barcode_profile, verify_dpi=verify_dpi)
+    doc, render_s = build_doc(lot_number, work_orders, sheets, stock, barcode_profile)
+    return save_colors(doc, lot_number, colors, work_orders, sheets, render_s, output_dir=output_dir,
+                       record=record, stock=stock, compression=compression, barcode_profile=barcode_profile,
+                       verify_dpi=verify_dpi)
+
+
+def generate_doc_chunked(lot_number: str, work_orders: list[dict], sheets: list[dict], colors: list[str], *,
+                         chunk_pages: int | None = None, chunk_sheets: int | None = None,
+                         output_dir: str = "output", record: bool = True, stock: str | None = None,
+                         compression: str | None = None, barcode_profile: str | None = None,
+                         verify_dpi: int | None = None) -> list[str]:
+    """
+    Render the lot in chunks of N pages or N sheets (core.chunked_output),
+    one file per chunk and color. Each chunk goes to a background save as
+    soon as it is rendered, while the next one renders. Page numbers run on
+    across the files. Returns the paths, chunk by chunk.
+    """
+    from core.barcode_profiles import get_profile
+    from core.chunked_output import chunk_path, describe_chunk, plan_chunks
+    from core.color_variants import load_variants, normalize_colors
+    from core.docx_save import BackgroundSaver, submit_variants
+    from core.render_cache import build_pages
+
+    t_start = time.perf_counter()
+    barcode_profile = get_profile(barcode_profile).name
+    plan, label_stock, sheet_last_page = plan_doc(lot_number, work_orders, sheets, stock, barcode_profile)
+    chunks = plan_chunks(len(plan), sheet_last_page, chunk_pages, chunk_sheets)
+    variants = load_variants()
+    colors = normalize_colors(colors)
+    os.makedirs(output_dir, exist_ok=True)
+
+    first_ready: list[float] = []  # save finish times (appended by the save threads)
+    unreported: list = []  # (future, chunk description) in chunk order
+
+    def report(wait: bool) -> None:
+        # Main thread, chunk order: finished saves are printed while the next chunks render
+        while unreported and (wait or unreported[0][0].done()):
+            future, what = unreported.pop(0)
+            print(f"✅ {future.result()['path']} ({what})")
+
+    futures: list[list] = []  # per chunk: one future per color
+    render_s = 0.0
+    with BackgroundSaver() as saver:
+        for k, (start, end) in enumerate(chunks, start=1):
+            t_chunk = time.perf_counter()
+            doc, _ = build_pages(plan[start:end], label_stock)
+            if label_stock.footer:
+                add_page_x_of_y_footer(doc, first_page=start + 1, total_pages=len(plan))
+            render_s += time.perf_counter() - t_chunk
+
+            what = describe_chunk((start, end), len(plan), sheet_last_page)
+            targets = [(chunk_path(output_dir, sanitize_filename(f"LOT {lot_number} {color}"), k, len(chunks)),
+                        variants.get(color, {})) for color in colors]
+            chunk_futures = submit_variants(saver, doc, targets, compression)
+            for future in chunk_futures:
+                future.add_done_callback(lambda f: first_ready.append(time.perf_counter()))
+                unreported.append((future, what))
+            futures.append(chunk_futures)
+            report(wait=False)
+        report(wait=True)
+    results = [[f.result() for f in chunk_futures] for chunk_futures in futures]
+    total_ms = (time.perf_counter() - t_start) * 1000
+    if first_ready:
+        print(f"First file ready after {(min(first_ready) - t_start) * 1000:.0f} ms "
+              f"({len(chunks)} files per color, {total_ms:.0f} ms in all)")
+
+    paths = [result["path"] for chunk_results in results for result in chunk_results]
+    from core.barcode_verify import verify_outputs
+    verify_outputs(paths, lot_number, work_orders, sheets, complete=len(chunks) == 1, dpi=verify_dpi)
+
+    if record:
+        from core.metrics import record_run
+        from core.renderers import get_renderer
+
+        render_ms = render_s * 1000
+        per_color = [{"path": results[0][c]["path"], "bytes": sum(r[c]["bytes"] for r in results),
+                      "compression": results[0][c]["compression"]} for c in range(len(colors))]
+        legacy = get_renderer("docx-legacy")
+        record_run(backend=legacy.name, lot_number=lot_number, work_orders=work_orders, sheets=sheets,
+                   labels=legacy.expected_labels(work_orders, sheets), pages=len(plan),
+                   phases={"render_ms": render_ms, "save_ms": total_ms - render_ms}, results=per_color, stock=stock)
+        # One job per color; its output path is the first file of the lot
+        for color, result in zip(colors, per_color):
+            record_generation(lot_number, color, work_orders, sheets, result["path"],
+                              {"render_ms": render_ms, "save_ms": total_ms - render_ms,
+                               "save_bytes": result["bytes"], "compression": result["compression"],
+                               "chunks": len(chunks)}, stock, barcode_profile)
+            render_ms = 0.0  # rendered once: charge it to the first color only
+    return paths
+
+
+def record_generation(lot_number: str, color: str, work_orders: list[dict], sheets: list[dict],
+                      filename: str, timings: dict, stock: str | None = None,
+                      barcode_profile: str | None = None) -> None:
+    """Store the generated document in the job store (never blocks generation on errors)."""
+    import sqlite3
+    from core.job_store import JobStore
+
+    try:
+        JobStore().record_job(lot_number, color, work_orders, sheets, filename, timings, stock=stock,
+                              barcode_profile=barcode_profile)
+    except (sqlite3.Error, OSError, ValueError, TypeError) as e:  # the DOCX is already written
+        print(f"⚠️ Could not record job in job store: {e}")
 
 
 # -----------------------------
 # Main program flow
 # -----------------------------
-def main():
+def output_ready(lot_number: str, colors: list[str]) -> bool:
+    """
+    Output checks for the chosen colors (folder writable, file not open in Word).
+    On problems: fix and check again, or cancel. Returns False when cancelled.
+    """
+    from core.preflight import format_problems, output_problems
+
+    while True:
+        problems = output_problems(lot_number, colors)
+        if not problems:
+            return True
+        print("\n❌ " + format_problems(problems, limit=len(problems)))
+        if not input_yes_no("\nFix it (e.g. close the file in Word) and check again? (Y/N): "):
+            print("✅ Cancelled. No document generated.")
+            return False
+
+
+def main(renderer: str | None = None, stock: str | None = None, serial: str | None = None,
+         piece_numbers: bool = False, barcode_profile: str | None = None, compression: str | None = None,
+         verify_dpi: int | None = None, chunk_pages: int | None = None, chunk_sheets: int | None = None):
     # 1) Basic LOT + WO entry
     lot_number = input_text("LOT #: ")
-    wo_count = input_int("How many Work Orders (max 4): ", 1, 4)
 
-    work_orders: list[dict] = []
+    work_orders = import_workorders_from_file(lot_number)
+    wo_count = 0 if work_orders else input_int("How many Work Orders (max 4): ", 1, 4)
+
     for i in range(wo_count):
         print(f"\n--- WORK ORDER {i + 1} ---")
         wo = {
@@ -344,10 +658,23 @@ def main():
     # 3) Nesting loop: plan sheets -> summary -> re-nest?
     while True:
         reset_remaining(work_orders)
-        sheets = plan_sheets(work_orders)
+        sheets = import_sheets_from_report(work_orders) or plan_sheets(work_orders)
 
         show_summary(work_orders, sheets)
 
+        # Preflight: every data problem at once, before anything is rendered
+        # (output files are checked once the colors are chosen)
+        from core.preflight import format_problems, preflight
+
+        problems = preflight(lot_number, work_orders, sheets, stock=stock, output_dir=None)
+        if problems:
+            print("\n❌ " + format_problems(problems, limit=len(problems)))
+            if not input_yes_no("\nEdit Work Orders and re-nest? (Y/N): "):
+                print("✅ Cancelled. No document generated.")
+                return
+            edit_workorders(work_orders)
+            continue
+
         # Ask if user wants to redo nesting (re-enter sheet allocations)
         redo = input_yes_no("\nDo you want to re-nest and re-enter sheet allocations? (Y/N): ")
         if not redo:
@@ -359,11 +686,122 @@ def main():
         print("✅ Cancelled. No document generated.")
         return
 
-    # 5) Generate final document
-    filename = generate_doc(lot_number, work_orders, sheets)
+    # 5) Lot already generated before? Offer to print only the changes
+    from core.delta import generate_delta_from_previous, render_void_list
+    from core.job_store import JobStore
+    from core.serials import is_serialized
+
+    import sqlite3
+
+    try:
+        previous = JobStore().latest_for_lot(lot_number)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not read the job store ({e}); generating the full lot.")
+        previous = None
+    if previous is not None and (serial or any(is_serialized(wo) for wo in previous["work_orders"])):
+        previous = None  # serialized lots are numbered per print: no delta
+    if previous is not None and input_yes_no(
+        f"\nLOT {lot_number} was already generated ({previous['output_path']}).\n"
+        "Print only new/changed labels (delta)? (Y/N): "
+    ):
+        color = input_choice("Choose label color (WHITE-R0/ORANGE-R4/GREEN-R6/YELLOW-R8): ",
+                             ["WHITE", "ORANGE", "GREEN", "YELLOW"])
+        docx_path, txt_path, delta = generate_delta_from_previous(previous, work_orders, sheets, color, stock=stock,
+                                                                  barcode_profile=barcode_profile,
+                                                                  compression=compression)
+        print("\n" + render_void_list(lot_number, previous["work_orders"], delta))
+        if docx_path:
+            print(f"\n✅ Delta document generated:\n{docx_path}")
+        else:
+            print("\n✅ Nothing new to print.")
+        print(f"Void list saved:\n{txt_path}")
+        return
+
+    # 6) Generate final document (one file, or one per color from a single render)
+    from core.renderers import DEFAULT_RENDERER, get_renderer
+
+    legacy = get_renderer(renderer).name == DEFAULT_RENDERER
+    # Chunks and barcode verification: docx-legacy renderer only
+    options = dict(stock=stock, compression=compression, barcode_profile=barcode_profile)
+    legacy_options = dict(options, verify_dpi=verify_dpi, chunk_pages=chunk_pages, chunk_sheets=chunk_sheets)
+
+    if serial:
+        from core.serials import SerialError, serialize_lot
+
+        try:
+            work_orders = serialize_lot(lot_number, work_orders, sheets, serial, of_total=piece_numbers)
+        except SerialError as e:
+            print(f"❌ {e}")
+            return
+        print(f"\n✅ Serials reserved:\n{describe_serials(lot_number, work_orders, sheets)}")
+
+    if input_yes_no("\nPrint on more than one label color? (Y/N): "):
+        colors = [c for c in ["WHITE", "ORANGE", "GREEN", "YELLOW"]
+                  if input_yes_no(f"  Include {c}? (Y/N): ")]
+        if colors:
+            if not output_ready(lot_number, colors):
+                return
+            if legacy:
+                filenames = generate_doc_colors(lot_number, work_orders, sheets, colors, **legacy_options)
+            else:
+                filenames = get_renderer(renderer).render_colors(lot_number, work_orders, sheets, colors, **options)
+            print("\n✅ Documents generated:\n" + "\n".join(filenames))
+            print("Tip: In Word, if needed press Ctrl+A then F9 to update 'Page X of Y'.")
+            return
+
+    color = input_choice("Choose label color (WHITE-R0/ORANGE-R4/GREEN-R6/YELLOW-R8): ",
+                         ["WHITE", "ORANGE", "GREEN", "YELLOW"])
+    if not output_ready(lot_number, [color]):
+        return
+    if legacy and (chunk_pages is not None or chunk_sheets is not None):
+        filenames = generate_doc_colors(lot_number, work_orders, sheets, [color], **legacy_options)
+        print("\n✅ Documents generated:\n" + "\n".join(filenames))
+        return
+    if legacy:
+        filename = generate_doc(lot_number, work_orders, sheets, stock, color, barcode_profile,
+                                compression=compression, verify_dpi=verify_dpi)
+    else:
+        filename = get_renderer(renderer).render(lot_number, work_orders, sheets, color, **options)
     print(f"\n✅ Document generated:\n{filename}")
     print("Tip: In Word, if needed press Ctrl+A then F9 to update 'Page X of Y'.")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    from core.barcode_profiles import available_profiles as available_barcode_profiles
+    from core.label_stock import available_stocks
+    from core.renderers import available_renderers
+
+    parser = argparse.ArgumentParser(description="Zebra Labels console")
+    parser.add_argument("--renderer", choices=available_renderers(), default=None,
+                        help="Document backend (default: docx-legacy)")
+    parser.add_argument("--stock", choices=available_stocks(), default=None,
+                        help="Label stock profile (default: letter-3x2)")
+    parser.add_argument("--serialize", nargs="?", const="code-lot-seq", default=None, metavar="TEMPLATE",
+                        help="Unique barcode per piece (core.serials template name or format, "
+                             "default code-lot-seq)")
+    parser.add_argument("--piece-numbers", action="store_true",
+                        help='With --serialize: print "n of N" on every piece label')
+    parser.add_argument("--compression", choices=["stored", "fast", "default", "max"], default=None,
+                        help="DOCX compression level (default: default)")
+    parser.add_argument("--verify", nargs="?", type=int, const=203, default=None, metavar="DPI",
+                        help="Decode every barcode after saving and check module width at the printer DPI "
+                             "(default 203)")
+    parser.add_argument("--barcode-profile", choices=available_barcode_profiles(), default=None,
+                        help="Barcode sizing (core.barcode_profiles): scaled (default) or printer matched, "
+                             "e.g. zebra-203")
+    chunking = parser.add_mutually_exclusive_group()
+    chunking.add_argument("--chunk-pages", type=int, default=None, metavar="N",
+                          help="Write the lot as files of N pages (printing starts on file 1 while the rest "
+                               "renders; docx-legacy renderer)")
+    chunking.add_argument("--chunk-sheets", type=int, default=None, metavar="N",
+                          help="Write the lot as files of N sheets (docx-legacy renderer)")
+    args = parser.parse_args()
+    from core.metrics import set_source
+    set_source("console")
+    for flag, size in (("--chunk-pages", args.chunk_pages), ("--chunk-sheets", args.chunk_sheets)):
+        if size is not None and size < 1:
+            parser.error(f"{flag} must be at least 1")
+    main(args.renderer, args.stock, args.serialize, args.piece_numbers, args.barcode_profile,
+         compression=args.compression, verify_dpi=args.verify or None,
+         chunk_pages=args.chunk_pages, chunk_sheets=args.chunk_sheets)
@@ -0,0 +1,55 @@
+"""core.code128 against python-barcode, the encoder it replaced."""
+import io
+
+import pytest
+
+barcode = pytest.importorskip("barcode")
+from barcode.writer import ImageWriter  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from core.code128 import CORPUS, PYTHON_BARCODE_OPTIONS, modules, render_image  # noqa: E402
+
+
+def _python_barcode_image(value: str) -> Image.Image:
+    writer = ImageWriter()
+    writer.set_options({"write_text": False})
+    buf = io.BytesIO()
+    barcode.get("code128", value, writer=writer).write(buf)
+    buf.seek(0)
+    return Image.open(buf)
+
+
+def _bar_height(img: Image.Image) -> int:
+    """Rows of the bars: the first run of rows with dark pixels (python-barcode writes text below)."""
+    gray = img.convert("L")
+    dark = [min(gray.getpixel((x, y)) for x in range(gray.width)) < 128 for y in range(gray.height)]
+    top = dark.index(True)
+    return dark[top:].index(False) if False in dark[top:] else len(dark) - top
+
+
+@pytest.mark.parametrize("value", [v for v in CORPUS if not v.startswith("99")])
+def test_modules_match_python_barcode(value):
+    assert modules(value) == barcode.get("code128", value).build()[0]
+
+
+def test_leading_99_is_kept():
+    # python-barcode mistakes a leading "99" for a switch-to-C code and drops it
+    assert barcode.get("code128", "9912").build()[0] == modules("12")
+    assert modules("9912") != modules("12")
+
+
+@pytest.mark.parametrize("value", ["ABC123", "WO-12345", "LOT08811-PLNM-4471-0001", "12345678", "X" * 20])
+def test_picture_keeps_python_barcode_proportions(value):
+    """Placed at a fixed width, the picture and its bars keep their height (within 1%)."""
+    legacy = _python_barcode_image(value)
+    native = render_image(value, **PYTHON_BARCODE_OPTIONS)
+
+    assert native.height / native.width == pytest.approx(legacy.height / legacy.width, rel=0.01)
+    assert _bar_height(native) / native.width == pytest.approx(_bar_height(legacy) / legacy.width, rel=0.01)
+
+
+def test_image_is_one_bit_with_whole_pixel_modules():
+    img = render_image("WO-12345", **PYTHON_BARCODE_OPTIONS)
+    assert img.mode == "1"
+    quiet = round(PYTHON_BARCODE_OPTIONS["quiet_zone"] * PYTHON_BARCODE_OPTIONS["dpi"] / 25.4)
+    assert img.width == 2 * quiet + 2 * len(modules("WO-12345"))
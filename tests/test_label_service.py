@@ -0,0 +1,113 @@
+"""core.label_service driven in-process through LocalClient (no socket)."""
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("docx")
+
+from core.label_service import LabelService, LocalClient, _sample_job  # noqa: E402
+
+
+def _run(tmp_path, scenario):
+    """Run scenario(service, client) on a throwaway service (output under tmp_path, no records)."""
+    async def main():
+        service = LabelService(1, output_dir=str(tmp_path), record=False)
+        try:
+            return await scenario(service, LocalClient(service))
+        finally:
+            service.close()
+
+    return asyncio.run(main())
+
+
+def test_identical_requests_are_coalesced(tmp_path):
+    async def scenario(service, client):
+        a, b = await asyncio.gather(client.submit(_sample_job("T-1")), client.submit(_sample_job("T-1")))
+        c = await client.submit(_sample_job("T-1", qty=3))
+        done = await client.wait(a["id"])
+        await client.wait(c["id"])
+        return a, b, c, done
+
+    a, b, c, done = _run(tmp_path, scenario)
+    assert a["id"] == b["id"] and not a["coalesced"] and b["coalesced"]
+    assert c["id"] != a["id"]
+    assert done["status"] == "done", done.get("error")
+
+
+def test_result_lifecycle_409_200_410(tmp_path):
+    async def scenario(service, client):
+        job = await client.submit(_sample_job("T-2"))
+        early = await client.download(job["id"])  # nothing has run yet: still queued
+        record = await client.wait(job["id"])
+        ready = await client.download(job["id"])
+        with open(record["output_path"], "ab") as f:
+            f.write(b"replaced")  # same LOT + COLOR generated again
+        gone = await client.download(job["id"])
+        return early, record, ready, gone
+
+    early, record, ready, gone = _run(tmp_path, scenario)
+    assert early[0] == 409 and early[1]["job"]["status"] == "queued"
+    assert record["status"] == "done", record.get("error")
+    assert os.path.dirname(record["output_path"]) == str(tmp_path)
+    assert ready[0] == 200 and ready[1][:2] == b"PK"
+    assert gone[0] == 410
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/jobs/nope", 404),
+    ("GET", "/jobs/nope/result", 404),
+    ("GET", "/nothing", 404),
+    ("PUT", "/jobs", 405),
+    ("GET", "/jobs", 405),
+    ("POST", "/jobs/abc", 405),
+    ("GET", "/health", 200),
+])
+def test_routing(tmp_path, method, path, expected):
+    async def scenario(service, client):
+        return await client.request(method, path)
+
+    assert _run(tmp_path, scenario)[0] == expected
+
+
+def test_unknown_resource_of_a_job(tmp_path):
+    async def scenario(service, client):
+        job = await client.submit(_sample_job("T-3"))
+        status = (await client.request("GET", f"/jobs/{job['id']}/bogus"))[0]
+        await client.wait(job["id"])
+        return status
+
+    assert _run(tmp_path, scenario) == 404
+
+
+@pytest.mark.parametrize("body", [b"{", b"\xff\xfe", b"", b"[1, 2]", b'"job"'])
+def test_body_that_is_not_a_job_object(tmp_path, body):
+    async def scenario(service, client):
+        return await service.handle("POST", "/jobs", body)
+
+    status, _, data = _run(tmp_path, scenario)
+    assert status == 400, data
+
+
+def _job(**changes):
+    job = _sample_job("T-4")
+    job.update(changes)
+    return job
+
+
+@pytest.mark.parametrize("job, message", [
+    ({"lot": "X"}, "'color' is required."),
+    (_job(work_orders=[1]), "Work order 1: must be an object."),
+    (_job(work_orders={"a": 1}), "'work_orders' must be a list."),
+    (_job(sheets=[{"sheet_number": "abc", "allocations": [[0, 8]]}]), "Sheet 1: invalid sheet_number 'abc'."),
+    (_job(sheets=[7]), "Sheet 1: must be an object."),
+    (_job(sheets=[{"sheet_number": 1, "allocations": [[0]]}]), "Sheet 1: invalid allocations."),
+    (_job(barcode_profile="nope"), "Unknown barcode profile 'nope'"),
+])
+def test_malformed_job_is_400_with_the_item_named(tmp_path, job, message):
+    async def scenario(service, client):
+        return await client.request("POST", "/jobs", job)
+
+    status, payload = _run(tmp_path, scenario)
+    assert status == 400
+    assert message in payload["error"]